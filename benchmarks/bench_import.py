@@ -0,0 +1,56 @@
+"""
+Measures the time and memory it takes to import argon's packages in a fresh interpreter.
+
+    python benchmarks/bench_import.py [repeats]
+"""
+
+import json
+import subprocess
+import sys
+
+MODULES = ["argon", "argon.node", "argon.types"]
+
+# Tracing allocations slows imports down, so time and memory are measured in separate runs
+_TIME_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1e3}}))
+"""
+
+_MEMORY_SNIPPET = """
+import json, tracemalloc
+tracemalloc.start()
+import {module}
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({{"current_kb": current / 1024, "peak_kb": peak / 1024}}))
+"""
+
+
+def _run(snippet: str, module: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", snippet.format(module=module)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def measure(module: str, repeats: int) -> dict:
+    ms = min(_run(_TIME_SNIPPET, module)["ms"] for _ in range(repeats))
+    return {"ms": ms, **_run(_MEMORY_SNIPPET, module)}
+
+
+def main(argv: list[str]) -> None:
+    repeats = int(argv[1]) if len(argv) > 1 else 3
+    for module in MODULES:
+        result = measure(module, repeats)
+        print(
+            f"{module}: {result['ms']:.1f} ms, "
+            f"{result['current_kb']:.0f} KiB retained, {result['peak_kb']:.0f} KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,80 @@
+"""
+Measures the allocations and bytes retained per staged symbol.
+
+Stages a chain of Integer additions and Boolean comparisons under tracemalloc and
+reports the number of live allocations and bytes attributable to each symbol, for symbols
+stored as Exps, stored in columns (State(columnar=True)) and streamed to a temporary file
+(State(sink=SymbolSink(file))), with and without CSE, whose cache takes a large part of the memory
+of columnar and streamed symbols. The streamed numbers include the buffer of the sink.
+
+    python benchmarks/bench_ir_memory.py [num_symbols]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from argon.serialization import SymbolSink
+from argon.state import State
+from argon.types.integer import Integer
+
+
+def stage_chain(
+    num_symbols: int, columnar: bool = False, cse: bool = True, streamed: bool = False
+) -> State:
+    sink = SymbolSink(tempfile.TemporaryFile()) if streamed else None
+    state = State(columnar=columnar, cse=cse, sink=sink)
+    with state:
+        x = Integer().bound("x")
+        for _ in range(num_symbols):
+            x = x + 1
+    return state
+
+
+def measure(
+    num_symbols: int, columnar: bool = False, cse: bool = True, streamed: bool = False
+) -> dict:
+    # Warm up any lazily built caches so they are not attributed to the symbols
+    stage_chain(16, columnar, cse, streamed)
+    gc.collect()
+
+    tracemalloc.start()
+    before_bytes, _ = tracemalloc.get_traced_memory()
+    before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    state = stage_chain(num_symbols, columnar, cse, streamed)
+    gc.collect()
+    after_bytes, _ = tracemalloc.get_traced_memory()
+    after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    stage_chain(num_symbols, columnar, cse, streamed)
+    elapsed = time.perf_counter() - start
+
+    # Each addition also creates a constant operand, which is included in the numbers below
+    num_staged = len(state.scope.symbols)
+    return {
+        "symbols": num_staged,
+        "bytes_per_symbol": (after_bytes - before_bytes) / num_staged,
+        "allocations_per_symbol": (after_blocks - before_blocks) / num_staged,
+        "us_per_symbol": elapsed / num_staged * 1e6,
+    }
+
+
+def main(argv: list[str]) -> None:
+    num_symbols = int(argv[1]) if len(argv) > 1 else 10000
+    for name, columnar, streamed in [
+        ("objects", False, False),
+        ("columns", True, False),
+        ("streamed", False, True),
+    ]:
+        for cse in [True, False]:
+            print(f"{name}, cse={cse}:")
+            for key, value in measure(num_symbols, columnar, cse, streamed).items():
+                print(f"    {key}: {value:.2f}" if isinstance(value, float) else f"    {key}: {value}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
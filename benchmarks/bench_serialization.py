@@ -0,0 +1,73 @@
+"""
+Compares the size and speed of the binary serialization format (argon.serialization) with
+pickle and with pydantic's JSON serialization of the same State, for a wide graph, whose symbols
+only use bound variables and constants, and for a chain of symbols which each use the previous
+one. The JSON route cannot load a graph back, since it writes every symbol nested into each of its
+uses, so only its output and parsing it with json.loads are measured.
+
+    python benchmarks/bench_serialization.py [num_symbols]
+"""
+
+import json
+import pickle
+import sys
+import timeit
+
+import pydantic_core
+
+from argon import serialization
+from argon.state import State
+from argon.types.integer import Integer
+
+
+def stage_wide(num_symbols: int) -> State:
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        for i in range(num_symbols):
+            x + i
+    return state
+
+
+def stage_chain(num_symbols: int) -> State:
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        for i in range(num_symbols):
+            x = x + i
+    return state
+
+
+def formats(state: State) -> dict:
+    return {
+        "argon": (lambda: serialization.dumps(state), serialization.loads),
+        "pickle": (lambda: pickle.dumps(state), pickle.loads),
+        "pydantic json": (
+            lambda: pydantic_core.to_json(state, fallback=str),
+            json.loads,
+        ),
+    }
+
+
+def main(argv: list[str]) -> None:
+    num_symbols = int(argv[1]) if len(argv) > 1 else 3000
+    for shape, stage in [("wide", stage_wide), ("chain", stage_chain)]:
+        state = stage(num_symbols)
+        for name, (save, load) in formats(state).items():
+            try:
+                data = save()
+            except Exception as e:
+                print(f"{shape}, {name}: failed: {e}")
+                continue
+            number = 5
+            save_time = min(timeit.repeat(save, number=number, repeat=3)) / number
+            load_time = min(timeit.repeat(lambda: load(data), number=number, repeat=3)) / number
+            print(
+                f"{shape}, {name}: {len(data) / num_symbols:.1f} bytes/symbol, "
+                f"save {save_time / num_symbols * 1e6:.2f} us/symbol, "
+                f"load {load_time / num_symbols * 1e6:.2f} us/symbol"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,479 @@
+"""
+A suite of microbenchmarks of staging, virtualization and control flow, which writes its results as
+JSON, e.g. to compare them between commits:
+
+    python benchmarks/bench_suite.py [--scale 0.1] [--repeat 5] [--filter stage.] [--output results.json]
+
+The cases are
+    stage.*      the throughput of stage() for Integer and Boolean ops, through their operators and
+                 by staging prebuilt ops
+    decorate.*   the cost of decorating a function with argon_function, transforming it, loading it
+                 from the code cache, or deferring both with lazy=True
+    trace.*      tracing functions with deeply nested if/else statements and long while bodies
+    inputs.*     Scope.inputs of large scopes, indexing every symbol or only the new ones
+    dump.*       dumping a large State to a string and streaming it to a sink
+
+The functions which are virtualized are generated into a temporary directory, since argon_function
+needs their source, and their code cache is kept there, so the suite does not write elsewhere and
+does not need network access. Every case is run repeat times after a warm-up run, each time with a
+fresh setup which is not timed, with the garbage collector disabled like timeit does. For each case
+the output lists its parameters, the number of operations (e.g. symbols staged) per run, the time of
+every run, and the best and median time per run and per operation.
+"""
+
+import argparse
+import gc
+import importlib.util
+import io
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+import typing
+from collections import namedtuple  # needed by the virtualized while loops
+
+from argon import printer
+from argon.node.arith import Add
+from argon.node.logical import And
+from argon.state import State, stage
+from argon.types.boolean import Boolean
+from argon.types.function import function_C_to_A
+from argon.types.integer import Integer
+from argon.virtualization.code_cache import code_cache
+from argon.virtualization.wrapper import argon_function
+
+
+# A case takes its scaled parameters and returns a setup function, which is called before every
+# run and returns the function to time and the number of operations it performs
+Setup = typing.Callable[[], typing.Tuple[typing.Callable[[], typing.Any], int]]
+Case = typing.Callable[..., Setup]
+
+CASES: typing.Dict[str, typing.Tuple[Case, typing.Dict[str, int]]] = {}
+
+
+def case(name: str, **params: int) -> typing.Callable[[Case], Case]:
+    """Registers a case with its parameters at scale 1."""
+
+    def decorator(func: Case) -> Case:
+        CASES[name] = (func, params)
+        return func
+
+    return decorator
+
+
+# Generated modules, by name, and the directory they are generated into
+_modules: typing.Dict[str, types.ModuleType] = {}
+_module_dir: typing.Optional[pathlib.Path] = None
+
+
+def generated_module(name: str, source: str) -> types.ModuleType:
+    """Writes source to a module in the temporary directory and imports it, once per name."""
+    module = _modules.get(name)
+    if module is not None:
+        return module
+    assert _module_dir is not None, "modules are only generated while the suite runs"
+    path = _module_dir / f"{name}.py"
+    path.write_text(f"from collections import namedtuple\n\n\n{source}")
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    _modules[name] = module
+    return module
+
+
+def nested_if_source(depth: int) -> str:
+    lines = ["def nested_if(x: int, y: int) -> int:", "    z = y"]
+
+    def branch(level: int, indent: str) -> None:
+        lines.append(f"{indent}if x > {level}:")
+        lines.append(f"{indent}    z = z + {level}")
+        if level < depth:
+            branch(level + 1, indent + "    ")
+        lines.append(f"{indent}else:")
+        lines.append(f"{indent}    z = z - {level}")
+
+    branch(1, "    ")
+    lines.append("    return z")
+    return "\n".join(lines) + "\n"
+
+
+def long_while_source(length: int) -> str:
+    lines = ["def long_while(x: int, y: int) -> int:", "    i = 0", "    z = x", "    while i < y:"]
+    lines += [f"        z = z + {k}" for k in range(1, length + 1)]
+    lines += ["        i = i + 1", "    return z"]
+    return "\n".join(lines) + "\n"
+
+
+def plain_source(length: int) -> str:
+    lines = ["def plain(x: int, y: int) -> int:", "    z = x"]
+    for k in range(length):
+        lines += [f"    if z > {k}:", f"        z = z + y", "    else:", f"        z = z - {k}"]
+    lines += ["    while z < y:", "        z = z + 1", "    return z"]
+    return "\n".join(lines) + "\n"
+
+
+def count_symbols(state: State) -> int:
+    # Every symbol is numbered, including the bound variables
+    return state._id + 1
+
+
+@case("stage.integer_operators", n=20000)
+def stage_integer_operators(n: int) -> Setup:
+    def setup():
+        state = State()
+
+        def run():
+            with state:
+                x = Integer().bound("x")
+                for i in range(n):
+                    x = x + i
+
+        return run, n
+
+    return setup
+
+
+@case("stage.boolean_operators", n=20000)
+def stage_boolean_operators(n: int) -> Setup:
+    def setup():
+        state = State()
+
+        def run():
+            with state:
+                p = Boolean().bound("p")
+                q = Boolean().bound("q")
+                r = Boolean().bound("r")
+                for _ in range(n // 2):
+                    p = (p & q) | r
+
+        return run, n // 2 * 2
+
+    return setup
+
+
+@case("stage.integer_ops", n=20000)
+def stage_integer_ops(n: int) -> Setup:
+    def setup():
+        state = State()
+        with state:
+            x = Integer().bound("x")
+            ops = [Add[Integer](x, Integer().const(i)) for i in range(n)]
+
+        def run():
+            with state:
+                for op in ops:
+                    stage(op)
+
+        return run, n
+
+    return setup
+
+
+@case("stage.boolean_ops", n=20000)
+def stage_boolean_ops(n: int) -> Setup:
+    def setup():
+        state = State()
+        with state:
+            p = Boolean().bound("p")
+            ops = [And[Boolean](p, Boolean().bound(f"q{i}")) for i in range(n)]
+
+        def run():
+            with state:
+                for op in ops:
+                    stage(op)
+
+        return run, n
+
+    return setup
+
+
+@case("stage.integer_operators_no_cse", n=20000)
+def stage_integer_operators_no_cse(n: int) -> Setup:
+    def setup():
+        state = State(cse=False)
+
+        def run():
+            with state:
+                x = Integer().bound("x")
+                for _ in range(n):
+                    x = x + 1
+
+        return run, n
+
+    return setup
+
+
+def _decorate(n: int, lazy: bool) -> Setup:
+    module = generated_module("argon_bench_plain", plain_source(8))
+
+    def setup():
+        def run():
+            for _ in range(n):
+                argon_function(lazy=lazy)(module.plain)
+
+        return run, n
+
+    return setup
+
+
+@case("decorate.uncached", n=20)
+def decorate_uncached(n: int) -> Setup:
+    setup = _decorate(n, lazy=False)
+
+    def uncached_setup():
+        code_cache.enabled = False
+        return setup()
+
+    return uncached_setup
+
+
+@case("decorate.cached", n=20)
+def decorate_cached(n: int) -> Setup:
+    setup = _decorate(n, lazy=False)
+
+    def cached_setup():
+        code_cache.enabled = True
+        # The temporary directory is writable even when bytecode is not written
+        sys.dont_write_bytecode = False
+        run, ops = setup()
+        # Fill the cache, so that every timed decoration loads from it
+        argon_function()(_modules["argon_bench_plain"].plain)
+        return run, ops
+
+    return cached_setup
+
+
+@case("decorate.lazy", n=2000)
+def decorate_lazy(n: int) -> Setup:
+    return _decorate(n, lazy=True)
+
+
+@case("trace.nested_if", depth=12)
+def trace_nested_if(depth: int) -> Setup:
+    module = generated_module(f"argon_bench_nested_if_{depth}", nested_if_source(depth))
+    func = argon_function()(module.nested_if)
+
+    def setup():
+        state = State()
+
+        def run():
+            with state:
+                function_C_to_A(func)
+            return state
+
+        # Traced once outside of the timed runs to count the symbols
+        probe = State()
+        with probe:
+            function_C_to_A(func)
+        return run, count_symbols(probe)
+
+    return setup
+
+
+@case("trace.long_while", length=400)
+def trace_long_while(length: int) -> Setup:
+    module = generated_module(f"argon_bench_long_while_{length}", long_while_source(length))
+    func = argon_function()(module.long_while)
+
+    def setup():
+        state = State()
+
+        def run():
+            with state:
+                function_C_to_A(func)
+
+        probe = State()
+        with probe:
+            function_C_to_A(func)
+        return run, count_symbols(probe)
+
+    return setup
+
+
+def _large_scope(n: int) -> typing.Tuple[State, typing.Any]:
+    """Returns a State and a context of its scope of n symbols, which is not entered."""
+    state = State()
+    with state:
+        outer = [Integer().bound(f"x{i}") for i in range(64)]
+        scope_context = state.new_scope()
+        with scope_context:
+            y = Integer().bound("y")
+            for i in range(n):
+                # Every symbol uses an input of the scope and the previous symbol
+                y = y + outer[i % len(outer)]
+    return state, scope_context
+
+
+@case("inputs.first_read", n=20000)
+def inputs_first_read(n: int) -> Setup:
+    def setup():
+        _, scope_context = _large_scope(n)
+        return (lambda: scope_context.scope.inputs), n
+
+    return setup
+
+
+@case("inputs.repeated_read", n=20000, reads=100)
+def inputs_repeated_read(n: int, reads: int) -> Setup:
+    def setup():
+        _, scope_context = _large_scope(n)
+        scope = scope_context.scope
+        scope.inputs
+
+        def run():
+            for _ in range(reads):
+                scope.inputs
+
+        return run, reads
+
+    return setup
+
+
+@case("inputs.read_after_append", n=20000, reads=100)
+def inputs_read_after_append(n: int, reads: int) -> Setup:
+    def setup():
+        state, scope_context = _large_scope(n)
+        scope = scope_context.scope
+        scope.inputs
+        x = scope.symbols[-1]
+
+        def run():
+            nonlocal x
+            with state:
+                for _ in range(reads):
+                    with scope_context:
+                        x = x + 1
+                    scope.inputs
+
+        return run, reads
+
+    return setup
+
+
+def _traced_state(length: int) -> State:
+    module = generated_module(f"argon_bench_long_while_{length}", long_while_source(length))
+    func = argon_function()(module.long_while)
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        for i in range(length):
+            x = x + i
+        function_C_to_A(func)
+    return state
+
+
+@case("dump.string", length=2000)
+def dump_string(length: int) -> Setup:
+    def setup():
+        state = _traced_state(length)
+        return state.dump, count_symbols(state)
+
+    return setup
+
+
+@case("dump.stream", length=2000)
+def dump_stream(length: int) -> Setup:
+    def setup():
+        state = _traced_state(length)
+        return (lambda: printer.write(state, io.StringIO())), count_symbols(state)
+
+    return setup
+
+
+def run_case(name: str, scale: float, repeat: int) -> typing.Dict[str, typing.Any]:
+    func, base_params = CASES[name]
+    params = {key: max(1, round(value * scale)) for key, value in base_params.items()}
+    setup = func(**params)
+    times = []
+    ops = 0
+    # The first run warms up caches and is not reported
+    for index in range(repeat + 1):
+        run, ops = setup()
+        gc.collect()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if index:
+            times.append(elapsed)
+    best = min(times)
+    median = statistics.median(times)
+    return {
+        "name": name,
+        "params": params,
+        "ops": ops,
+        "times_s": times,
+        "best_s": best,
+        "median_s": median,
+        "best_us_per_op": best / ops * 1e6,
+        "median_us_per_op": median / ops * 1e6,
+    }
+
+
+def main(argv: typing.List[str]) -> None:
+    global _module_dir
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="scales the size of every case")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--filter", default="", help="only runs the cases whose names contain this")
+    parser.add_argument("--output", help="writes the results to this file rather than stdout")
+    parser.add_argument("--list", action="store_true", help="lists the cases and exits")
+    args = parser.parse_args(argv[1:])
+
+    if args.list:
+        for name, (_, params) in CASES.items():
+            print(name, json.dumps(params))
+        return
+
+    dont_write_bytecode = sys.dont_write_bytecode
+    cache_enabled = code_cache.enabled
+    results = []
+    with tempfile.TemporaryDirectory(prefix="argon_bench_") as module_dir:
+        _module_dir = pathlib.Path(module_dir)
+        sys.path.insert(0, module_dir)
+        try:
+            for name in CASES:
+                if args.filter in name:
+                    results.append(run_case(name, args.scale, args.repeat))
+                    # Cases must not affect each other through the code cache
+                    sys.dont_write_bytecode = dont_write_bytecode
+                    code_cache.enabled = cache_enabled
+                    print(
+                        f"{name}: {results[-1]['best_us_per_op']:.3f} us/op",
+                        file=sys.stderr,
+                    )
+        finally:
+            sys.path.remove(module_dir)
+            _module_dir = None
+
+    report = {
+        "python": sys.version,
+        "implementation": sys.implementation.name,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
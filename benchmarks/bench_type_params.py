@@ -0,0 +1,47 @@
+"""
+Measures the cost of reading type parameters through the accessors installed by ArgonMeta,
+and of specializing generic classes such as Add[Integer].
+
+    python benchmarks/bench_type_params.py [iterations]
+"""
+
+import sys
+import timeit
+
+from argon.base import specialization_cache
+from argon.block import Block
+from argon.node.arith import Add
+from argon.state import State
+from argon.types.function import Function
+from argon.types.integer import Integer
+from argon.types.struct import Struct
+
+
+def cases() -> dict:
+    with State():
+        integer = Integer().bound("x")
+        function = Function[Integer]()
+        struct = Struct[{"a": Integer}]()
+    return {
+        "Integer.A": lambda: integer.A,
+        "Integer.C": lambda: integer.C,
+        "Integer.tp.A": lambda: integer.tp.A,
+        "Function[Integer].A": lambda: function.A,
+        "Function[Integer].RETURN_TP": lambda: function.RETURN_TP,
+        "Struct[...].A": lambda: struct.A,
+        "Add[Integer]": lambda: Add[Integer],
+        "Block[Integer]": lambda: Block[Integer],
+        "Struct[{...}]": lambda: Struct[{"a": Integer, "b": Integer}],
+    }
+
+
+def main(argv: list[str]) -> None:
+    iterations = int(argv[1]) if len(argv) > 1 else 20000
+    for name, case in cases().items():
+        elapsed = min(timeit.repeat(case, number=iterations, repeat=3))
+        print(f"{name}: {elapsed / iterations * 1e9:.0f} ns")
+    print(f"specialization cache: {specialization_cache.info()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
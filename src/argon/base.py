@@ -1,4 +1,4 @@
-import inspect
+import sys
 import typing
 import types
 
@@ -28,20 +28,140 @@ def r_resolve(globalns, localns, rarg):
             raise ArgonError(f"Failed to resolve type {rarg}")
 
 
+# Type arguments may be unhashable, e.g. the dict in Struct[{"a": Integer}]
+def _freeze_type_arg(arg):
+    if isinstance(arg, typing._GenericAlias):  # type: ignore -- We don't have a great alternative way for checking if an object is a GenericAlias
+        return (typing.get_origin(arg), _freeze_type_arg(typing.get_args(arg)))
+    if isinstance(arg, dict):
+        return (dict, tuple((key, _freeze_type_arg(value)) for key, value in arg.items()))
+    if isinstance(arg, (list, tuple)):
+        return (type(arg), tuple(_freeze_type_arg(item) for item in arg))
+    return arg
+
+
+def _specialization_key(alias):
+    return (typing.get_origin(alias), _freeze_type_arg(typing.get_args(alias)))
+
+
+def _memoize_per_specialization(accessor):
+    """
+    Caches the result of a type parameter accessor per concrete generic alias of the
+    instance (e.g. per Function[Integer]), or per class for non-generic instances, since
+    the resolved type only depends on those.
+    """
+    cache = {}
+
+    def memoized_accessor(self):
+        key = type(self)
+        if key.__type_params__:
+            key = getattr(self, "__orig_class__", key)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            try:
+                key = _specialization_key(key)
+                return cache[key]
+            except KeyError:
+                pass
+            except TypeError:
+                return accessor(self)
+        result = cache[key] = accessor(self)
+        return result
+
+    return memoized_accessor
+
+
+class SpecializationCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# This class is used to map a generic ArgonMeta subclass and its type arguments to the generic
+# alias created for them, so that specializations such as Add[Integer] or Struct[{"a": Integer}]
+# on the staging hot path are only built once
+class _SpecializationCache:
+    def __init__(self):
+        self.aliases: typing.Dict[typing.Hashable, typing.Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, cls: type, params: typing.Any) -> typing.Any:
+        key = (cls, params)
+        try:
+            alias = self.aliases.get(key)
+        except TypeError:
+            # Unhashable type arguments, e.g. the dict in Struct[{"a": Integer}]
+            key = (cls, _freeze_type_arg(params))
+            try:
+                alias = self.aliases.get(key)
+            except TypeError:
+                self.misses += 1
+                return super(ArgonMeta, cls).__class_getitem__(params)  # type: ignore -- Generic is always further along the MRO of a generic ArgonMeta subclass
+            # The alias keeps its arguments, so don't share a container the caller may mutate
+            params = _copy_containers(params)
+        if alias is not None:
+            self.hits += 1
+            return alias
+        self.misses += 1
+        alias = self.aliases[key] = super(ArgonMeta, cls).__class_getitem__(params)  # type: ignore -- Generic is always further along the MRO of a generic ArgonMeta subclass
+        return alias
+
+    def info(self) -> SpecializationCacheInfo:
+        return SpecializationCacheInfo(self.hits, self.misses, len(self.aliases))
+
+    def clear(self) -> None:
+        self.aliases.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+specialization_cache = _SpecializationCache()
+
+
+def _copy_containers(params):
+    if isinstance(params, tuple):
+        return tuple(_copy_containers(param) for param in params)
+    if isinstance(params, (dict, list)):
+        return params.copy()
+    return params
+
+
 ### WARNING: This does not correctly handle shadowing of typevars -- every type parameter should be unique.
 class ArgonMeta:
+    # Generic aliases record themselves on instances through __orig_class__, which slotted
+    # subclasses would otherwise silently drop.
+    __slots__ = ("__orig_class__",)
+
+    def __class_getitem__(cls, params):
+        # Fast path for hashable type arguments, which are by far the most common
+        try:
+            alias = specialization_cache.aliases[cls, params]
+        except (KeyError, TypeError):
+            return specialization_cache(cls, params)
+        specialization_cache.hits += 1
+        return alias
+
     def __init_subclass__(cls) -> None:
         # print(f"Concretizing Class {cls}")
-        # The calling stack, where ostensibly all of the values were defined.
-        localns = {}
-        globalns = {}
-        # For each frame, iterating outside in, excluding this one.
-        for finfo in inspect.stack()[:0:-1]:
-            localns.update(finfo.frame.f_locals)
-            globalns.update(finfo.frame.f_globals)
+        # Type arguments are resolved against the namespace of the module defining the class.
+        # It is only looked up when a type parameter is first accessed, by which point the
+        # module has finished executing and every name it defines is available.
+        module_name = cls.__module__
+
+        def module_globals() -> dict:
+            module = sys.modules.get(module_name)
+            return module.__dict__ if module is not None else {}
 
         # Have to register ourselves too!
-        localns[cls.__name__] = cls
+        localns = {cls.__name__: cls}
 
         tparam_set = set()
 
@@ -70,7 +190,7 @@ class ArgonMeta:
                         case typing.ForwardRef():
 
                             def accessor_parent_tparam(self, arg=arg):  # type: ignore -- PyRight and other tools falsely report this as conflicting defs
-                                retval = arg._evaluate(globalns, localns, frozenset())
+                                retval = arg._evaluate(module_globals(), localns, frozenset())
                                 if isinstance(retval, typing._GenericAlias):  # type: ignore -- We don't have a great alternative way for checking if an object is a GenericAlias
                                     aug_ns = {}
                                     for key in tparam_set:
@@ -79,7 +199,7 @@ class ArgonMeta:
                                     # augment the namespace
                                     temp_globalns = {}
                                     temp_localns = {}
-                                    temp_globalns.update(globalns)
+                                    temp_globalns.update(module_globals())
                                     temp_globalns.update(aug_ns)
                                     temp_localns.update(localns)
                                     temp_localns.update(aug_ns)
@@ -109,7 +229,7 @@ class ArgonMeta:
                                 # augment the namespace
                                 temp_globalns = {}
                                 temp_localns = {}
-                                temp_globalns.update(globalns)
+                                temp_globalns.update(module_globals())
                                 temp_globalns.update(aug_ns)
                                 temp_localns.update(localns)
                                 temp_localns.update(aug_ns)
@@ -128,6 +248,9 @@ class ArgonMeta:
                             raise ArgonError(
                                 f"Failed to resolve type {param} into a concrete type, got {type(arg)}: {arg}"
                             )
+                    if isinstance(arg, (typing.ForwardRef, typing._GenericAlias)):  # type: ignore -- We don't have a great alternative way for checking if an object is a GenericAlias
+                        # Resolving these re-evaluates the forward reference in merged namespaces
+                        accessor_parent_tparam = _memoize_per_specialization(accessor_parent_tparam)
                     accessor_parent_tparam.__name__ = param.__name__
                     setattr(cls, param.__name__, property(fget=accessor_parent_tparam))
 
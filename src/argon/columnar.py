@@ -0,0 +1,318 @@
+"""
+A columnar storage backend for Scope.symbols, used by States created with columnar=True, which
+keeps large traces small in memory. Instead of the object graph of each symbol (its Exp, Def,
+Node, op, constant operands and SrcCtx), the symbols are stored in typed arrays of their ids,
+op kinds, types, source contexts and operands, and an Exp is only created when a symbol is
+accessed. These Exps are views: accessing the same symbol twice returns two different but equal
+Exps, whose op is created the first time it is accessed.
+
+Ops with a field which is not an Exp, e.g. the blocks of an IfThenElse or the name of a
+FunctionNew, are kept as they are, as are operands other than the symbols of the same scope and
+constants, e.g. bound variables.
+"""
+
+import array
+import bisect
+import collections.abc
+import types
+import typing
+
+from argon.op import Op, _field_names
+from argon.ref import Const, Def, Exp, Node
+from argon.srcctx import SrcCtx
+
+
+# Kinds of operands
+_SYMBOL = 0  # A symbol stored in the same columns, by position
+_CONST = 1  # A constant, by position in the constant columns
+_OBJECT = 2  # Any other Exp, by position in objects
+
+# The context offset of contexts whose positions have been resolved, which are interned as is
+_RESOLVED = -1
+
+
+class _Table:
+    """Interns values by identity, or by a given key, mapping each to its index."""
+
+    def __init__(self):
+        self.values: typing.List[typing.Any] = [None]
+        self.indices: typing.Dict[typing.Hashable, int] = {}
+
+    def index(self, value: typing.Any, key: typing.Hashable = None) -> int:
+        key = id(value) if key is None else key
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class _NodeView(Node):
+    """A Node stored in a ColumnarSymbols, whose op is created the first time it is accessed."""
+
+    __slots__ = ("_symbols", "_position", "_op")
+
+    @property
+    def underlying(self) -> Op[typing.Any]:  # type: ignore -- the Node field is replaced by a read-only property
+        op = self._op
+        if op is None:
+            op = self._op = self._symbols.op(self._position)
+        return op
+
+    def __reduce__(self):
+        # Pickled as its position in the pickled columns, so that it is shared with the stored symbol
+        return (self._symbols.node, (self._position,))
+
+
+class ColumnarSymbols(collections.abc.Sequence):
+    def __init__(self, symbols: typing.Iterable[Exp[typing.Any, typing.Any]] = ()):
+        self._table = _Table()
+        # One entry per symbol, in ascending order of ids
+        self.ids = array.array("q")
+        self.kinds = array.array("I")
+        self.types = array.array("I")
+        self.ctxs = array.array("I")
+        self.ctx_offsets = array.array("i")
+        # The operands of symbol i are entries operand_starts[i] to operand_starts[i + 1]
+        self.operand_starts = array.array("I", [0])
+        self.operand_kinds = array.array("B")
+        self.operand_refs = array.array("I")
+        # One entry per constant operand
+        self.const_types = array.array("I")
+        self.const_ctxs = array.array("I")
+        self.const_ctx_offsets = array.array("i")
+        self.const_values: typing.List[typing.Any] = []
+        # The operands and ops which are kept as they are
+        self.objects: typing.List[Exp[typing.Any, typing.Any]] = []
+        self.ops: typing.Dict[int, Op[typing.Any]] = {}
+        for symbol in symbols:
+            self.append(symbol)
+
+    def append(self, symbol: Exp[typing.Any, typing.Any]) -> None:
+        node = None if symbol.rhs is None else symbol.rhs.val
+        if not isinstance(node, Node):
+            raise TypeError(f"Only staged nodes can be stored in columns, not {symbol}")
+        if self.ids and node.id <= self.ids[-1]:
+            raise ValueError(
+                f"Symbols must be stored in the order they are staged in, but {symbol} was staged before x{self.ids[-1]}"
+            )
+        op = node.underlying
+        position = len(self.ids)
+
+        operands: typing.Optional[typing.List[Exp[typing.Any, typing.Any]]] = []
+        for name in _field_names(type(op)):
+            value = getattr(op, name)
+            if not isinstance(value, Exp):
+                operands = None
+                break
+            operands.append(value)  # type: ignore -- operands is only None after the loop
+        if operands is None:
+            self.ops[position] = op
+        else:
+            for operand in operands:
+                kind, ref = self._operand_ref(operand)
+                self.operand_kinds.append(kind)
+                self.operand_refs.append(ref)
+
+        self.ids.append(node.id)
+        self.kinds.append(self._table.index(getattr(op, "__orig_class__", type(op))))
+        self.types.append(self._table.index(getattr(symbol, "__orig_class__", type(symbol))))
+        ctx, offset = self._ctx_ref(symbol.ctx)
+        self.ctxs.append(ctx)
+        self.ctx_offsets.append(offset)
+        self.operand_starts.append(len(self.operand_kinds))
+
+    def _operand_ref(self, operand: Exp[typing.Any, typing.Any]) -> typing.Tuple[int, int]:
+        val = None if operand.rhs is None else operand.rhs.val
+        if isinstance(val, Const):
+            ctx, offset = self._ctx_ref(operand.ctx)
+            self.const_types.append(
+                self._table.index(getattr(operand, "__orig_class__", type(operand)))
+            )
+            self.const_ctxs.append(ctx)
+            self.const_ctx_offsets.append(offset)
+            self.const_values.append(val.value)
+            return _CONST, len(self.const_values) - 1
+        if isinstance(val, Node):
+            position = self.position(val.id)
+            if position is not None:
+                return _SYMBOL, position
+        self.objects.append(operand)
+        return _OBJECT, len(self.objects) - 1
+
+    def _ctx_ref(self, ctx: typing.Optional[SrcCtx]) -> typing.Tuple[int, int]:
+        if ctx is None:
+            return 0, _RESOLVED
+        location = ctx.unresolved_location()
+        if location is not None and location[1] >= 0:
+            # Kept unresolved, like the SrcCtx itself
+            code, offset = location
+            return self._table.index(code), offset
+        return self._table.index(ctx, ctx), _RESOLVED
+
+    def _ctx(self, ctx: int, offset: int) -> typing.Optional[SrcCtx]:
+        value = self._table.values[ctx]
+        if offset == _RESOLVED:
+            return value
+        return SrcCtx.from_code(value, offset)
+
+    def position(self, id: int) -> typing.Optional[int]:
+        """Returns the position of the symbol with the given id, or None if it is not stored here."""
+        position = bisect.bisect_left(self.ids, id)
+        if position < len(self.ids) and self.ids[position] == id:
+            return position
+        return None
+
+    def op(self, position: int) -> Op[typing.Any]:
+        """Creates the op of the symbol at position."""
+        op = self.ops.get(position)
+        if op is not None:
+            return op
+        op_type = self._table.values[self.kinds[position]]
+        return op_type(
+            *[
+                self._operand(index)
+                for index in range(self.operand_starts[position], self.operand_starts[position + 1])
+            ]
+        )
+
+    def _operand(self, index: int) -> Exp[typing.Any, typing.Any]:
+        kind = self.operand_kinds[index]
+        ref = self.operand_refs[index]
+        if kind == _SYMBOL:
+            return self._view(ref)
+        if kind == _OBJECT:
+            return self.objects[ref]
+        exp = self._table.values[self.const_types[ref]]()
+        exp.rhs = Def(Const(self.const_values[ref]))
+        exp.ctx = self._ctx(self.const_ctxs[ref], self.const_ctx_offsets[ref])
+        return exp
+
+    def node(self, position: int) -> Node:
+        """Creates a view of the Node of the symbol at position."""
+        node = _NodeView.__new__(_NodeView)
+        node.id = self.ids[position]
+        node.def_type = "Node"
+        node._symbols = self
+        node._position = position
+        node._op = None
+        return node
+
+    def _view(self, position: int) -> Exp[typing.Any, typing.Any]:
+        exp = self._table.values[self.types[position]]()
+        exp.rhs = Def(self.node(position))
+        exp.ctx = self._ctx(self.ctxs[position], self.ctx_offsets[position])
+        return exp
+
+    def by_id(self, id: int) -> Exp[typing.Any, typing.Any]:
+        """Returns a view of the symbol with the given id, raising KeyError if it is not stored here."""
+        position = self.position(id)
+        if position is None:
+            raise KeyError(id)
+        return self._view(position)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> Exp[typing.Any, typing.Any]: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> typing.List[Exp[typing.Any, typing.Any]]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(position) for position in range(*index.indices(len(self.ids)))]
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError("symbol index out of range")
+        return self._view(index)
+
+    def __iter__(self) -> typing.Iterator[Exp[typing.Any, typing.Any]]:
+        for position in range(len(self.ids)):
+            yield self._view(position)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # The columns are pickled as they are, except that code objects cannot be pickled, so the
+        # contexts which are still resolved from one are resolved first
+        self._resolve_ctxs()
+        state = dict(self.__dict__)
+        state["_table"] = [
+            None if isinstance(value, types.CodeType) else value for value in self._table.values
+        ]
+        return state
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        values = state.pop("_table")
+        self.__dict__.update(state)
+        self._table = _Table()
+        self._table.values = values
+        for index, value in enumerate(values):
+            if value is not None:
+                self._table.indices[value if isinstance(value, SrcCtx) else id(value)] = index
+
+    def _resolve_ctxs(self) -> None:
+        for ctxs, offsets in ((self.ctxs, self.ctx_offsets), (self.const_ctxs, self.const_ctx_offsets)):
+            for i, offset in enumerate(offsets):
+                if offset != _RESOLVED:
+                    ctx = SrcCtx.from_code(self._table.values[ctxs[i]], offset)
+                    ctxs[i], offsets[i] = self._ctx_ref(SrcCtx(ctx.file, ctx.positions))
+
+    def __repr__(self) -> str:
+        return f"ColumnarSymbols([{', '.join(f'x{id}' for id in self.ids)}])"
+
+    def nbytes(self) -> int:
+        """The number of bytes used by the columns, not counting the interned values and the kept objects."""
+        columns = [
+            self.ids,
+            self.kinds,
+            self.types,
+            self.ctxs,
+            self.ctx_offsets,
+            self.operand_starts,
+            self.operand_kinds,
+            self.operand_refs,
+            self.const_types,
+            self.const_ctxs,
+            self.const_ctx_offsets,
+        ]
+        return sum(len(column) * column.itemsize for column in columns)
+
+
+class ColumnarCache(collections.abc.MutableMapping):
+    """
+    The CSE cache of a scope whose symbols are stored in columns, which maps the key of each
+    symbol to its id rather than to its Exp, and looks up the symbol in the columns.
+    """
+
+    def __init__(
+        self,
+        symbols: ColumnarSymbols,
+        cache: typing.Mapping[typing.Hashable, Exp[typing.Any, typing.Any]] = {},
+    ):
+        self.symbols = symbols
+        self.ids: typing.Dict[typing.Hashable, int] = {}
+        self.update(cache)
+
+    def __getitem__(self, key: typing.Hashable) -> Exp[typing.Any, typing.Any]:
+        return self.symbols.by_id(self.ids[key])
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        # Overridden since most lookups miss, which is slow through __getitem__
+        id = self.ids.get(key)
+        if id is None:
+            return default
+        return self.symbols.by_id(id)
+
+    def __setitem__(self, key: typing.Hashable, symbol: Exp[typing.Any, typing.Any]) -> None:
+        self.ids[key] = symbol.rhs.val.id  # type: ignore -- only staged nodes are cached
+
+    def __delitem__(self, key: typing.Hashable) -> None:
+        del self.ids[key]
+
+    def __iter__(self) -> typing.Iterator[typing.Hashable]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
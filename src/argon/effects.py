@@ -1,9 +1,10 @@
+import dataclasses
 import enum
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
-from argon.ref import Sym
+if typing.TYPE_CHECKING:
+    from argon.ref import Sym
 
 
 class Perhaps(enum.Enum):
@@ -18,10 +19,15 @@ class Effects:
     # This is primarily for making mutable/stateful objects such as counters
     unique: Perhaps = Perhaps.FALSE
     idempotent: Perhaps = Perhaps.FALSE
-    reads: typing.Set[Sym[typing.Any]] = pydantic.Field(default_factory=set)
-    writes: typing.Set[Sym[typing.Any]] = pydantic.Field(default_factory=set)
+    reads: typing.Set["Sym[typing.Any]"] = dataclasses.field(default_factory=set)
+    writes: typing.Set["Sym[typing.Any]"] = dataclasses.field(default_factory=set)
 
     @property
     def may_cse(self) -> bool:
         # TODO: Refine this characterization w.r.t. an actual memory model.
         return self.idempotent == Perhaps.TRUE
+
+
+# Shared instances for ops whose effects do not depend on their operands. These should not be mutated.
+UNKNOWN = Effects()
+PURE = Effects(idempotent=Perhaps.TRUE)
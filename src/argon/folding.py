@@ -0,0 +1,46 @@
+import typing
+
+from argon.ref import Exp, Op
+import argon.ref as ref
+from argon.srcctx import SrcCtx
+
+
+# This class is used to map an op class to a function which evaluates the op
+# on the concrete values of its operands when all of them are constants
+class _ConstantFolder:
+    def __init__(self):
+        self.folders = {}
+
+    def __setitem__(self, op_cls: typing.Type[Op[typing.Any]], folder: typing.Callable) -> None:
+        """
+        Registers a folder for op_cls. The folder is called with the concrete values of the
+        op's operands (in the order of Op.operands) and returns the concrete result, or
+        NotImplemented to leave the op unfolded.
+        """
+        self.folders[op_cls] = folder
+
+    def __contains__(self, op_cls: typing.Type[Op[typing.Any]]) -> bool:
+        return op_cls in self.folders
+
+    def __call__(
+        self, op: Op[typing.Any], ctx: SrcCtx | None
+    ) -> typing.Optional[Exp[typing.Any, typing.Any]]:
+        """Returns a constant symbol for the result of op, or None if op cannot be folded."""
+        folder = self.folders.get(type(op))
+        if folder is None:
+            return None
+        operands = op.operands
+        if not operands or not all(operand.is_const() for operand in operands):
+            return None
+        result = folder(*(operand.rhs.val.value for operand in operands))  # type: ignore -- operand.rhs.val has already been checked to be a Const
+        if result is NotImplemented:
+            return None
+        return const_result(op, result, ctx)
+
+
+constant_folder = _ConstantFolder()
+
+
+def const_result[A](op: Op[A], value: typing.Any, ctx: SrcCtx | None) -> A:
+    """Creates a constant symbol of op's result type."""
+    return op.R()._new(ref.Def(ref.Const(value)), ctx)  # type: ignore -- R is provided by ArgonMeta
@@ -0,0 +1,95 @@
+import contextlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from argon.block import Block
+    from argon.ref import Exp
+    from argon.state import Scope, State
+
+
+class Listener:
+    """
+    Observes tracing, e.g. to collect statistics of the staged graph or export it while it is
+    traced. Subclasses override the methods of the events they are interested in, and are
+    registered with hooks.register(). Every method is called with the State the event happened in.
+    """
+
+    def on_symbol(self, state: "State", symbol: "Exp[typing.Any, typing.Any]") -> None:
+        """
+        Called after a new symbol was staged into state.scope, but not when an op was folded,
+        rewritten or deduplicated into an existing symbol.
+        """
+
+    def on_scope_open(self, state: "State", scope: "Scope") -> None:
+        """
+        Called after scope was entered, i.e. became state.scope. A scope may be entered several
+        times, e.g. the branches of an if are entered again to merge the variables they assign.
+        """
+
+    def on_scope_close(self, state: "State", scope: "Scope") -> None:
+        """Called after scope was exited, i.e. state.scope is its parent again."""
+
+    def on_block(self, state: "State", block: "Block[typing.Any]") -> None:
+        """
+        Called when a block, e.g. a branch of an if or the body of a loop, is complete, before the
+        op containing it is staged. The body of a function is complete after its FunctionNew was
+        staged, since recursive calls refer to it.
+        """
+
+
+_EVENTS = ("on_symbol", "on_scope_open", "on_scope_close", "on_block")
+
+
+# This class is used to register the listeners notified of tracing events. For each event it
+# keeps a tuple of the methods of the listeners overriding it, which is empty if there are none,
+# so that checking whether an event has to be reported is cheap.
+class _Hooks:
+    def __init__(self):
+        self.listeners: typing.List[Listener] = []
+        self.on_symbol: typing.Tuple[typing.Callable[..., None], ...] = ()
+        self.on_scope_open: typing.Tuple[typing.Callable[..., None], ...] = ()
+        self.on_scope_close: typing.Tuple[typing.Callable[..., None], ...] = ()
+        self.on_block: typing.Tuple[typing.Callable[..., None], ...] = ()
+
+    def register[L: Listener](self, listener: L) -> L:
+        """Registers listener, which is notified of the events in every State until it is unregistered."""
+        self.listeners.append(listener)
+        self._update()
+        return listener
+
+    def unregister(self, listener: Listener) -> None:
+        self.listeners.remove(listener)
+        self._update()
+
+    @contextlib.contextmanager
+    def registered[L: Listener](self, listener: L) -> typing.Iterator[L]:
+        """Registers listener while the context is active."""
+        self.register(listener)
+        try:
+            yield listener
+        finally:
+            self.unregister(listener)
+
+    def _update(self) -> None:
+        for event in _EVENTS:
+            default = getattr(Listener, event)
+            callbacks = tuple(
+                getattr(listener, event)
+                for listener in self.listeners
+                if getattr(type(listener), event, default) is not default
+            )
+            setattr(self, event, callbacks)
+
+    def blocks_created(self, *blocks: "Block[typing.Any]") -> None:
+        """Reports blocks which have been completed in the current State."""
+        if not self.on_block:
+            return
+        from argon.state import State
+
+        state = State.get_current_state()
+        for block in blocks:
+            for callback in self.on_block:
+                callback(state, block)
+
+
+hooks = _Hooks()
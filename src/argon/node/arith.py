@@ -1,8 +1,12 @@
+import operator
 import typing
-import pydantic
+from argon.effects import Effects, PURE
+from argon.folding import const_result, constant_folder
 from argon.ref import Exp, Op, Sym
+from argon.rewrites import is_const_value, rewrite_rules, same_symbol
+from argon.srcctx import SrcCtx
 
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.types.boolean import Boolean
 
@@ -10,7 +14,7 @@ from argon.types.boolean import Boolean
 T = typing.TypeVar("T", bound=Exp[typing.Any, typing.Any], covariant=True)
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Add[T](Op[T]):
     """
     The Add[T] operation represents an addition operation.
@@ -29,8 +33,13 @@ class Add[T](Op[T]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Sub[T](Op[T]):
     """
     The Sub[T] operation represents a subtraction operation.
@@ -49,8 +58,13 @@ class Sub[T](Op[T]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class GreaterThan[T](Op[Boolean]):
     """
     The GreaterThan[T] operation represents a greater than comparison.
@@ -69,8 +83,13 @@ class GreaterThan[T](Op[Boolean]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+
+@dataclass(slots=True)
 class LessThan[T](Op[Boolean]):
     """
     The LessThan[T] operation represents a less than comparison.
@@ -88,3 +107,40 @@ class LessThan[T](Op[Boolean]):
     @typing.override
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
+
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
+
+constant_folder[Add] = operator.add
+constant_folder[Sub] = operator.sub
+constant_folder[GreaterThan] = operator.gt
+constant_folder[LessThan] = operator.lt
+
+
+@rewrite_rules.register(Add)
+def add_zero(op: Add, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x + 0 => x, 0 + x => x
+    if is_const_value(op.b, 0):
+        return op.a  # type: ignore
+    if is_const_value(op.a, 0):
+        return op.b  # type: ignore
+    return None
+
+
+@rewrite_rules.register(Sub)
+def sub_zero(op: Sub, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x - 0 => x
+    if is_const_value(op.b, 0):
+        return op.a  # type: ignore
+    return None
+
+
+@rewrite_rules.register(Sub)
+def sub_self(op: Sub, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x - x => 0
+    if same_symbol(op.a, op.b):
+        return const_result(op, 0, ctx)
+    return None
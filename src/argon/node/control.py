@@ -1,15 +1,17 @@
+import collections
+import functools
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.block import Block
 from argon.op import Op
+from argon.printer import Printer
 from argon.ref import Exp, Sym
 from argon.types.boolean import Boolean
 from argon.types.null import Null
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class IfThenElse[T](Op[T]):
     """
     The IfThenElse[T] operation represents an if-then-else control flow construct
@@ -34,18 +36,22 @@ class IfThenElse[T](Op[T]):
 
     @typing.override
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    @typing.override
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        return (
-            f"IfThenElse( \n"
-            f"{indent}condBlk = {self.condBlk.dump(indent_level + 1)}, \n"
-            f"{indent}thenBlk = {self.thenBlk.dump(indent_level + 1)}, \n"
-            f"{indent}elseBlk = {self.elseBlk.dump(indent_level + 1)} \n"
-            f"{no_indent})"
-        )
+        printer.write(f"IfThenElse( \n{indent}condBlk = ")
+        printer.block(self.condBlk, indent_level + 1, "condBlk")
+        printer.write(f", \n{indent}thenBlk = ")
+        printer.block(self.thenBlk, indent_level + 1, "thenBlk")
+        printer.write(f", \n{indent}elseBlk = ")
+        printer.block(self.elseBlk, indent_level + 1, "elseBlk")
+        printer.write(f" \n{no_indent})")
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Loop[T](Op[T]):
     """
     The Loop operation represents both for and while loop control flow constructs.
@@ -62,11 +68,23 @@ class Loop[T](Op[T]):
     body: Block[Null]
     outputs: typing.Any
 
-    @pydantic.field_validator("outputs")
-    def check_outputs(cls, v):
-        if not hasattr(v, "_fields") or not hasattr(v, "_asdict"):
+    def __post_init__(self):
+        if not hasattr(self.outputs, "_fields") or not hasattr(self.outputs, "_asdict"):
             raise ValueError("outputs must be a namedtuple or similar structure.")
-        return v
+
+    # The namedtuple type of outputs is created by the virtualized function and cannot be pickled
+    # by reference, so outputs is pickled as its type name and fields and rebuilt when unpickled
+    def __getstate__(self):
+        _, slots = object.__getstate__(self)  # type: ignore -- Loop has no __dict__, only slots
+        slots["outputs"] = (type(self.outputs).__name__, self.outputs._asdict())
+        return None, slots
+
+    def __setstate__(self, state):
+        _, slots = state
+        type_name, outputs = slots["outputs"]
+        slots["outputs"] = _outputs_type(type_name, tuple(outputs))(**outputs)
+        for name, value in slots.items():
+            object.__setattr__(self, name, value)
 
     @property
     @typing.override
@@ -75,29 +93,28 @@ class Loop[T](Op[T]):
 
     @typing.override
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    @typing.override
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        more_indent = "|   " * (indent_level + 2)
         values_str = ", ".join(f"{value}" for value in self.values)
         values_str = f"[{values_str}]"
-        if self.binds:
-            binds_str = ", \n".join(
-                f"{more_indent}{bind.dump(indent_level + 2)}" for bind in self.binds
-            )
-            binds_str = f"[\n{binds_str}\n{indent}]"
-        else:
-            binds_str = "[]"
         outputs_str = ", ".join(
             f"{key} = {value}" for key, value in self.outputs._asdict().items()
         )
         outputs_str = f"({outputs_str})"
-        return (
-            f"Loop( \n"
-            f"{indent}values = {values_str}, \n"
-            f"{indent}binds = {binds_str}, \n"
-            f"{indent}cond = {self.cond.dump(indent_level + 1)}, \n"
-            f"{indent}body = {self.body.dump(indent_level + 1)}, \n"
-            # print the field value pairs of outputs
-            f"{indent}outputs = {outputs_str} \n"
-            f"{no_indent})"
-        )
+        printer.write(f"Loop( \n{indent}values = {values_str}, \n{indent}binds = ")
+        printer.symbols(self.binds, indent_level + 1)
+        printer.write(f", \n{indent}cond = ")
+        printer.block(self.cond, indent_level + 1, "cond")
+        printer.write(f", \n{indent}body = ")
+        printer.block(self.body, indent_level + 1, "body")
+        # print the field value pairs of outputs
+        printer.write(f", \n{indent}outputs = {outputs_str} \n{no_indent})")
+
+
+@functools.cache
+def _outputs_type(type_name: str, fields: typing.Tuple[str, ...]) -> type:
+    return collections.namedtuple(type_name, fields)
@@ -1,13 +1,12 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.op import Op
 from argon.ref import Exp
 from argon.types.integer import Integer
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Index[T](Op[T]):
     """
     The Index[T] operation represents indexed access into a collection.
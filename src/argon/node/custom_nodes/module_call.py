@@ -1,13 +1,12 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.op import Op
 from argon.ref import Exp
 from argon.types.custom_types.torch import NNModule
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class NNModuleCall[T](Op[T]):
     """
     The NNModuleCall[T] operation represents a call to a nn.Module.
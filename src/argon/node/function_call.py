@@ -1,13 +1,12 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.op import Op
 from argon.ref import Exp
 from argon.types.function import Function
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class FunctionCall[T](Op[T]):
     """
     The FunctionCall[T] operation represents a function call with return type T.
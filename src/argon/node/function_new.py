@@ -1,14 +1,18 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 from argon.block import Block
 from argon.op import Op
+from argon.printer import Printer
 from argon.ref import Exp
-from argon.types.function import FunctionWithVirt
+from argon.types.function import (
+    FunctionWithVirt,
+    resolve_virtualized,
+    virtualized_reference,
+)
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class FunctionNew[T](Op[T]):
     """
     The FunctionNew[T] operation represents a new function with return type T.
@@ -34,23 +38,37 @@ class FunctionNew[T](Op[T]):
         # TODO: figure out what inputs I should use
         return []
 
+    # The virtualized function holds closures which cannot be pickled, so it is replaced by the
+    # module and qualified name it is imported from again when the FunctionNew is unpickled
+    def __getstate__(self):
+        _, slots = object.__getstate__(self)  # type: ignore -- FunctionNew has no __dict__, only slots
+        slots["virtualized"] = virtualized_reference(self.virtualized)
+        return None, slots
+
+    def __setstate__(self, state):
+        _, slots = state
+        slots["virtualized"] = resolve_virtualized(slots["virtualized"])
+        for name, value in slots.items():
+            object.__setattr__(self, name, value)
+
     @typing.override
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    @typing.override
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        more_indent = "|   " * (indent_level + 2)
-        if self.binds:
-            binds_str = ", \n".join(
-                f"{more_indent}{bind.dump(indent_level + 2)}" for bind in self.binds
-            )
-            binds_str = f"[\n{binds_str}\n{indent}]"
-        else:
-            binds_str = "[]"
-        return (
+        printer.write(
             f"FunctionNew( \n"
             f"{indent}Name = {self.name}, \n"
-            f"{indent}Binds = {binds_str}, \n"
-            f"{indent}Body = {self.body.dump(indent_level + 1)}, \n"
+            f"{indent}Binds = "
+        )
+        printer.symbols(self.binds, indent_level + 1)
+        printer.write(f", \n{indent}Body = ")
+        printer.block(self.body, indent_level + 1, "Body")
+        printer.write(
+            f", \n"
             f"{indent}Virtualized = {self.virtualized} \n"
             f"{no_indent})"
         )
@@ -1,13 +1,17 @@
+import operator
 import typing
-import pydantic
+from argon.effects import Effects, PURE
+from argon.folding import const_result, constant_folder
 from argon.ref import Exp, Op, Sym
+from argon.rewrites import is_const_value, rewrite_rules, same_symbol
+from argon.srcctx import SrcCtx
 
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 T = typing.TypeVar("T", bound=Exp[typing.Any, typing.Any], covariant=True)
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Not[T](Op[T]):
     """
     The Not[T] operation represents a logical NOT operation.
@@ -23,8 +27,13 @@ class Not[T](Op[T]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class And[T](Op[T]):
     """
     The And[T] operation represents a logical AND operation.
@@ -43,8 +52,13 @@ class And[T](Op[T]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Or[T](Op[T]):
     """
     The Or[T] operation represents a logical OR operation.
@@ -63,8 +77,13 @@ class Or[T](Op[T]):
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
 
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Xor[T](Op[T]):
     """
     The Xor[T] operation represents a logical XOR operation.
@@ -82,3 +101,50 @@ class Xor[T](Op[T]):
     @typing.override
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.a, self.b]  # type: ignore
+
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
+
+constant_folder[Not] = operator.not_
+constant_folder[And] = operator.and_
+constant_folder[Or] = operator.or_
+constant_folder[Xor] = operator.xor
+
+
+@rewrite_rules.register(Not)
+def not_not(op: Not, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # ~~x => x
+    if op.a.is_node() and isinstance(op.a.rhs.val.underlying, Not):  # type: ignore
+        return op.a.rhs.val.underlying.a  # type: ignore
+    return None
+
+
+@rewrite_rules.register(And)
+def and_true(op: And, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x & True => x, True & x => x
+    if is_const_value(op.b, True):
+        return op.a  # type: ignore
+    if is_const_value(op.a, True):
+        return op.b  # type: ignore
+    return None
+
+
+@rewrite_rules.register(Or)
+def or_false(op: Or, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x | False => x, False | x => x
+    if is_const_value(op.b, False):
+        return op.a  # type: ignore
+    if is_const_value(op.a, False):
+        return op.b  # type: ignore
+    return None
+
+
+@rewrite_rules.register(Xor)
+def xor_self(op: Xor, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # x ^ x => False
+    if same_symbol(op.a, op.b):
+        return const_result(op, False, ctx)
+    return None
@@ -1,13 +1,15 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
+from argon.effects import Effects, PURE
 from argon.op import Op
+from argon.rewrites import rewrite_rules, same_symbol
+from argon.srcctx import SrcCtx
 from argon.ref import Sym
 from argon.types.boolean import Boolean
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Phi[T](Op[T]):
     """
     The Phi[T] operation selects a value based on a condition.
@@ -28,3 +30,16 @@ class Phi[T](Op[T]):
     @typing.override
     def operands(self) -> typing.List[Sym[typing.Any]]:
         return [self.cond, self.a, self.b]  # type: ignore
+
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
+
+
+@rewrite_rules.register(Phi)
+def phi_same(op: Phi, ctx: SrcCtx | None) -> typing.Optional[Sym[typing.Any]]:
+    # Phi(c, a, a) => a
+    if same_symbol(op.a, op.b):
+        return op.a  # type: ignore
+    return None
@@ -1,13 +1,13 @@
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
+from argon.effects import Effects, PURE
 from argon.op import Op
 from argon.ref import Exp
 from argon.types.struct import Struct
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Get[T](Op[T]):
     # Note: The proper type should be a Struct whose type parameter contains an element T
     struct: Struct
@@ -18,6 +18,11 @@ class Get[T](Op[T]):
     @typing.override
     def operands(self) -> typing.List[Exp[typing.Any, typing.Any]]:
         return [self.struct]
+
+    @property
+    @typing.override
+    def effects(self) -> Effects:
+        return PURE
     
     @typing.override
     def dump(self, indent_level=0) -> str:
@@ -1,15 +1,14 @@
 import typing
-import pydantic
 from argon.ref import Exp, Op, Sym
 
 # from argon.types.integer import Integer
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 
 T = typing.TypeVar("T", bound=Exp[typing.Any, typing.Any], covariant=True)
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Undefined[T](Op[T]):
     """
     The Undefined[T] operation represents a variable that has not been defined
@@ -1,17 +1,19 @@
 import abc
+import dataclasses
 import typing
 from argon.base import ArgonMeta
+from argon.effects import Effects, UNKNOWN
+from argon.printer import Printer
 from argon.srcctx import SrcCtx
 from argon.utils import compute_types
-from pydantic.dataclasses import dataclass
-import pydantic
+from dataclasses import dataclass
 
 # Experimentally extracted value which
 # grabs the context which called stage()
 _PYDANTIC_SCOPE_DEPTH = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class Op[R](ArgonMeta, abc.ABC):
     """
     The Op[R] class represents an operation that computes a result of type R. This
@@ -26,11 +28,79 @@ class Op[R](ArgonMeta, abc.ABC):
     def operands(self) -> typing.List["Sym[typing.Any]"]:
         raise NotImplementedError()
 
+    @property
+    def effects(self) -> Effects:
+        """
+        The side effects of this op. Only ops whose effects allow CSE are deduplicated at
+        stage time, so subclasses without side effects should override this.
+        """
+        return UNKNOWN
+
+    def cse_key(self) -> typing.Optional[typing.Hashable]:
+        """
+        Returns a key which identifies this op structurally, by its kind (including type
+        arguments) and the identity of its operands. Constant operands are identified by
+        their value. Returns None if some field cannot be hashed.
+        """
+        key: typing.List[typing.Hashable] = [getattr(self, "__orig_class__", type(self))]
+        for name in _field_names(type(self)):
+            component = _cse_component(getattr(self, name))
+            if component is _unhashable:
+                return None
+            key.append(component)
+        return tuple(key)
+
     def dump(self, indent_level=0) -> str:
         return str(self)
 
+    def write_to(self, printer: Printer, indent_level=0) -> None:
+        """
+        Writes the dump of this op to printer. Ops containing blocks should override this, and
+        make dump return Printer.dumps(self), so that their blocks are written piece by piece.
+        """
+        printer.write(self.dump(indent_level))
+
     def __str__(self) -> str:
         return f"{self.__class__.__name__}({', '.join(map(str, self.operands))})"
 
 
-from argon.ref import Sym
+_unhashable = object()
+_field_names_cache: typing.Dict[type, typing.Tuple[str, ...]] = {}
+
+
+def _field_names(cls: type) -> typing.Tuple[str, ...]:
+    names = _field_names_cache.get(cls)
+    if names is None:
+        names = tuple(field.name for field in dataclasses.fields(cls))
+        _field_names_cache[cls] = names
+    return names
+
+
+def _cse_component(value: typing.Any) -> typing.Hashable:
+    if isinstance(value, Exp):
+        if value.is_const():
+            const = value.rhs.val.value  # type: ignore -- value.rhs.val has already been checked to be a Const
+            try:
+                hash(const)
+            except TypeError:
+                return ("object", id(value))
+            return (type(value), "const", const)
+        # Staged symbols are only equal to themselves. They are identified by the id of their
+        # definition rather than of the Exp object, since symbols may be stored in a form other
+        # than their Exp (see argon.columnar) and recreated when they are accessed.
+        if value.rhs is not None and isinstance(value.rhs.val, (Node, Bound)):
+            return value.rhs.val.id
+        return ("object", id(value))
+    if isinstance(value, (list, tuple)):
+        components = tuple(_cse_component(item) for item in value)
+        if _unhashable in components:
+            return _unhashable
+        return components
+    try:
+        hash(value)
+    except TypeError:
+        return _unhashable
+    return ("literal", value)
+
+
+from argon.ref import Bound, Exp, Node, Sym
@@ -0,0 +1,143 @@
+import io
+import re
+import typing
+
+
+class Dumpable(typing.Protocol):
+    def write_to(self, printer: "Printer", indent_level: int = 0) -> None: ...
+
+
+class Printer:
+    """
+    Writes the dump of a graph to a file-like sink piece by piece, rather than building it as a
+    string, so that dumping a large graph does not take memory proportional to its dump. States,
+    scopes, blocks, symbols and ops write themselves to a Printer with their write_to method, and
+    their dump method returns what write_to writes.
+
+        sink : TextIO
+            The file-like object to write the dump to.
+        max_depth : Optional[int]
+            How many levels of nested blocks to write in full. Blocks nested deeper are elided.
+            None writes all blocks in full.
+        elide_repeated_blocks : bool
+            Whether blocks with the same structure as a block which has already been written, e.g.
+            the branches of an IfThenElse computing the same value, are only referred to by the
+            symbol the first one was written for. Blocks have the same structure if their dumps
+            only differ in the ids of the symbols defined in them and in source contexts. Each
+            block is buffered to compare it, so this takes memory proportional to its dump.
+    """
+
+    def __init__(
+        self,
+        sink: typing.TextIO,
+        max_depth: typing.Optional[int] = None,
+        elide_repeated_blocks: bool = False,
+    ):
+        self.sink = sink
+        self.max_depth = max_depth
+        self.elide_repeated_blocks = elide_repeated_blocks
+        # How many blocks the block being written is nested in
+        self.depth = 0
+        # The id of the symbol being written, to refer to the blocks written for it
+        self.symbol_id: typing.Optional[int] = None
+        # Maps the structure of each block written so far to where it was first written
+        self.written_blocks: typing.Dict[str, str] = {}
+
+    @staticmethod
+    def dumps(obj: Dumpable, indent_level: int = 0, **options: typing.Any) -> str:
+        """Returns the dump of obj, with the options of Printer."""
+        sink = io.StringIO()
+        obj.write_to(Printer(sink, **options), indent_level)
+        return sink.getvalue()
+
+    def write(self, text: str) -> None:
+        self.sink.write(text)
+
+    def symbols(
+        self, symbols: typing.Iterable[Dumpable], indent_level: int, num_streamed: int = 0
+    ) -> None:
+        """
+        Writes a list of symbols, one per line, or [] if there are none. num_streamed symbols
+        before them, which are no longer in memory, are written as a placeholder.
+        """
+        more_indent = "|   " * (indent_level + 1)
+        first = True
+        if num_streamed:
+            self.write(f"[\n{more_indent}<{num_streamed} symbols streamed>")
+            first = False
+        for symbol in symbols:
+            self.write("[\n" if first else ", \n")
+            self.write(more_indent)
+            symbol.write_to(self, indent_level + 1)
+            first = False
+        if first:
+            self.write("[]")
+        else:
+            self.write(f"\n{'|   ' * indent_level}]")
+
+    def block(self, block: typing.Any, indent_level: int, name: str) -> None:
+        """Writes a block nested in the op of the current symbol as its field name."""
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            self.write(f"Block(<{len(block.stms)} statements elided>)")
+            return
+        if self.elide_repeated_blocks:
+            self.block_unless_repeated(block, indent_level, name)
+            return
+        self.depth += 1
+        try:
+            block.write_to(self, indent_level)
+        finally:
+            self.depth -= 1
+
+    def block_unless_repeated(self, block: typing.Any, indent_level: int, name: str) -> None:
+        sink = self.sink
+        num_written = len(self.written_blocks)
+        self.sink = io.StringIO()
+        self.depth += 1
+        try:
+            block.write_to(self, indent_level)
+            text = self.sink.getvalue()
+        finally:
+            self.sink = sink
+            self.depth -= 1
+        structure = _block_structure(text)
+        written_as = self.written_blocks.get(structure)
+        if written_as is not None:
+            # The blocks nested in this one are not written either
+            for nested in list(self.written_blocks)[num_written:]:
+                del self.written_blocks[nested]
+            self.write(f"Block(<repeated, first written as {written_as}>)")
+            return
+        self.written_blocks[structure] = f"x{self.symbol_id}.{name}"
+        self.write(text)
+
+
+# The definition of a symbol or bound variable, and any reference to one
+_definition = re.compile(r"\b[xb](\d+) = ")
+_reference = re.compile(r"\b[xb](\d+)\b")
+_indent_or_ctx = re.compile(r"^(\|   )*(ctx: .*)?", re.MULTILINE)
+
+
+def _block_structure(text: str) -> str:
+    """
+    Returns the dump of a block with the symbols defined in it numbered in the order they are
+    defined in, and without indentation or source contexts.
+    """
+    defined: typing.Dict[str, int] = {}
+    for match in _definition.finditer(text):
+        defined.setdefault(match.group(1), len(defined))
+    text = _reference.sub(
+        lambda match: f"#{defined[match.group(1)]}" if match.group(1) in defined else match.group(0),
+        text,
+    )
+    return _indent_or_ctx.sub("", text)
+
+
+def write(
+    obj: Dumpable,
+    sink: typing.TextIO,
+    max_depth: typing.Optional[int] = None,
+    elide_repeated_blocks: bool = False,
+) -> None:
+    """Writes the dump of a State, Scope, Block, symbol or op to sink."""
+    obj.write_to(Printer(sink, max_depth, elide_repeated_blocks))
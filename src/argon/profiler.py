@@ -0,0 +1,245 @@
+"""
+An opt-in profiler of tracing, which records how often and how long the entry points of the
+tracing pipeline run, per op and per source location:
+
+    profiler = Profiler()
+    with profiler:
+        function_C_to_A(my_function)
+    print(profiler.format(group_by=("entry", "op")))
+
+The profiled entry points are State.stage, concrete_to_abstract, function_C_to_A, stage_if,
+stage_loop and stage_function_call. For State.stage, the op is the class of the staged op, and
+for the others it is what they trace or convert, e.g. the name of the function for
+function_C_to_A or the type of the converted value for concrete_to_abstract. The location is the
+source context of the staged op or of the traced construct, or else the code calling the entry
+point.
+
+Each entry point records its total time, including the entry points it calls, e.g. the ops staged
+by a function, and its self time, which excludes them. Self times can be summed over any grouping,
+while total times of entry points nested in each other are counted once for each of them.
+"""
+
+import csv
+import functools
+import sys
+import threading
+import time
+import types
+import typing
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+
+from argon.srcctx import SrcCtx
+
+
+_profiler: ContextVar[typing.Optional["Profiler"]] = ContextVar("profiler", default=None)
+# The tokens to restore the enclosing profilers with, innermost last
+_profiler_tokens: ContextVar[typing.Tuple[Token, ...]] = ContextVar(
+    "profiler_tokens", default=()
+)
+
+# The columns of the rows of a report, which may be grouped by
+COLUMNS = ("entry", "op", "location")
+
+
+@dataclass(slots=True)
+class ProfileRow:
+    """
+    The statistics of one group of profiled calls.
+
+        entry : Optional[str]
+            The profiled entry point, or None if the rows are not grouped by entry point.
+        op : Optional[str]
+            The op staged, or what was traced or converted, or None if the rows are not grouped by op.
+        location : Optional[str]
+            The source location, or None if the rows are not grouped by location.
+        count : int
+            The number of calls.
+        total_time : float
+            The time spent in the calls in seconds, including the profiled calls nested in them.
+        self_time : float
+            The time spent in the calls in seconds, excluding the profiled calls nested in them.
+    """
+
+    entry: typing.Optional[str]
+    op: typing.Optional[str]
+    location: typing.Optional[str]
+    count: int
+    total_time: float
+    self_time: float
+
+
+class Profiler:
+    """
+    Records the profiled calls made while it is entered as a context manager. Like the current
+    State, the current profiler is tracked per context, and it may be entered in several threads.
+    """
+
+    def __init__(self):
+        # Maps (entry, op, location key) to [count, total ns, self ns]
+        self.stats: typing.Dict[typing.Tuple[str, str, typing.Hashable], typing.List[int]] = {}
+        self._lock = threading.Lock()
+        # The time spent in the profiled calls nested in each call in progress, per thread
+        self._local = threading.local()
+
+    def __enter__(self) -> "Profiler":
+        _profiler_tokens.set(_profiler_tokens.get() + (_profiler.set(self),))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        tokens = _profiler_tokens.get()
+        _profiler.reset(tokens[-1])
+        _profiler_tokens.set(tokens[:-1])
+
+    def start(self) -> int:
+        """Starts recording a call, returning its start time to pass to stop()."""
+        children = getattr(self._local, "children", None)
+        if children is None:
+            children = self._local.children = []
+        children.append(0)
+        return time.perf_counter_ns()
+
+    def stop(self, entry: str, op: str, location: typing.Hashable, start: int) -> None:
+        """Records a call started with start(). Calls must be stopped in reverse order."""
+        elapsed = time.perf_counter_ns() - start
+        children = self._local.children
+        nested = children.pop()
+        if children:
+            children[-1] += elapsed
+        key = (entry, op, location)
+        with self._lock:
+            stat = self.stats.get(key)
+            if stat is None:
+                stat = self.stats[key] = [0, 0, 0]
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += elapsed - nested
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    def report(self, group_by: typing.Sequence[str] = COLUMNS) -> typing.List[ProfileRow]:
+        """
+        Returns the statistics grouped by the given columns (see COLUMNS), in descending order of
+        total time. The columns which are not grouped by are None.
+        """
+        for column in group_by:
+            if column not in COLUMNS:
+                raise ValueError(f"Cannot group by {column!r}, only by {', '.join(COLUMNS)}")
+        with self._lock:
+            stats = [(key, list(stat)) for key, stat in self.stats.items()]
+        locations: typing.Dict[typing.Hashable, str] = {}
+        groups: typing.Dict[typing.Tuple[typing.Optional[str], ...], typing.List[int]] = {}
+        for (entry, op, location), (count, total, self_total) in stats:
+            if "location" in group_by:
+                location_str = locations.get(location)
+                if location_str is None:
+                    location_str = locations[location] = _location_str(location)
+            else:
+                location_str = None
+            values = {"entry": entry, "op": op, "location": location_str}
+            group = tuple(values[column] if column in group_by else None for column in COLUMNS)
+            totals = groups.get(group)
+            if totals is None:
+                totals = groups[group] = [0, 0, 0]
+            totals[0] += count
+            totals[1] += total
+            totals[2] += self_total
+        rows = [
+            ProfileRow(*group, count, total / 1e9, self_total / 1e9)
+            for group, (count, total, self_total) in groups.items()
+        ]
+        rows.sort(key=lambda row: row.total_time, reverse=True)
+        return rows
+
+    def write_csv(
+        self, file: typing.TextIO, group_by: typing.Sequence[str] = COLUMNS
+    ) -> None:
+        """Writes the report as a CSV table with a header row, e.g. to load it into a spreadsheet."""
+        writer = csv.writer(file)
+        writer.writerow([*COLUMNS, "count", "total_time", "self_time"])
+        for row in self.report(group_by):
+            writer.writerow(
+                [row.entry, row.op, row.location, row.count, row.total_time, row.self_time]
+            )
+
+    def format(
+        self, group_by: typing.Sequence[str] = COLUMNS, limit: typing.Optional[int] = None
+    ) -> str:
+        """Formats the report, or its first limit rows, as a table of the grouped by columns."""
+        columns = [column for column in COLUMNS if column in group_by]
+        lines = [
+            [*columns, "count", "total ms", "self ms"],
+            *(
+                [
+                    *(str(getattr(row, column)) for column in columns),
+                    str(row.count),
+                    f"{row.total_time * 1e3:.3f}",
+                    f"{row.self_time * 1e3:.3f}",
+                ]
+                for row in self.report(group_by)[:limit]
+            ),
+        ]
+        widths = [max(len(line[i]) for line in lines) for i in range(len(lines[0]))]
+        return "\n".join(
+            "  ".join(
+                # The text columns are left-aligned and the numbers right-aligned
+                cell.ljust(width) if i < len(columns) else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(line, widths))
+            ).rstrip()
+            for line in lines
+        )
+
+
+def _location_str(location: typing.Hashable) -> str:
+    if isinstance(location, tuple):
+        code, lasti = location
+        return str(SrcCtx.from_code(code, lasti)).strip()
+    return str(location).strip()
+
+
+def profiled(
+    entry: str,
+    op: typing.Union[str, typing.Callable[..., str]],
+    location: typing.Optional[typing.Callable[..., typing.Optional[SrcCtx]]] = None,
+) -> typing.Callable[[typing.Callable], typing.Callable]:
+    """
+    Profiles a function as the entry point entry while a Profiler is active. op is the op of the
+    calls, or a function computing it from the arguments of a call, and location computes their
+    source location from the arguments, if it is given and does not return None, or else the
+    caller of the function is used. When no profiler is active, the cost is a ContextVar lookup.
+    The wrapper adds a frame, which SrcCtx.new() calls in func must skip with a greater depth.
+    """
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            ctx = None if location is None else location(*args, **kwargs)
+            if ctx is None:
+                frame = sys._getframe(1)
+                location_key: typing.Hashable = (frame.f_code, frame.f_lasti)
+            else:
+                location_key = ctx.unresolved_location() or ctx
+            op_name = op if isinstance(op, str) else op(*args, **kwargs)
+            # func is called here rather than by the profiler, so that it is always called from
+            # the same depth
+            start = profiler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop(entry, op_name, location_key, start)
+
+        return wrapper
+
+    return decorator
+
+
+def function_name(func: typing.Any) -> str:
+    """The name of a function, or of the type of another callable, to use as the op of calls."""
+    if isinstance(func, (types.FunctionType, types.MethodType, types.BuiltinFunctionType)):
+        return func.__qualname__
+    return type(func).__name__
@@ -1,9 +1,9 @@
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 
 import abc
 import typing
 from argon.base import ArgonMeta
+from argon.printer import Printer
 from argon.srcctx import SrcCtx
 
 from argon.utils import compute_types
@@ -19,18 +19,27 @@ class ExpType[C, A](ArgonMeta, abc.ABC):
     type A. This class should be subclassed to define custom expression types.
     """
 
+    __slots__ = ()
+
     @classmethod
     def type_name(cls) -> str:
         return cls.__name__
 
-    @abc.abstractmethod
     def fresh(self) -> A:
-        raise NotImplementedError()
+        """
+        Returns a new value of the staged type A. Types parameterized by type arguments override
+        this, since their instances are created from their parameterized alias.
+        """
+        return typing.cast(A, type(self)())
 
-    def _new(self, d: "Def[C, A]", ctx: SrcCtx) -> A:  # type: ignore -- Pyright falsely detects C and A as abstractproperty instead of type variables
+    def _new(self, d: "Def[C, A]", ctx: SrcCtx | None) -> A:  # type: ignore -- Pyright falsely detects C and A as abstractproperty instead of type variables
         right_type = typing.cast(type, self.A)
 
-        empty_val: Ref = typing.cast(Ref, right_type().fresh())
+        # Only types overriding fresh() need a throwaway instance to call it on
+        if right_type.fresh is ExpType.fresh:
+            empty_val: Ref = right_type()
+        else:
+            empty_val = typing.cast(Ref, right_type().fresh())
 
         empty_val.rhs = d
         empty_val.ctx = ctx
@@ -65,7 +74,7 @@ class ExpType[C, A](ArgonMeta, abc.ABC):
         return self.type_name()
 
 
-@dataclass
+@dataclass(slots=True)
 class Bound[A]:
     id: int
     name: str
@@ -78,20 +87,27 @@ class Bound[A]:
         return f"b{self.id}"
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+@dataclass(slots=True)
 class Node[A]:
     id: int
     underlying: "Op[A]"
     def_type: typing.Literal["Node"] = "Node"
 
     def dump(self, indent_level=0) -> str:
-        return f"x{self.id} = {self.underlying.dump(indent_level)}"
+        return Printer.dumps(self, indent_level)
+
+    def write_to(self, printer: Printer, indent_level=0) -> None:
+        printer.write(f"x{self.id} = ")
+        symbol_id = printer.symbol_id
+        printer.symbol_id = self.id
+        self.underlying.write_to(printer, indent_level)
+        printer.symbol_id = symbol_id
 
     def __str__(self) -> str:
         return f"x{self.id}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Const[C]:
     value: C
     def_type: typing.Literal["Const"] = "Const"
@@ -103,7 +119,7 @@ class Const[C]:
         return f"Const({self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class TypeRef:
     def_type: typing.Literal["TypeRef"] = "TypeRef"
 
@@ -114,20 +130,24 @@ class TypeRef:
         return "TypeRef()"
 
 
-@dataclass
+@dataclass(slots=True)
 class Def[C, A]:
-    val: typing.Union[Const[C], Bound[A], Node[A], TypeRef] = pydantic.Field(
-        discriminator="def_type"
-    )
+    val: typing.Union[Const[C], Bound[A], Node[A], TypeRef]
 
     def dump(self, indent_level=0) -> str:
         return self.val.dump(indent_level)
 
+    def write_to(self, printer: Printer, indent_level=0) -> None:
+        if isinstance(self.val, Node):
+            self.val.write_to(printer, indent_level)
+        else:
+            printer.write(self.val.dump(indent_level))
+
     def __str__(self) -> str:
         return str(self.val)
 
 
-@dataclass
+@dataclass(slots=True)
 class Exp[C, A](ArgonMeta, abc.ABC):
     """
     Exp[C, A] defines an expression with denotational type C, and staged type A. This
@@ -160,11 +180,17 @@ class Exp[C, A](ArgonMeta, abc.ABC):
         return self.rhs != None and isinstance(self.rhs.val, TypeRef)
 
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        rhs_str = "None" if self.rhs is None else self.rhs.dump(indent_level)
-        return (
-            f"{rhs_str}( \n"
+        if self.rhs is None:
+            printer.write("None")
+        else:
+            self.rhs.write_to(printer, indent_level)
+        printer.write(
+            f"( \n"
             f"{indent}tp: {self.tp.tp_name} \n"
             f"{indent}ctx: {self.ctx} \n"
             f"{no_indent})"
@@ -175,6 +201,7 @@ class Exp[C, A](ArgonMeta, abc.ABC):
 
 
 class Ref[C, A](ExpType[C, A], Exp[C, A]):
+    __slots__ = ()
 
     @property
     @typing.override
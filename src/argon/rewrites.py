@@ -0,0 +1,82 @@
+import collections
+import typing
+
+from argon.folding import const_result
+from argon.ref import Bound, Exp, Node, Op
+from argon.srcctx import SrcCtx
+
+
+type RewriteRule = typing.Callable[
+    [typing.Any, SrcCtx | None], typing.Optional[Exp[typing.Any, typing.Any]]
+]
+
+
+# This class is used to map an op class to the peephole rewrite rules that are tried,
+# in registration order, before an op of that class is staged as a new symbol
+class _RewriteRules:
+    def __init__(self):
+        self.rules: typing.Dict[type, typing.List[RewriteRule]] = {}
+        # How many times each rule fired, keyed by "<op class>.<rule name>"
+        self.counters: typing.Counter[str] = collections.Counter()
+
+    def register(
+        self, op_cls: typing.Type[Op[typing.Any]]
+    ) -> typing.Callable[[RewriteRule], RewriteRule]:
+        """
+        Decorator which registers a rewrite rule for op_cls. The rule is called with the op
+        and its SrcCtx and returns the symbol to use instead, or None if it does not apply.
+        """
+
+        def decorator(rule: RewriteRule) -> RewriteRule:
+            self.rules.setdefault(op_cls, []).append(rule)
+            return rule
+
+        return decorator
+
+    def __contains__(self, op_cls: typing.Type[Op[typing.Any]]) -> bool:
+        return op_cls in self.rules
+
+    def __call__(
+        self, op: Op[typing.Any], ctx: SrcCtx | None
+    ) -> typing.Optional[Exp[typing.Any, typing.Any]]:
+        """Applies the first matching rule for op, returning None if no rule applies."""
+        rules = self.rules.get(type(op))
+        if rules is None:
+            return None
+        for rule in rules:
+            result = rule(op, ctx)
+            if result is not None:
+                self.counters[f"{type(op).__name__}.{rule.__name__}"] += 1
+                return result
+        return None
+
+    def reset_counters(self) -> None:
+        self.counters.clear()
+
+
+rewrite_rules = _RewriteRules()
+
+
+def is_const_value(sym: Exp[typing.Any, typing.Any], value: typing.Any) -> bool:
+    """Checks whether sym is a constant with the given value (and the same Python type)."""
+    if not sym.is_const():
+        return False
+    const = sym.rhs.val.value  # type: ignore -- sym.rhs.val has already been checked to be a Const
+    return type(const) is type(value) and const == value
+
+
+def same_symbol(a: Exp[typing.Any, typing.Any], b: Exp[typing.Any, typing.Any]) -> bool:
+    """
+    Checks whether a and b are the same bound variable or node. They may be different Exps, e.g.
+    views of a symbol stored in columns (see argon.columnar), so they are compared by id.
+    """
+    if a is b:
+        return True
+    if a.rhs is None or b.rhs is None:
+        return False
+    val_a, val_b = a.rhs.val, b.rhs.val
+    return (
+        isinstance(val_a, (Node, Bound))
+        and isinstance(val_b, (Node, Bound))
+        and val_a.id == val_b.id
+    )
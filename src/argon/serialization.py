@@ -0,0 +1,1174 @@
+"""
+A compact binary format for traced graphs, so that a State can be stored, e.g. as a build
+artifact, and loaded again without retracing:
+
+    data = argon.serialization.dumps(state)
+    state = argon.serialization.loads(data)
+
+A serialized graph starts with a magic string and the format version, followed by the State and
+its scopes. Every value is written as a one-byte tag followed by its payload, with integers as
+variable-length (LEB128, zigzag for signed) integers. Symbols, types, strings, source contexts and
+other objects are interned: their first occurrence is written in full and assigned the next index
+of a table, which later occurrences refer to. Symbols are written in the order they are staged in,
+so their operands are written before them and usually only take a couple of bytes.
+
+Ops and blocks are written as their class and the state returned by __getstate__, so ops that
+customize pickling, like FunctionNew and Loop, are written in the same form as when pickled. Values
+of other types, e.g. the value of a Const of a custom type, are pickled.
+
+A SymbolSink writes the same format incrementally, while a State is being traced, so that the
+symbols of very large traces do not have to be kept in memory:
+
+    with open("trace.argon", "wb") as file, SymbolSink(file) as sink:
+        with State(sink=sink):
+            ...
+    with open("trace.argon", "rb") as file:
+        state = argon.serialization.load(file)
+
+Loading a graph is not safe on untrusted data. Types are only imported from argon, from the
+modules of the types registered with the type mappers (see argon.virtualization.type_mapper) and
+from the modules passed to allow_module(), but the state of ops and objects is set as read, the
+modules of virtualized functions referenced by FunctionNew are imported, and values which were
+pickled are only read if loading is called with allow_pickle=True, which runs arbitrary code.
+
+Graphs serialized with index=True end with an index of the offset of every interned value and of
+the symbol with every id and the functions with every name, which LazyGraph uses to memory-map a
+graph and only read the symbols that are looked up.
+"""
+
+import array
+import collections.abc
+import dataclasses
+import dis
+import importlib
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import types
+import typing
+
+from argon.columnar import ColumnarSymbols
+from argon.errors import ArgonError
+from argon.node.function_new import FunctionNew
+from argon.op import Op
+from argon.ref import Bound, Const, Def, Exp, Node, TypeRef
+from argon.srcctx import SrcCtx
+from argon.state import Scope, State
+
+
+_MAGIC = b"ARGNIR"
+# Incremented whenever the format changes in a way older readers cannot load
+FORMAT_VERSION = 2
+# Written at the start of the index of an indexed graph
+_INDEX_MAGIC = b"ARGNIDX\0"
+
+# Header flags
+_INDEXED = 1
+
+# Value tags
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_BYTES = 6
+_LIST = 7
+_TUPLE = 8
+_DICT = 9
+_REF = 10
+_TYPE = 11
+_CTX = 12
+_EXP = 13
+_OBJECT = 14
+_PICKLE = 15
+
+# Kinds of Defs, written after the type of an Exp
+_NO_DEF = 0
+_BOUND = 1
+_NODE = 2
+_CONST = 3
+_TYPEREF = 4
+
+# Varints which are only known once a stream is closed, e.g. the number of symbols, are written
+# padded to this many bytes and overwritten when closing. Readers decode them like other varints.
+_PADDED_SIZE = 10
+
+_float = struct.Struct("<d")
+_u64 = struct.Struct("<Q")
+# The types of specialized generic classes, e.g. of Add[Integer]
+_ALIAS_TYPES = (type(typing.List[int]), types.GenericAlias)
+
+
+class SerializationError(ArgonError):
+    pass
+
+
+# The modules other than argon which loading a graph may import types from, see allow_module()
+_allowed_modules: typing.Set[str] = set()
+
+
+def allow_module(module: str) -> None:
+    """Allows loading graphs which reference types defined in module, e.g. custom ops."""
+    _allowed_modules.add(module)
+
+
+def _may_import(module: str) -> bool:
+    if module == "argon" or module.startswith("argon.") or module in _allowed_modules:
+        return True
+    from argon.virtualization.type_mapper import (
+        concrete_to_abstract,
+        concrete_to_abstract_type,
+        concrete_to_bound,
+    )
+
+    registered = itertools.chain(
+        concrete_to_abstract.C_to_A_map,
+        concrete_to_bound.C_to_B_map,
+        concrete_to_abstract_type.C_to_AT_map.items(),
+    )
+    for entry in registered:
+        for tp in entry if isinstance(entry, tuple) else (entry,):
+            if isinstance(tp, type) and tp.__module__ == module:
+                return True
+    return False
+
+
+def dumps(state: State, *, index: bool = False) -> bytes:
+    """
+    Serializes state and every symbol staged into it. If index is True, an index of the symbols
+    and functions is appended, which allows opening the graph with LazyGraph.
+    """
+    writer = _Writer(index)
+    writer.out += _MAGIC
+    writer.uint(FORMAT_VERSION)
+    writer.uint(_INDEXED if index else 0)
+    writer.int(state._id)
+    writer.uint(_state_flags(state))
+    writer.scope(state.scope)
+    if index:
+        writer.index()
+    return bytes(writer.out)
+
+
+def _state_flags(state: State) -> int:
+    return state.cse | state.fold << 1 | state.rewrite << 2 | state.columnar << 3
+
+
+def loads(data: bytes, *, allow_pickle: bool = False) -> State:
+    """
+    Deserializes a State serialized by dumps(). Values which were pickled are only unpickled if
+    allow_pickle is True, since unpickling untrusted data runs arbitrary code.
+    """
+    reader = _Reader(data, 0, allow_pickle=allow_pickle)
+    end = _read_header(reader)
+    state = _read_state(reader)
+    if reader.pos != end:
+        raise SerializationError("The serialized graph has trailing data")
+    return state
+
+
+def _read_header(reader: "_Reader") -> int:
+    """Reads the header of a serialized graph, returning the offset its index, if any, starts at."""
+    data = reader.data
+    if data[: len(_MAGIC)] != _MAGIC:
+        raise SerializationError("The data is not a serialized argon graph")
+    reader.pos = len(_MAGIC)
+    version = reader.uint()
+    if version != FORMAT_VERSION:
+        raise SerializationError(
+            f"The graph was serialized with format version {version}, but only version {FORMAT_VERSION} is supported"
+        )
+    if not reader.uint() & _INDEXED:
+        return len(data)
+    index_start = _u64.unpack_from(data, len(data) - _u64.size)[0] if len(data) >= _u64.size else -1
+    if not 0 <= index_start < len(data) or data[index_start : index_start + len(_INDEX_MAGIC)] != _INDEX_MAGIC:
+        raise SerializationError("The index of the serialized graph is corrupted")
+    return index_start
+
+
+def _read_state(reader: "_Reader") -> State:
+    try:
+        state = State.__new__(State)
+        state._id = reader.int()
+        flags = reader.uint()
+        state.cse = bool(flags & 1)
+        state.fold = bool(flags & 2)
+        state.rewrite = bool(flags & 4)
+        state.columnar = bool(flags & 8)
+        state.sink = None
+        state.scope = reader.scope()  # type: ignore -- the root scope is never None
+        state.__post_init__()
+    except (IndexError, ValueError, TypeError, struct.error) as e:
+        raise SerializationError(f"The serialized graph is corrupted: {e}") from e
+    return state
+
+
+def dump(state: State, file: typing.BinaryIO, *, index: bool = False) -> None:
+    file.write(dumps(state, index=index))
+
+
+def load(file: typing.BinaryIO, *, allow_pickle: bool = False) -> State:
+    return loads(file.read(), allow_pickle=allow_pickle)
+
+
+class LazyGraph:
+    """
+    A graph serialized with dumps(state, index=True), which is memory-mapped rather than read, and
+    whose symbols are only materialized when they are looked up by their id or by the name of the
+    function they define. Materializing a symbol also materializes the symbols it uses, e.g. the
+    body of a function, but nothing else. Each symbol is only materialized once, so looking it up
+    again, or loading the whole graph afterwards, returns the same object.
+
+        with LazyGraph("trace.argon") as graph:
+            print(graph.functions("my_function")[0])
+
+    Values which were pickled are only unpickled if allow_pickle is True, as with loads().
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike], *, allow_pickle: bool = False):
+        with open(path, "rb") as file:
+            try:
+                # Empty files cannot be mapped
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SerializationError(f"{path} is not a serialized argon graph: {e}") from e
+        try:
+            self._reader = _Reader(self._map, 0)
+            index_start = _read_header(self._reader)
+            if index_start == len(self._map):
+                raise SerializationError(
+                    f"{path} was serialized without an index, use load() instead"
+                )
+            self._data_start = self._reader.pos
+            self._index_end = index_start
+
+            pos = index_start + len(_INDEX_MAGIC)
+            num_interned = _u64.unpack_from(self._map, pos)[0]
+            self._offsets_start = pos + _u64.size
+            pos = self._offsets_start + num_interned * _u64.size
+            self._num_ids = _u64.unpack_from(self._map, pos)[0]
+            self._ids_start = pos + _u64.size
+            index_reader = _Reader(self._map, self._ids_start + self._num_ids * _u64.size)
+            self._functions: typing.Dict[str, typing.List[int]] = {}
+            for _ in range(index_reader.uint()):
+                name = index_reader.bytes().decode()
+                self._functions[name] = [index_reader.uint() for _ in range(index_reader.uint())]
+
+            self._reader = _Reader(
+                self._map, 0, self._offset, num_interned, allow_pickle=allow_pickle
+            )
+        except (IndexError, ValueError, struct.error) as e:
+            self._map.close()
+            raise SerializationError(f"The index of {path} is corrupted: {e}") from e
+        except BaseException:
+            self._map.close()
+            raise
+
+    def _offset(self, index: int) -> int:
+        return _u64.unpack_from(self._map, self._offsets_start + index * _u64.size)[0]
+
+    @property
+    def num_materialized(self) -> int:
+        """The number of symbols and other interned values materialized so far."""
+        return sum(value is not _missing for value in self._reader.memo)
+
+    def symbol_ids(self) -> typing.Iterator[int]:
+        """Yields the ids of the bound variables and nodes in the graph in ascending order."""
+        for id in range(self._num_ids):
+            if _u64.unpack_from(self._map, self._ids_start + id * _u64.size)[0]:
+                yield id
+
+    def symbol(self, id: int) -> Exp[typing.Any, typing.Any]:
+        """Returns the bound variable or node with the given id, raising KeyError if there is none."""
+        index = 0
+        if 0 <= id < self._num_ids:
+            index = _u64.unpack_from(self._map, self._ids_start + id * _u64.size)[0]
+        if not index:
+            raise KeyError(id)
+        return self._materialize(index - 1)
+
+    def function_names(self) -> typing.List[str]:
+        return list(self._functions)
+
+    def functions(self, name: str) -> typing.List[Exp[typing.Any, typing.Any]]:
+        """Returns the FunctionNew symbols traced for the function with the given name, e.g. one per specialization."""
+        return [self._materialize(index) for index in self._functions.get(name, [])]
+
+    def load(self) -> State:
+        """Materializes the whole graph, reusing the symbols that have already been materialized."""
+        self._reader.pos = self._data_start
+        self._reader.next_index = 0
+        state = _read_state(self._reader)
+        if self._reader.pos != self._index_end:
+            raise SerializationError("The serialized graph has trailing data")
+        return state
+
+    def _materialize(self, index: int) -> typing.Any:
+        try:
+            return self._reader.materialize(index)
+        except (IndexError, ValueError, TypeError, struct.error) as e:
+            raise SerializationError(f"The serialized graph is corrupted: {e}") from e
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "LazyGraph":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _Writer:
+    def __init__(self, index: bool = False):
+        self.out = bytearray()
+        # Maps each interned value to its index. Strings and source contexts are interned by
+        # value, and every other value by id.
+        self.memo: typing.Dict[typing.Hashable, int] = {}
+        # Keeps the values interned by id alive, so that their ids are not reused
+        self.interned: typing.List[typing.Any] = []
+        self.num_interned = 0
+        # The offset in the serialized graph of the start of out, if the start was written already
+        self.start = 0
+        # Maps the type of each value written so far to the method writing it
+        self.writers: typing.Dict[type, typing.Callable[[typing.Any], None]] = {
+            type(None): self.none,
+            bool: self.bool,
+            int: self.int_value,
+            float: self.float,
+            str: self.str,
+            bytes: self.bytes,
+            list: self.list_value,
+            tuple: self.tuple,
+            dict: self.dict,
+            SrcCtx: self.ctx,
+            # The symbols of nested blocks stored in columns are written like a list of them
+            ColumnarSymbols: self.list_value,
+        }
+        # If the graph is indexed, the offset of each interned value, the index of the symbol
+        # with each id and the indices of the functions with each name
+        self.offsets: typing.Optional[typing.List[int]] = [] if index else None
+        self.symbols: typing.Dict[int, int] = {}
+        self.functions: typing.Dict[str, typing.List[int]] = {}
+
+    def uint(self, n: int) -> None:
+        out = self.out
+        while n >= 0x80:
+            out.append(n & 0x7F | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def int(self, n: int) -> None:
+        self.uint(n << 1 if n >= 0 else (-n << 1) - 1)
+
+    def intern(self, key: typing.Hashable, value: typing.Any) -> bool:
+        """Writes a reference to value and returns True if it was interned before, or else interns it."""
+        index = self.memo.get(key)
+        if index is not None:
+            self.out.append(_REF)
+            self.uint(index)
+            return True
+        self.memo[key] = self.next_index()
+        self.interned.append(value)
+        return False
+
+    def next_index(self) -> int:
+        """Assigns the next index to a value about to be written in full."""
+        if self.offsets is not None:
+            self.offsets.append(self.start + len(self.out))
+        index = self.num_interned
+        self.num_interned += 1
+        return index
+
+    def index(self) -> None:
+        """
+        Writes the index of an indexed graph: the offset of every interned value and the index of
+        the symbol with every id as arrays of 64-bit integers, so that they can be looked up without
+        reading the whole index, then the names of the functions and the indices of their symbols.
+        The offset of the index is written at the very end.
+        """
+        assert self.offsets is not None
+        out = self.out
+        start = self.start + len(out)
+        out += _INDEX_MAGIC
+        out += _u64.pack(len(self.offsets))
+        out += struct.pack(f"<{len(self.offsets)}Q", *self.offsets)
+        ids = self.symbol_indices()
+        out += _u64.pack(len(ids))
+        out += struct.pack(f"<{len(ids)}Q", *ids)
+        self.uint(len(self.functions))
+        for name, indices in self.functions.items():
+            self.bytes_payload(name.encode())
+            self.uint(len(indices))
+            for index in indices:
+                self.uint(index)
+        out += _u64.pack(start)
+
+    def symbol_indices(self) -> typing.Sequence[int]:
+        """The index of the symbol with each id plus one, so that 0 marks ids without a symbol."""
+        ids = [0] * (max(self.symbols, default=-1) + 1)
+        for id, index in self.symbols.items():
+            ids[id] = index + 1
+        return ids
+
+    def scope(self, scope: typing.Optional[Scope]) -> None:
+        if scope is None:
+            self.out.append(_NONE)
+            return
+        if isinstance(scope.symbols, SymbolSink) and scope.symbols.num_streamed:
+            raise SerializationError(
+                "The symbols of a State streamed by a SymbolSink are serialized by the sink"
+            )
+        self.out.append(_LIST)
+        self.scope(scope.parent)
+        self.list(scope.symbols)
+        self.list(list(scope.cache.values()))
+
+    def list(self, values: typing.Sequence[typing.Any]) -> None:
+        self.uint(len(values))
+        for value in values:
+            self.value(value)
+
+    def value(self, value: typing.Any) -> None:
+        tp = type(value)
+        write = self.writers.get(tp)
+        if write is None:
+            write = self.writers[tp] = self.writer_for(tp)
+        write(value)
+
+    def writer_for(self, tp: type) -> typing.Callable[[typing.Any], None]:
+        if issubclass(tp, Exp):
+            return self.exp
+        if issubclass(tp, type) or typing.get_origin(tp) is not None or tp in _ALIAS_TYPES:
+            return self.type
+        if dataclasses.is_dataclass(tp):
+            return self.object
+        return self.pickle
+
+    def none(self, value: None) -> None:
+        self.out.append(_NONE)
+
+    def bool(self, value: bool) -> None:
+        self.out.append(_TRUE if value else _FALSE)
+
+    def int_value(self, value: int) -> None:
+        self.out.append(_INT)
+        self.int(value)
+
+    def float(self, value: float) -> None:
+        self.out.append(_FLOAT)
+        self.out += _float.pack(value)
+
+    def str(self, value: str) -> None:
+        if not self.intern(value, value):
+            self.out.append(_STR)
+            self.bytes_payload(value.encode())
+
+    def bytes(self, value: bytes) -> None:
+        self.out.append(_BYTES)
+        self.bytes_payload(value)
+
+    def bytes_payload(self, value: bytes) -> None:
+        self.uint(len(value))
+        self.out += value
+
+    def list_value(self, value: typing.List[typing.Any]) -> None:
+        self.out.append(_LIST)
+        self.list(value)
+
+    def tuple(self, value: typing.Tuple[typing.Any, ...]) -> None:
+        self.out.append(_TUPLE)
+        self.list(value)
+
+    def dict(self, value: typing.Dict[typing.Any, typing.Any]) -> None:
+        self.out.append(_DICT)
+        self.uint(len(value))
+        for key, item in value.items():
+            self.value(key)
+            self.value(item)
+
+    def ctx(self, ctx: SrcCtx) -> None:
+        if not self.intern(ctx, ctx):
+            self.out.append(_CTX)
+            self.value(ctx.file)
+            positions = ctx.positions
+            self.value(None if positions is None else tuple(positions))
+
+    def type(self, tp: typing.Any) -> None:
+        if self.intern(id(tp), tp):
+            return
+        origin = typing.get_origin(tp) or tp
+        self.out.append(_TYPE)
+        self.value(origin.__module__)
+        self.value(origin.__qualname__)
+        self.list(typing.get_args(tp))
+
+    def object(self, obj: typing.Any) -> None:
+        if not self.intern(id(obj), obj):
+            self.object_payload(obj)
+
+    def object_payload(self, obj: typing.Any) -> None:
+        self.out.append(_OBJECT)
+        self.type(type(obj))
+        self.value(obj.__getstate__())
+
+    def pickle(self, value: typing.Any) -> None:
+        try:
+            data = pickle.dumps(value)
+        except Exception as e:
+            raise SerializationError(f"Cannot serialize {value!r}: {e}") from e
+        self.out.append(_PICKLE)
+        self.bytes_payload(data)
+
+    def exp(self, exp: Exp[typing.Any, typing.Any]) -> None:
+        val = None if exp.rhs is None else exp.rhs.val
+        # Staged symbols are interned by their id rather than by object, since the symbols stored
+        # in columns are a new Exp every time they are accessed (see argon.columnar)
+        key = (_EXP, val.id) if isinstance(val, (Node, Bound)) else id(exp)
+        if self.intern(key, exp):
+            return
+        if self.offsets is not None:
+            self.index_symbol(self.num_interned - 1, val)
+        self.exp_payload(exp, val)
+
+    def exp_payload(self, exp: Exp[typing.Any, typing.Any], val: typing.Any) -> None:
+        out = self.out
+        out.append(_EXP)
+        self.type(getattr(exp, "__orig_class__", type(exp)))
+        if val is None:
+            out.append(_NO_DEF)
+        elif isinstance(val, Node):
+            out.append(_NODE)
+            self.uint(val.id)
+            self.value(val.underlying)
+        elif isinstance(val, Bound):
+            out.append(_BOUND)
+            self.uint(val.id)
+            self.value(val.name)
+        elif isinstance(val, Const):
+            out.append(_CONST)
+            self.value(val.value)
+        else:
+            out.append(_TYPEREF)
+        self.value(exp.ctx)
+
+    def index_symbol(self, index: int, val: typing.Any) -> None:
+        if isinstance(val, Node):
+            self.symbols.setdefault(val.id, index)
+            if isinstance(val.underlying, FunctionNew):
+                self.functions.setdefault(val.underlying.name, []).append(index)
+        elif isinstance(val, Bound):
+            self.symbols.setdefault(val.id, index)
+
+
+class _StreamWriter(_Writer):
+    """
+    Writes the symbols streamed by a SymbolSink, without keeping what was written alive: symbols
+    are interned by their id rather than by object, the ops and blocks of a symbol are only interned
+    until it has been written, and constants are written in full wherever they occur.
+    """
+
+    def __init__(self, index: bool = False):
+        super().__init__(index)
+        if self.offsets is not None:
+            self.offsets = array.array("Q")  # type: ignore -- used like the list of offsets
+        # The index of the symbol with each id plus one, so that 0 marks ids not written yet
+        self.ids = array.array("Q")
+        # The objects interned while writing the current symbol, with their indices, by id
+        self.objects: typing.Dict[int, typing.Tuple[int, typing.Any]] = {}
+
+    @typing.override
+    def symbol_indices(self) -> typing.Sequence[int]:
+        return self.ids
+
+    @typing.override
+    def exp(self, exp: Exp[typing.Any, typing.Any]) -> None:
+        val = None if exp.rhs is None else exp.rhs.val
+        if not isinstance(val, (Node, Bound)):
+            self.next_index()
+            self.exp_payload(exp, val)
+            return
+        ids = self.ids
+        if val.id >= len(ids):
+            ids.extend(itertools.repeat(0, val.id + 1 - len(ids)))
+        elif ids[val.id]:
+            self.out.append(_REF)
+            self.uint(ids[val.id] - 1)
+            return
+        index = self.next_index()
+        ids[val.id] = index + 1
+        if self.offsets is not None and isinstance(val, Node) and isinstance(val.underlying, FunctionNew):
+            self.functions.setdefault(val.underlying.name, []).append(index)
+        self.exp_payload(exp, val)
+
+    @typing.override
+    def object(self, obj: typing.Any) -> None:
+        interned = self.objects.get(id(obj))
+        if interned is not None:
+            self.out.append(_REF)
+            self.uint(interned[0])
+            return
+        self.objects[id(obj)] = (self.next_index(), obj)
+        self.object_payload(obj)
+
+
+def _padded_uint(n: int) -> bytes:
+    return bytes(
+        (n >> 7 * i) & 0x7F | (0x80 if i < _PADDED_SIZE - 1 else 0)
+        for i in range(_PADDED_SIZE)
+    )
+
+
+@dataclasses.dataclass(slots=True)
+class Streamed[R](Op[R]):
+    """
+    The op of a symbol which was streamed to disk by a SymbolSink. Its actual op is only stored in
+    the stream, and is read back by loading the stream.
+    """
+
+    @property
+    @typing.override
+    def operands(self) -> typing.List[Exp[typing.Any, typing.Any]]:
+        return []
+
+
+_STREAMED = Streamed()
+
+
+class SymbolSink(collections.abc.Sequence):
+    """
+    Streams the symbols staged into the root scope of a State to a file in the format of dumps(),
+    for traces too large to keep in memory. It is attached to a State with State(sink=sink), and
+    replaces the symbols of its root scope.
+
+    A symbol is streamed once frontier more symbols have been staged into the root scope after it,
+    since a symbol may still change right after it was staged, e.g. the body of a function is
+    traced after the function was staged. Streaming a symbol also streams the blocks nested in it.
+    Symbols which have been streamed are not kept in memory, and their op is replaced by Streamed,
+    although they may still be used as operands. The symbols of nested scopes are kept until the
+    symbol of the root scope they are nested in is streamed. If CSE is enabled, the CSE cache of the
+    root scope only keeps the id and type of each symbol, so that streamed symbols can still be
+    reused without being kept in memory: they are found as a new Exp of their type whose op is
+    Streamed, without a source context. Iterating
+    over the sink only yields the symbols kept in memory, and dumps of the State write the others
+    as a placeholder.
+
+    The stream is complete, and can be loaded with load() or LazyGraph, once the sink has been
+    closed. The file must be seekable.
+
+        file : BinaryIO
+            The file to write the graph to, from its current position.
+        index : bool
+            Whether to append an index of the symbols and functions, as with dumps(index=True).
+        frontier : int
+            How many of the symbols staged last into the root scope are kept in memory.
+        buffer_size : int
+            How many bytes are buffered before writing them to the file.
+    """
+
+    def __init__(
+        self,
+        file: typing.BinaryIO,
+        *,
+        index: bool = False,
+        frontier: int = 64,
+        buffer_size: int = 1 << 20,
+    ):
+        if frontier < 1:
+            raise ValueError("At least the last symbol staged must be kept in memory")
+        self.file = file
+        self.frontier = frontier
+        self.buffer_size = buffer_size
+        self.state: typing.Optional[State] = None
+        self.scope: typing.Optional[Scope] = None
+        self.closed = False
+        self.num_streamed = 0
+        self._writer = _StreamWriter(index)
+        self._pending: typing.Deque[Exp[typing.Any, typing.Any]] = collections.deque()
+        self._start = 0
+        self._id_offset = 0
+        self._count_offset = 0
+
+    def attach(self, state: State) -> None:
+        """Starts streaming the root scope of state, which is called by State(sink=self)."""
+        if self.state is not None:
+            raise SerializationError("A SymbolSink can only be attached to one State")
+        if state.scope.parent is not None:
+            raise SerializationError("Only the root scope of a State can be streamed")
+        if state.columnar:
+            raise SerializationError("The symbols of a columnar State cannot be streamed")
+        self.state = state
+        self.scope = state.scope
+        self._start = self.file.tell()
+
+        writer = self._writer
+        writer.out += _MAGIC
+        writer.uint(FORMAT_VERSION)
+        writer.uint(_INDEXED if writer.offsets is not None else 0)
+        self._id_offset = len(writer.out)
+        writer.out += _padded_uint(0)
+        writer.uint(_state_flags(state))
+        writer.out.append(_LIST)
+        writer.out.append(_NONE)
+        self._count_offset = len(writer.out)
+        writer.out += _padded_uint(0)
+
+        symbols = state.scope.symbols
+        state.scope.symbols = self  # type: ignore -- SymbolSink supports the list operations used on symbols
+        state.scope.cache = _SinkCache(self, state.scope.cache)
+        for symbol in symbols:
+            self.append(symbol)
+
+    def append(self, symbol: Exp[typing.Any, typing.Any]) -> None:
+        if self.closed:
+            raise SerializationError("Cannot stage into a State whose SymbolSink is closed")
+        self._pending.append(symbol)
+        if len(self._pending) > self.frontier:
+            self._stream(self._pending.popleft())
+
+    def _stream(self, symbol: Exp[typing.Any, typing.Any]) -> None:
+        writer = self._writer
+        writer.value(symbol)
+        writer.objects.clear()
+        if symbol.rhs is not None and isinstance(symbol.rhs.val, Node):
+            symbol.rhs.val.underlying = _STREAMED
+        self.num_streamed += 1
+        if len(writer.out) >= self.buffer_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        writer = self._writer
+        self.file.write(writer.out)
+        writer.start += len(writer.out)
+        writer.out.clear()
+
+    def close(self) -> None:
+        """Streams the remaining symbols and completes the stream, leaving the file open."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.state is None or self.scope is None:
+            return
+        while self._pending:
+            self._stream(self._pending.popleft())
+        writer = self._writer
+        writer.list(list(self.scope.cache.values()))
+        if writer.offsets is not None:
+            writer.index()
+        self._flush()
+        end = self.file.tell()
+        state_id = self.state._id
+        self.file.seek(self._start + self._id_offset)
+        self.file.write(_padded_uint(state_id << 1 if state_id >= 0 else (-state_id << 1) - 1))
+        self.file.seek(self._start + self._count_offset)
+        self.file.write(_padded_uint(self.num_streamed))
+        self.file.seek(end)
+        self.file.flush()
+
+    def __enter__(self) -> "SymbolSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.num_streamed + len(self._pending)
+
+    def __iter__(self) -> typing.Iterator[Exp[typing.Any, typing.Any]]:
+        """Iterates over the symbols which have not been streamed yet, i.e. from num_streamed."""
+        return iter(self._pending)
+
+    def __getitem__(self, index: int) -> Exp[typing.Any, typing.Any]:  # type: ignore -- slices are not supported
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("symbol index out of range")
+        if index < self.num_streamed:
+            raise SerializationError(
+                f"Symbol {index} of the root scope has been streamed to disk and is no longer in memory"
+            )
+        return self._pending[index - self.num_streamed]
+
+
+class _SinkCache(collections.abc.MutableMapping):
+    """
+    The CSE cache of a root scope streamed by a SymbolSink, which maps the key of each symbol to
+    its id, and its id to its type, rather than keeping its Exp like argon.columnar.ColumnarCache.
+    """
+
+    def __init__(
+        self,
+        sink: SymbolSink,
+        cache: typing.Mapping[typing.Hashable, Exp[typing.Any, typing.Any]] = {},
+    ):
+        self.sink = sink
+        self.ids: typing.Dict[typing.Hashable, int] = {}
+        # The types of the cached symbols, and the index of the type of each cached symbol by id
+        self.types: typing.List[typing.Any] = []
+        self.type_indices: typing.Dict[typing.Any, int] = {}
+        self.symbol_types = array.array("H")
+        self.update(cache)
+
+    def __getitem__(self, key: typing.Hashable) -> Exp[typing.Any, typing.Any]:
+        return self.symbol(self.ids[key])
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        # Overridden since most lookups miss, which is slow through __getitem__
+        id = self.ids.get(key)
+        if id is None:
+            return default
+        return self.symbol(id)
+
+    def symbol(self, id: int) -> Exp[typing.Any, typing.Any]:
+        """Returns the symbol with the given id, which is a new Exp if it has been streamed."""
+        for symbol in reversed(self.sink._pending):
+            node_id = symbol.rhs.val.id  # type: ignore -- only staged nodes are cached
+            if node_id == id:
+                return symbol
+            if node_id < id:
+                break
+        exp = self.types[self.symbol_types[id]]()
+        exp.rhs = Def(Node(id, _STREAMED))
+        exp.ctx = None
+        return exp
+
+    def __setitem__(self, key: typing.Hashable, symbol: Exp[typing.Any, typing.Any]) -> None:
+        id = symbol.rhs.val.id  # type: ignore -- only staged nodes are cached
+        tp = getattr(symbol, "__orig_class__", type(symbol))
+        index = self.type_indices.get(tp)
+        if index is None:
+            index = self.type_indices[tp] = len(self.types)
+            self.types.append(tp)
+        symbol_types = self.symbol_types
+        if id >= len(symbol_types):
+            symbol_types.extend(itertools.repeat(0, id + 1 - len(symbol_types)))
+        symbol_types[id] = index
+        self.ids[key] = id
+
+    def __delitem__(self, key: typing.Hashable) -> None:
+        del self.ids[key]
+
+    def __iter__(self) -> typing.Iterator[typing.Hashable]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+# Marks the interned values an indexed graph has not materialized yet
+_missing = object()
+
+# Entries of the stack of _Reader.references which are not a number of values still to be scanned
+_SCAN_DEF = -1  # The kind and payload of the Def of an Exp, followed by its context
+_SCAN_LIST = -2  # A varint number of values, followed by those values
+
+
+class _Reader:
+    def __init__(
+        self,
+        data: typing.Any,
+        pos: int,
+        offset: typing.Optional[typing.Callable[[int], int]] = None,
+        num_interned: int = 0,
+        allow_pickle: bool = False,
+    ):
+        self.data = data
+        self.pos = pos
+        self.allow_pickle = allow_pickle
+        # The interned values by index. Reading an indexed graph lazily, the values which have
+        # not been materialized yet are read from their offset when first referenced.
+        self.memo: typing.List[typing.Any] = [_missing] * num_interned
+        self.next_index = 0
+        self.offset = offset
+
+    def _reserve(self) -> int:
+        index = self.next_index
+        self.next_index += 1
+        if index == len(self.memo):
+            self.memo.append(_missing)
+        return index
+
+    def _define(self, index: int, value: typing.Any) -> typing.Any:
+        # A value may be read again after it has been materialized, if it is nested in a value
+        # materialized later, in which case the value materialized first is kept
+        current = self.memo[index]
+        if current is _missing:
+            self.memo[index] = value
+            return value
+        return current
+
+    def materialize(self, index: int) -> typing.Any:
+        """Returns the interned value with the given index, reading it if needed."""
+        value = self.memo[index]
+        if value is not _missing:
+            return value
+        if self.offset is None:
+            raise ValueError(f"reference to undefined value {index}")
+        # The values a value references are materialized before it, using a stack rather than
+        # recursion, since e.g. a chain of symbols each using the previous one is deeper than the
+        # recursion limit. References always point to values written earlier, so there are no
+        # cycles, and a value is read once all the values it references are in memo.
+        pos, next_index = self.pos, self.next_index
+        stack = [index]
+        scanned: typing.Set[int] = set()
+        try:
+            while stack:
+                top = stack[-1]
+                if self.memo[top] is not _missing:
+                    stack.pop()
+                elif top not in scanned:
+                    scanned.add(top)
+                    stack += self.references(top)
+                else:
+                    stack.pop()
+                    self.pos, self.next_index = self.offset(top), top
+                    self.value()
+        finally:
+            self.pos, self.next_index = pos, next_index
+        return self.memo[index]
+
+    def references(self, index: int) -> typing.List[int]:
+        """
+        Returns the indices of the values which have not been materialized yet and are referenced
+        by the value with the given index, other than those interned within it, by scanning its
+        encoding without reading it.
+        """
+        assert self.offset is not None
+        data = self.data
+        memo = self.memo
+        pos = self.offset(index)
+        # The values interned within the value are numbered from index, in the order they are read
+        next_index = index
+        references: typing.Dict[int, None] = {}
+        # The number of values still to be scanned in each enclosing value, innermost last
+        pending = [1]
+        while pending:
+            top = pending[-1]
+            if top == 0:
+                pending.pop()
+                continue
+            if top == _SCAN_DEF:
+                pending[-1] = 1  # The context
+                kind = data[pos]
+                pos += 1
+                if kind == _NODE or kind == _BOUND:
+                    while data[pos] >= 0x80:
+                        pos += 1
+                    pos += 1
+                    pending.append(1)
+                elif kind == _CONST:
+                    pending.append(1)
+                elif kind != _TYPEREF and kind != _NO_DEF:
+                    raise ValueError(f"unknown definition kind {kind}")
+                continue
+            if top == _SCAN_LIST:
+                self.pos = pos
+                pending[-1] = self.uint()
+                pos = self.pos
+                continue
+            pending[-1] = top - 1
+            tag = data[pos]
+            pos += 1
+            if tag == _REF:
+                self.pos = pos
+                ref = self.uint()
+                pos = self.pos
+                if not index <= ref < next_index and memo[ref] is _missing:
+                    references[ref] = None
+            elif tag == _EXP:
+                next_index += 1
+                pending += (_SCAN_DEF, 1)  # The type, followed by the Def
+            elif tag == _INT:
+                while data[pos] >= 0x80:
+                    pos += 1
+                pos += 1
+            elif tag == _FLOAT:
+                pos += _float.size
+            elif tag == _STR or tag == _BYTES or tag == _PICKLE:
+                if tag == _STR:
+                    next_index += 1
+                self.pos = pos
+                length = self.uint()
+                pos = self.pos + length
+            elif tag == _LIST or tag == _TUPLE:
+                pending.append(_SCAN_LIST)
+            elif tag == _DICT:
+                self.pos = pos
+                pending.append(2 * self.uint())
+                pos = self.pos
+            elif tag == _CTX or tag == _OBJECT:
+                next_index += 1
+                pending.append(2)
+            elif tag == _TYPE:
+                next_index += 1
+                pending += (_SCAN_LIST, 2)  # The module and qualified name, followed by the type arguments
+            elif tag > _PICKLE:
+                raise ValueError(f"unknown tag {tag}")
+        return list(references)
+
+    def byte(self) -> int:
+        byte = self.data[self.pos]
+        self.pos += 1
+        return byte
+
+    def uint(self) -> int:
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def int(self) -> int:
+        n = self.uint()
+        return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+    def bytes(self) -> bytes:
+        length = self.uint()
+        data = self.data[self.pos : self.pos + length]
+        if len(data) != length:
+            raise ValueError("unexpected end of data")
+        self.pos += length
+        return bytes(data)
+
+    def scope(self) -> typing.Optional[Scope]:
+        tag = self.byte()
+        if tag == _NONE:
+            return None
+        if tag != _LIST:
+            raise ValueError(f"expected a scope, found tag {tag}")
+        parent = self.scope()
+        symbols = self.list()
+        cached = self.list()
+        scope = Scope.__new__(Scope)
+        scope.__setstate__((parent, symbols, cached))
+        return scope
+
+    def list(self) -> typing.List[typing.Any]:
+        return [self.value() for _ in range(self.uint())]
+
+    def value(self) -> typing.Any:
+        tag = self.byte()
+        # The most common tags are checked first
+        if tag == _REF:
+            index = self.uint()
+            value = self.memo[index]
+            if value is _missing:
+                return self.materialize(index)
+            return value
+        if tag == _EXP:
+            return self.exp()
+        if tag == _NONE:
+            return None
+        if tag == _FALSE:
+            return False
+        if tag == _TRUE:
+            return True
+        if tag == _INT:
+            return self.int()
+        if tag == _FLOAT:
+            value = _float.unpack_from(self.data, self.pos)[0]
+            self.pos += _float.size
+            return value
+        if tag == _STR:
+            index = self._reserve()
+            return self._define(index, self.bytes().decode())
+        if tag == _BYTES:
+            return self.bytes()
+        if tag == _LIST:
+            return self.list()
+        if tag == _TUPLE:
+            return tuple(self.list())
+        if tag == _DICT:
+            return {self.value(): self.value() for _ in range(self.uint())}
+        if tag == _CTX:
+            index = self._reserve()
+            file = self.value()
+            positions = self.value()
+            ctx = SrcCtx(file, None if positions is None else dis.Positions(*positions))
+            return self._define(index, ctx)
+        if tag == _TYPE:
+            return self.type()
+        if tag == _OBJECT:
+            index = self._reserve()
+            cls = self.value()
+            obj = cls.__new__(cls)
+            defined = self._define(index, obj)
+            _set_state(obj, self.value())
+            return defined
+        if tag == _PICKLE:
+            data = self.bytes()
+            if not self.allow_pickle:
+                raise SerializationError(
+                    "The serialized graph contains pickled values, which are only loaded with allow_pickle=True"
+                )
+            return pickle.loads(data)
+        raise ValueError(f"unknown tag {tag}")
+
+    def type(self) -> typing.Any:
+        index = self._reserve()
+        module_name = self.value()
+        qualname = self.value()
+        args = self.list()
+        if not _may_import(module_name):
+            raise SerializationError(
+                f"Cannot load the type {module_name}.{qualname}, since {module_name} is not a module of argon or of a registered type, see allow_module()"
+            )
+        try:
+            tp = importlib.import_module(module_name)
+            for name in qualname.split("."):
+                tp = getattr(tp, name)
+        except (ImportError, AttributeError) as e:
+            raise SerializationError(
+                f"Cannot import the type {module_name}.{qualname}: {e}"
+            ) from e
+        if args:
+            tp = tp[args[0] if len(args) == 1 else tuple(args)]
+        return self._define(index, tp)
+
+    def exp(self) -> Exp[typing.Any, typing.Any]:
+        index = self._reserve()
+        tp = self.value()
+        exp = tp()
+        # Interned before its definition is read, since a function may call itself
+        defined = self._define(index, exp)
+        kind = self.byte()
+        if kind == _NODE:
+            id = self.uint()
+            exp.rhs = Def(Node(id, self.value()))
+        elif kind == _BOUND:
+            id = self.uint()
+            exp.rhs = Def(Bound(id, self.value()))
+        elif kind == _CONST:
+            exp.rhs = Def(Const(self.value()))
+        elif kind == _TYPEREF:
+            exp.rhs = Def(TypeRef())
+        elif kind != _NO_DEF:
+            raise ValueError(f"unknown definition kind {kind}")
+        exp.ctx = self.value()
+        return defined
+
+
+def _set_state(obj: typing.Any, state: typing.Any) -> None:
+    # Mirrors how pickle applies the state returned by __getstate__
+    setstate = getattr(obj, "__setstate__", None)
+    if setstate is not None:
+        setstate(state)
+        return
+    if isinstance(state, tuple):
+        state, slots = state
+    else:
+        slots = None
+    if state:
+        obj.__dict__.update(state)
+    if slots:
+        for name, value in slots.items():
+            object.__setattr__(obj, name, value)
+
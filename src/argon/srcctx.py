@@ -1,15 +1,64 @@
-import inspect
+import contextlib
+import enum
+import itertools
+import sys
+import types
+import typing
 import dis
-from pydantic.dataclasses import dataclass
+from contextvars import ContextVar
+
+
+class CaptureMode(enum.Enum):
+    """Controls how much work SrcCtx.new() does when an op is staged.
+
+    EAGER resolves the file and positions immediately, LAZY only records the code
+    object and instruction offset of the target frame and resolves the positions
+    the first time they are needed, and NONE skips capturing entirely (SrcCtx.new()
+    returns None).
+    """
+
+    EAGER = 0
+    LAZY = 1
+    NONE = 2
+
+
+_capture_mode: ContextVar[CaptureMode] = ContextVar(
+    "srcctx_capture_mode", default=CaptureMode.LAZY
+)
+
+# Sentinel for positions that have not been resolved yet
+_unresolved = object()
 
 
-@dataclass(unsafe_hash=True, frozen=True, slots=True)
 class SrcCtx:
-    file: str
-    positions: dis.Positions | None
+    """The source location an expression was staged from.
+
+        file : str
+            The file containing the staging call.
+        positions : Optional[dis.Positions]
+            The line and column information of the staging call.
+    """
+
+    __slots__ = ("_file", "_positions", "_code", "_lasti")
+
+    def __init__(self, file: str, positions: dis.Positions | None) -> None:
+        self._file = file
+        self._positions = positions
+        self._code = None
+        self._lasti = -1
+
+    @classmethod
+    def from_code(cls, code: types.CodeType, lasti: int) -> "SrcCtx":
+        """Creates a SrcCtx whose positions are resolved on first access."""
+        ctx = cls.__new__(cls)
+        ctx._file = code.co_filename
+        ctx._positions = _unresolved
+        ctx._code = code
+        ctx._lasti = lasti
+        return ctx
 
     @staticmethod
-    def new(depth: int = 1) -> "SrcCtx":
+    def new(depth: int = 1) -> typing.Optional["SrcCtx"]:
         """Captures the source context, which allows later reference for debugging.
 
         Args:
@@ -17,11 +66,91 @@ class SrcCtx:
                 The capture depth. Depth=1 captures the caller of new(), while greater depths enable
                 capturing further outside.
         """
-        frame = inspect.stack()[depth]
-        return SrcCtx(frame.filename, frame.positions)
+        mode = _capture_mode.get()
+        if mode is CaptureMode.NONE:
+            return None
+        # Walk directly to the target frame instead of materializing the whole stack
+        frame = sys._getframe(depth)
+        if mode is CaptureMode.EAGER:
+            return SrcCtx(
+                frame.f_code.co_filename,
+                _resolve_positions(frame.f_code, frame.f_lasti),
+            )
+        return SrcCtx.from_code(frame.f_code, frame.f_lasti)
+
+    def unresolved_location(self) -> typing.Optional[typing.Tuple[types.CodeType, int]]:
+        """Returns the code object and instruction offset to resolve the positions from, if they have not been resolved yet."""
+        if self._positions is _unresolved:
+            return self._code, self._lasti  # type: ignore -- _code is always set for unresolved contexts
+        return None
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    @property
+    def positions(self) -> dis.Positions | None:
+        if self._positions is _unresolved:
+            self._positions = _resolve_positions(self._code, self._lasti)  # type: ignore -- _code is always set for unresolved contexts
+            self._code = None
+        return self._positions  # type: ignore -- _unresolved has been handled above
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SrcCtx):
+            return NotImplemented
+        return self.file == other.file and self.positions == other.positions
+
+    def __hash__(self) -> int:
+        return hash((self.file, self.positions))
+
+    def __reduce__(self):
+        return (SrcCtx, (self.file, self.positions))
+
+    def __repr__(self) -> str:
+        return f"SrcCtx(file={self.file!r}, positions={self.positions!r})"
 
     def __str__(self) -> str:
         # Need a space character before self.file for VSCode to recognize the file path
         if self.positions is None:
             return f" {self.file}"
         return f"{self.file}:{self.positions.lineno}:{self.positions.col_offset}"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: typing.Any, handler: typing.Any):
+        # Only imported when a pydantic model uses SrcCtx as a field type
+        from pydantic_core import core_schema
+
+        return core_schema.is_instance_schema(cls)
+
+
+def _resolve_positions(code: types.CodeType, lasti: int) -> dis.Positions | None:
+    if lasti < 0:
+        return None
+    # The nth entry of co_positions() corresponds to the instruction at byte offset 2n
+    positions = next(itertools.islice(code.co_positions(), lasti // 2, None), None)
+    if positions is None:
+        return None
+    return dis.Positions(*positions)
+
+
+def get_capture_mode() -> CaptureMode:
+    return _capture_mode.get()
+
+
+def set_capture_mode(mode: CaptureMode) -> None:
+    """Sets the SrcCtx capture mode for the current context."""
+    _capture_mode.set(mode)
+
+
+@contextlib.contextmanager
+def capture_mode(mode: CaptureMode) -> typing.Iterator[None]:
+    """Temporarily switches the SrcCtx capture mode, e.g. for production retraces:
+
+        with capture_mode(CaptureMode.NONE):
+            func.virtualized.call_transformed()
+    """
+    token = _capture_mode.set(mode)
+    try:
+        yield
+    finally:
+        _capture_mode.reset(token)
@@ -1,22 +1,49 @@
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
+import dataclasses
 import typing
 
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass
 from argon.errors import StagingError
+from argon.hooks import hooks
+from argon.printer import Printer
+from argon.profiler import profiled
+from argon.folding import constant_folder
+from argon.rewrites import rewrite_rules
 
 from argon.ref import Exp, Op, Sym
 import argon.ref as ref
 from argon.srcctx import SrcCtx
 
+if typing.TYPE_CHECKING:
+    from argon.serialization import SymbolSink
+
 _state: ContextVar[typing.Optional["State"]] = ContextVar("state", default=None)
-_sentinel = object()
+# The tokens to restore the enclosing states with, innermost last
+_state_tokens: ContextVar[typing.Tuple[Token, ...]] = ContextVar("state_tokens", default=())
 
 
-@dataclass
+# States are compared and hashed by identity, and can be weakly referenced by caches of their symbols
+@dataclass(slots=True, eq=False, weakref_slot=True)
 class State:
     _id: int = -1
-    scope: "Scope" = pydantic.Field(default_factory=lambda: Scope())
+    scope: "Scope" = dataclasses.field(default_factory=lambda: Scope())
+    # Whether effect-free ops are deduplicated against previously staged symbols
+    cse: bool = True
+    # Whether ops with only constant operands are evaluated at stage time (see argon.folding)
+    fold: bool = True
+    # Whether peephole simplifications are applied at stage time (see argon.rewrites)
+    rewrite: bool = True
+    # Whether the symbols of every scope are stored in columns rather than as Exps (see argon.columnar)
+    columnar: bool = False
+    # If set, the symbols of the root scope are streamed to a file as they are staged rather than
+    # kept in memory (see argon.serialization.SymbolSink)
+    sink: typing.Optional["SymbolSink"] = None
+
+    def __post_init__(self):
+        if self.sink is not None:
+            self.sink.attach(self)
+        elif self.columnar:
+            self.scope.store_in_columns()
 
     @staticmethod
     def get_current_state() -> "State":
@@ -30,130 +57,235 @@ class State:
         return self._id
 
     def new_scope(self) -> "ScopeContext":
-        return ScopeContext(state=self, scope=Scope(parent=self.scope))
-
+        scope = Scope(parent=self.scope)
+        if self.columnar:
+            scope.store_in_columns()
+        return ScopeContext(state=self, scope=scope)
+
+    @profiled(
+        "State.stage",
+        lambda self, op, ctx=None: type(op).__name__,
+        lambda self, op, ctx=None: ctx,
+    )
     def stage[R](self, op: Op[R], ctx: SrcCtx | None = None) -> R:
-        ctx = ctx or SrcCtx.new(2)
-        return self.register(op, lambda: self._symbol(op.R, op, ctx), lambda sym: None)  # type: ignore
+        # Depth 3 skips the frame of the profiled wrapper
+        ctx = ctx or SrcCtx.new(3)
+        if self.fold:
+            folded = constant_folder(op, ctx)
+            if folded is not None:
+                return typing.cast(R, folded)
+        if self.rewrite:
+            rewritten = rewrite_rules(op, ctx)
+            if rewritten is not None:
+                return typing.cast(R, rewritten)
+        return self.register(op, lambda: self._symbol(op.R, op, ctx))  # type: ignore
 
     def register[R](
         self,
         op: Op[R],
         symbol: typing.Callable[[], R],
-        flow: typing.Callable[[Sym[R]], None],
+        flow: typing.Optional[typing.Callable[[Sym[R]], None]] = None,
     ) -> R:
+        """
+        Registers the symbol created by symbol() for op in the current scope, unless CSE finds an
+        existing one. flow is called with a new symbol, after which the listeners are notified
+        (see argon.hooks).
+        """
+        # Ops without side effects are hash-consed: an op that is structurally identical to
+        # one already staged in this scope or an enclosing one returns the existing symbol.
+        key = op.cse_key() if self.cse and op.effects.may_cse else None
+        if key is not None:
+            cached = self.scope.lookup(key)
+            if cached is not None:
+                return typing.cast(R, cached)
+
         lhs = symbol()
         sym = typing.cast(Sym[R], lhs)
         self.scope.symbols.append(sym)
-
-        flow(sym)
+        if key is not None:
+            self.scope.cache[key] = sym
+
+        if flow is not None:
+            flow(sym)
+        if hooks.on_symbol:
+            for callback in hooks.on_symbol:
+                callback(self, sym)
         return lhs
 
-    def _symbol[A](self, tp: ref.Type[A], op: Op[A], ctx: SrcCtx) -> A:
+    def _symbol[A](self, tp: ref.Type[A], op: Op[A], ctx: SrcCtx | None) -> A:
         return tp()._new(ref.Def(ref.Node(self.next_id(), op)), ctx)
 
-    prev_state: typing.Optional["State"] = None
-
-    # Code to support using State as a context manager.
+    # Code to support using State as a context manager. The current state is only tracked in
+    # ContextVars, so the same State may be entered in several threads or tasks, as long as they
+    # don't stage into it concurrently.
     def __enter__(self) -> "State":
-        previous = _state.get(_sentinel)
-        if previous is not _sentinel:
-            self.prev_state = previous  # type: ignore
-        _state.set(self)
+        _state_tokens.set(_state_tokens.get() + (_state.set(self),))
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.prev_state is not _sentinel:
-            _state.set(self.prev_state)
-        self.prev_state = None
+        tokens = _state_tokens.get()
+        _state.reset(tokens[-1])
+        _state_tokens.set(tokens[:-1])
 
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        scope_str = "None" if self.scope is None else self.scope.dump(indent_level + 1)
-        prev_state_str = (
-            "None"
-            if self.prev_state is None
-            else self.prev_state.dump(indent_level + 1)
-        )
-        return (
-            f"\n"
-            f"State( \n"
-            f"{indent}scope={scope_str}, \n"
-            f"{indent}prev_state={prev_state_str} \n"
-            f"{no_indent})"
-        )
+        printer.write(f"\nState( \n{indent}scope=")
+        if self.scope is None:
+            printer.write("None")
+        else:
+            self.scope.write_to(printer, indent_level + 1)
+        printer.write(f" \n{no_indent})")
 
     def __str__(self) -> str:
         return self.dump()
 
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True), repr=True)
+@dataclass(slots=True, repr=True)
 class Scope:
     parent: typing.Optional["Scope"] = None
     # These need to be explicitly spelled out instead of using Sym[typing.Any] because that breaks Pydantic.
-    symbols: typing.List[Exp[typing.Any, typing.Any]] = pydantic.Field(
+    symbols: typing.List[Exp[typing.Any, typing.Any]] = dataclasses.field(
         default_factory=list
     )
-    cache: typing.MutableMapping[Op[typing.Any], Exp[typing.Any, typing.Any]] = (
-        pydantic.Field(default_factory=dict)
+    # Maps the structural key of each effect-free op (see Op.cse_key) to its symbol
+    cache: typing.MutableMapping[typing.Hashable, Exp[typing.Any, typing.Any]] = (
+        dataclasses.field(default_factory=dict)
+    )
+    # Incrementally maintained index backing inputs: the ids of the nodes defined in
+    # this scope, the candidate inputs by id, the symbols which have been indexed and
+    # how many of them
+    _defined_ids: typing.Set[int] = dataclasses.field(
+        default_factory=set, init=False, repr=False, compare=False
+    )
+    _input_map: typing.Dict[int, Exp[typing.Any, typing.Any]] = dataclasses.field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _indexed_symbols: typing.Optional[typing.Sequence[Exp[typing.Any, typing.Any]]] = (
+        dataclasses.field(default=None, init=False, repr=False, compare=False)
     )
+    _num_indexed: int = dataclasses.field(
+        default=0, init=False, repr=False, compare=False
+    )
+
+    def store_in_columns(self) -> None:
+        """Moves the symbols of this scope into columns (see argon.columnar)."""
+        from argon.columnar import ColumnarCache, ColumnarSymbols
+
+        if not isinstance(self.symbols, ColumnarSymbols):
+            self.symbols = ColumnarSymbols(self.symbols)  # type: ignore -- ColumnarSymbols supports the list operations used on symbols
+            self.cache = ColumnarCache(self.symbols, self.cache)
+
+    def lookup(
+        self, key: typing.Hashable
+    ) -> typing.Optional[Exp[typing.Any, typing.Any]]:
+        """Finds a previously staged symbol for the given CSE key in this scope or its parents."""
+        scope: typing.Optional[Scope] = self
+        while scope is not None:
+            sym = scope.cache.get(key)
+            if sym is not None:
+                return sym
+            scope = scope.parent
+        return None
 
     @property
     def inputs(self) -> typing.List[Exp[typing.Any, typing.Any]]:
+        """
+        The symbols used by this scope that are defined outside of it, in order of first use.
+        The free-input set is maintained incrementally: each symbol appended to symbols is
+        indexed once, the first time inputs is read after it was appended.
+        """
+        symbols = self.symbols
+        num_symbols = len(symbols)
+        if symbols is not self._indexed_symbols or num_symbols < self._num_indexed:
+            # The symbols were replaced rather than appended to, so start over
+            self._defined_ids.clear()
+            self._input_map.clear()
+            self._indexed_symbols = symbols
+            self._num_indexed = 0
+        # A SymbolSink no longer has the symbols it has streamed, which cannot be indexed
+        num_streamed = getattr(symbols, "num_streamed", 0)
+        for index in range(max(self._num_indexed, num_streamed), num_symbols):
+            self._index(symbols[index])
+        self._num_indexed = num_symbols
+
+        inputs = [
+            input
+            for input_id, input in self._input_map.items()
+            if input_id not in self._defined_ids
+        ]
+        if num_streamed:
+            from argon.serialization import Streamed
+
+            # The streamed symbols were staged into this scope, even if they were not indexed
+            inputs = [
+                input for input in inputs if not isinstance(input.rhs.val.underlying, Streamed)  # type: ignore -- Op.inputs only contains Nodes
+            ]
+        return inputs
+
+    def _index(self, symbol: Exp[typing.Any, typing.Any]) -> None:
         from argon.node.phi import Phi
 
         # We only want to consider symbols that have inputs in their rhs (i.e. Nodes)
-        # We also want to exclude Phi nodes from the list of inputs
-        node_symbols = [
-            symbol
-            for symbol in self.symbols
-            if symbol.is_node() and not isinstance(symbol.rhs.val.underlying, Phi)  # type: ignore -- symbol.rhs.val has already been checked to be a Node
-        ]
-
+        if not symbol.is_node():
+            return
+        node = symbol.rhs.val  # type: ignore -- symbol.rhs has already been checked to be a Node
+        self._defined_ids.add(node.id)  # type: ignore -- node has already been checked to be a Node
+        # The operands of Phi nodes come from the branches of an IfThenElse, which are not
+        # inputs of the scope the Phi is staged in
+        if isinstance(node.underlying, Phi):  # type: ignore -- node has already been checked to be a Node
+            return
         # We use a symbol's id instead of just the symbol objects below because symbols
         # are not hashable and Python complains.
-        # Create a dictionary mapping IDs to symbols
-        symbol_map = {symbol.rhs.val.id: symbol for symbol in node_symbols}  # type: ignore -- symbol.rhs.val has already been checked to be a Node
-
-        all_symbol_ids = set(symbol_map.keys())
-
-        # The list of inputs in our scope constitutes the set of all inputs of all symbols
-        # minus the set of all symbols defined in this scope
-        all_input_ids = set()
-        for symbol in node_symbols:
-            inputs = symbol.rhs.val.underlying.inputs  # type: ignore -- symbol.rhs.val has already been checked to be a Node
-            symbol_map.update({input.rhs.val.id: input for input in inputs})  # type: ignore -- input.rhs.val has already been checked to be a Node
-            all_input_ids.update({input.rhs.val.id for input in inputs})  # type: ignore -- input.rhs.val has already been checked to be a Node
-
-        result_ids = all_input_ids - all_symbol_ids
-        return [symbol_map[result_id] for result_id in result_ids]
+        for input in node.underlying.inputs:  # type: ignore -- node has already been checked to be a Node
+            input_id = input.rhs.val.id  # type: ignore -- Op.inputs only contains Nodes
+            if input_id not in self._defined_ids and input_id not in self._input_map:
+                self._input_map[input_id] = input
+
+    # The CSE keys identify some operands, e.g. unhashable constants, by their object id, which
+    # does not survive pickling, so only the cached symbols are pickled and their keys are
+    # computed again when unpickling. The inputs index is rebuilt on demand.
+    def __getstate__(self):
+        return (self.parent, self.symbols, list(self.cache.values()))
+
+    def __setstate__(self, state):
+        self.parent, self.symbols, cached = state
+        self.cache = {}
+        for sym in cached:
+            key = sym.rhs.val.underlying.cse_key()  # type: ignore -- only Nodes are cached
+            if key is not None:
+                self.cache[key] = sym
+        self._defined_ids = set()
+        self._input_map = {}
+        self._indexed_symbols = None
+        self._num_indexed = 0
 
     def dump(self, indent_level=0) -> str:
+        return Printer.dumps(self, indent_level)
+
+    def write_to(self, printer: Printer, indent_level=0) -> None:
         no_indent = "|   " * indent_level
         indent = "|   " * (indent_level + 1)
-        more_indent = "|   " * (indent_level + 2)
-        parent_str = (
-            "None" if self.parent is None else self.parent.dump(indent_level + 1)
-        )
-        if self.symbols:
-            symbols_str = ", \n".join(
-                f"{more_indent}{symbol.dump(indent_level + 2)}"
-                for symbol in self.symbols
-            )
-            symbols_str = f"[\n{symbols_str}\n{indent}]"
+        printer.write(f"Scope( \n{indent}parent=")
+        if self.parent is None:
+            printer.write("None")
         else:
-            symbols_str = "[]"
-        return (
-            f"Scope( \n"
-            f"{indent}parent={parent_str}, \n"
-            f"{indent}symbols={symbols_str}, \n"
-            f"{indent}cache={self.cache} \n"
-            f"{no_indent})"
+            self.parent.write_to(printer, indent_level + 1)
+        printer.write(f", \n{indent}symbols=")
+        # A SymbolSink only iterates over the symbols it has not streamed yet
+        printer.symbols(
+            self.symbols, indent_level + 1, getattr(self.symbols, "num_streamed", 0)
         )
+        printer.write(f", \n{indent}cache=[")
+        for i, sym in enumerate(self.cache.values()):
+            printer.write(f", {sym}" if i else str(sym))
+        printer.write(f"] \n{no_indent})")
 
 
-@dataclass
+@dataclass(slots=True)
 class ScopeContext:
     state: State
     scope: Scope
@@ -162,11 +294,15 @@ class ScopeContext:
     def __enter__(self):
         self.prev_scope = self.state.scope
         self.state.scope = self.scope
+        for callback in hooks.on_scope_open:
+            callback(self.state, self.scope)
 
     def __exit__(self, exc_type, exc_value, traceback):
         assert self.prev_scope is not None
         self.state.scope = self.prev_scope
         self.prev_scope = None
+        for callback in hooks.on_scope_close:
+            callback(self.state, self.scope)
 
 
 def stage[A](op: Op[A], ctx: SrcCtx | None = None) -> A:
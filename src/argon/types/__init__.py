@@ -3,4 +3,7 @@ import argon.types.function
 import argon.types.integer
 import argon.types.null
 import argon.types.struct
-import argon.types.custom_types.torch
+from argon.virtualization.type_mapper import register_lazy_types
+
+# The torch types are registered the first time a torch value or type is mapped
+register_lazy_types("torch", "argon.types.custom_types.torch")
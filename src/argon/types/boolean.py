@@ -1,4 +1,3 @@
-from typing import override
 import typing
 from argon.ref import Ref
 from argon.srcctx import SrcCtx
@@ -13,9 +12,7 @@ class Boolean(Ref[bool, "Boolean"]):
     The Boolean class represents a boolean value in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "Boolean":
-        return Boolean()
+    __slots__ = ()
 
     def __invert__(self) -> "Boolean":
         return stage(logical.Not[Boolean](self), ctx=SrcCtx.new(2))
@@ -1,4 +1,3 @@
-from typing import override
 import torch.nn as nn
 from torch import Tensor
 from argon.ref import Ref
@@ -13,7 +12,8 @@ This file contains the types for the torch library.
 - nn.ModuleList
 - Tensor
 
-Add `import argon.types.torch` to src/argon/types/__init__.py to use these types.
+This module is imported lazily by the type mappers the first time a torch value or type
+is mapped (see src/argon/types/__init__.py), so `import argon.types` does not import torch.
 """
 
 
@@ -22,9 +22,7 @@ class TorchTensor(Ref[Tensor, "TorchTensor"]):
     The TorchTensor class represents a tensor in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "TorchTensor":
-        return TorchTensor()
+    __slots__ = ()
 
 
 concrete_to_abstract[Tensor] = lambda x: TorchTensor().const(x)
@@ -35,9 +33,7 @@ class NNModuleList(Ref[nn.ModuleList, "NNModuleList"]):
     The NNModuleList class represents a list of nn.Module objects in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "NNModuleList":
-        return NNModuleList()
+    __slots__ = ()
 
     def __getitem__(self, index: Integer) -> "NNModule":
         """
@@ -74,9 +70,7 @@ class NNModule(Ref[nn.Module, "NNModule"]):
     The NNModule class represents a nn.Module object in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "NNModule":
-        return NNModule()
+    __slots__ = ()
 
     def __call__(self, *input) -> TorchTensor:
         from argon.node.custom_nodes.module_call import NNModuleCall
@@ -100,9 +94,7 @@ class IndexedNNModule(NNModule):
     instead of Index[NNModule].
     """
 
-    @override
-    def fresh(self) -> "IndexedNNModule":
-        return IndexedNNModule()
+    __slots__ = ()
 
     # The parent and index information would come from the Index operation
     # that created this IndexedNNModule. You'd need to access it via the
@@ -1,16 +1,25 @@
 import abc
 import dis
+import importlib
 import types
 from typing import get_args, override, Protocol
+import threading
 import typing
-import inspect
+import weakref
 
-import pydantic
 from argon.block import Block
+from argon.hooks import hooks
+from argon.profiler import profiled
 from argon.ref import Ref
 from argon.srcctx import SrcCtx
 from argon.state import State, stage
 from argon.virtualization.func import ArgonFunction
+from argon.virtualization.trace_cache import (
+    bind_defaults,
+    check_signature,
+    is_specializable_const,
+    signature_key,
+)
 from argon.virtualization.type_mapper import (
     concrete_to_abstract,
     concrete_to_bound,
@@ -31,6 +40,8 @@ class Function[RETURN_TP](Ref[FunctionWithVirt, "Function[RETURN_TP]"]):
     The Function class represents a function in the Argon language.
     """
 
+    __slots__ = ()
+
     @override
     def fresh(self) -> "Function[RETURN_TP]":  # type: ignore -- Pyright falsely detects F as an abstractproperty instead of type variable
         return Function[self.RETURN_TP]()
@@ -53,52 +64,151 @@ class Function[RETURN_TP](Ref[FunctionWithVirt, "Function[RETURN_TP]"]):
         return result
 
 
-def function_C_to_A(c: types.FunctionType) -> Function:
-    if not (hasattr(c, "virtualized") and isinstance(c.virtualized, ArgonFunction)):  # type: ignore -- Pyright complains about accessing virtualized
+# Functions called from virtualized code without being decorated are virtualized on their first
+# call. They are kept here, rather than written back into their module, so that every thread and
+# every call shares a single virtualized version with a single trace cache.
+_undecorated: weakref.WeakKeyDictionary[types.FunctionType, FunctionWithVirt] = (
+    weakref.WeakKeyDictionary()
+)
+_undecorated_lock = threading.Lock()
+
+
+def as_virtualized(c: types.FunctionType) -> FunctionWithVirt:
+    """Returns c if it was decorated with argon_function, or else its shared virtualized version."""
+    if hasattr(c, "virtualized") and isinstance(c.virtualized, ArgonFunction):  # type: ignore -- Pyright complains about accessing virtualized
+        return typing.cast(FunctionWithVirt, c)
+    c_with_virt = _undecorated.get(c)
+    if c_with_virt is None:
         from argon.virtualization.wrapper import argon_function
 
-        c_with_virt = argon_function()(c)
-        # Update the original function in its module's namespace
-        module = inspect.getmodule(c)
-        if module is not None:
-            setattr(module, c.__name__, c_with_virt)
-    else:
-        c_with_virt = typing.cast(FunctionWithVirt, c)
+        with _undecorated_lock:
+            c_with_virt = _undecorated.get(c)
+            if c_with_virt is None:
+                c_with_virt = _undecorated[c] = argon_function()(c)
+    return c_with_virt
+
+
+def virtualized_reference(
+    c_with_virt: typing.Optional[FunctionWithVirt],
+) -> typing.Optional[typing.Tuple[str, str]]:
+    """
+    Returns the module and qualified name c_with_virt can be imported from, which stands in for it
+    when the graph referencing it is pickled, or None if it is bound to an instance.
+    """
+    if c_with_virt is None or c_with_virt.virtualized.bound_instance is not None:
+        return None
+    original_func = c_with_virt.virtualized.original_func
+    return original_func.__module__, original_func.__qualname__
+
+
+def resolve_virtualized(
+    reference: typing.Optional[typing.Tuple[str, str]],
+) -> typing.Optional[FunctionWithVirt]:
+    """Imports the virtualized function a reference was made for, returning None if that fails."""
+    if reference is None:
+        return None
+    module_name, qualname = reference
+    try:
+        value = importlib.import_module(module_name)
+        for name in qualname.split("."):
+            value = getattr(value, name)
+    except (ImportError, AttributeError):
+        return None
+    if not isinstance(value, types.FunctionType):
+        return None
+    return as_virtualized(value)
+
+
+def bind_args(
+    c: types.FunctionType, args: typing.Sequence[Ref[typing.Any, typing.Any]]
+) -> typing.List[Ref[typing.Any, typing.Any]]:
+    """
+    Returns args followed by the abstract defaults of the parameters of c without an argument,
+    raising a TypeError unless they match the signature of c (see check_signature).
+    """
+    virtualized = as_virtualized(c).virtualized
+    defaults = bind_defaults(c.__name__, virtualized.get_signature(), args)
+    args = [*args, *(concrete_to_abstract(default) for default in defaults)]
+    check_signature(
+        c.__name__, virtualized.get_param_names(), virtualized.get_abstract_param_types(), args
+    )
+    return args
+
+
+def _function_ctx(c: types.FunctionType) -> SrcCtx:
+    return SrcCtx(
+        c.__code__.co_filename,
+        dis.Positions(lineno=c.__code__.co_firstlineno, col_offset=0),
+    )
+
 
-    if c_with_virt.virtualized.abstract_func is not None:
-        return c_with_virt.virtualized.abstract_func
+@profiled(
+    "function_C_to_A",
+    lambda c, args=None: c.__qualname__,
+    lambda c, args=None: _function_ctx(c),
+)
+def function_C_to_A(
+    c: types.FunctionType,
+    args: typing.Optional[typing.Sequence[Ref[typing.Any, typing.Any]]] = None,
+) -> Function:
+    """
+    Traces c into a Function specialized for the abstract types of args, or for the annotated
+    parameter types if args is None. Each specialization is only traced once per State.
+    """
+    c_with_virt = as_virtualized(c)
+
+    virtualized = c_with_virt.virtualized
+    param_names = virtualized.get_param_names()
+    if args is not None:
+        args = bind_args(c, args)
+    key = signature_key(
+        param_names, virtualized.get_abstract_param_types(), args, virtualized.const_params
+    )
+    state = State.get_current_state()
+    abstract_func = virtualized.traces.lookup(state, key)
+    if abstract_func is not None:
+        return abstract_func
 
-    annotated_concrete_return_type = c_with_virt.virtualized.get_return_type()
+    annotated_concrete_return_type = virtualized.get_return_type()
     annotated_abstract_return_type = concrete_to_abstract_type[
         annotated_concrete_return_type
     ]
-    name = c_with_virt.virtualized.get_function_name()
+    name = virtualized.get_function_name()
     body = Block[annotated_abstract_return_type]([], [], None)
 
     from argon.node.function_new import FunctionNew
 
-    c_with_virt.virtualized.abstract_func = stage(
+    abstract_func = stage(
         FunctionNew[Function[annotated_abstract_return_type]](
             name,
             [],
             body,
             c_with_virt,
         ),
-        ctx=SrcCtx(
-            c.__code__.co_filename,
-            dis.Positions(lineno=c.__code__.co_firstlineno, col_offset=0),
-        ),
+        ctx=_function_ctx(c),
     )
+    # Registered before tracing the body, so that recursive calls with the same signature reuse it
+    virtualized.traces.insert(state, key, abstract_func)
 
     # get the return type of a function by actually calling it
-    param_names = c_with_virt.virtualized.get_param_names()
-    scope_context = State.get_current_state().new_scope()
+    scope_context = state.new_scope()
     with scope_context:
-        def create_bound_arg(param_name: str) -> Ref[typing.Any, typing.Any]:
-            param_type = c_with_virt.virtualized.get_param_type(param_name)
-            return concrete_to_bound[param_type](param_name)
-        bound_args = [create_bound_arg(param_name) for param_name in param_names]
-        ret = c_with_virt.virtualized.call_transformed(*bound_args)
+        def create_bound_arg(param_name: str, arg: typing.Optional[Ref[typing.Any, typing.Any]]) -> Ref[typing.Any, typing.Any]:
+            if arg is None:
+                param_type = virtualized.get_param_type(param_name)
+                return concrete_to_bound[param_type](param_name)
+            return arg.bound(param_name)
+        if args is None:
+            bound_args = [create_bound_arg(param_name, None) for param_name in param_names]
+            call_args = bound_args
+        else:
+            bound_args = [create_bound_arg(param_name, arg) for param_name, arg in zip(param_names, args)]
+            # Constants of parameters the function is specialized on replace their bound variable
+            call_args = [
+                arg if param_name in virtualized.const_params and is_specializable_const(arg) else bound_arg
+                for param_name, arg, bound_arg in zip(param_names, args, bound_args)
+            ]
+        ret = virtualized.call_transformed(*call_args)
         ret = concrete_to_abstract(ret)
 
     # check that ret.C is the same as c_with_virt's return type
@@ -106,15 +216,14 @@ def function_C_to_A(c: types.FunctionType) -> Function:
         ret.A == annotated_abstract_return_type
     ), f"Function {c.__name__} was annotated with return type {annotated_concrete_return_type}, but the actual return type is {ret.C}"
 
-    name = c_with_virt.virtualized.get_function_name()
-
     body.inputs = scope_context.scope.inputs
     body.stms = scope_context.scope.symbols
     body.result = ret
+    hooks.blocks_created(body)
+
+    abstract_func.rhs.val.underlying.binds = bound_args  # type: ignore -- abstract_func was staged as a FunctionNew node
 
-    c_with_virt.virtualized.abstract_func.rhs.val.underlying.binds = bound_args
-  
-    return c_with_virt.virtualized.abstract_func
+    return abstract_func
 
 
 concrete_to_abstract[types.FunctionType] = function_C_to_A
@@ -130,5 +239,3 @@ def function_C_to_AT(func_tp: typing.Callable) -> typing.Type[Function]:
 
 
 concrete_to_abstract_type[types.FunctionType] = function_C_to_AT
-
-pydantic.dataclasses.rebuild_dataclass(ArgonFunction)
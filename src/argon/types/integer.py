@@ -1,4 +1,3 @@
-from typing import override
 import typing
 from argon.node import arith
 from argon.ref import Ref
@@ -13,9 +12,7 @@ class Integer(Ref[int, "Integer"]):
     The Integer class represents an integer value in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "Integer":
-        return Integer()
+    __slots__ = ()
 
     def __add__(self, other: "Integer") -> "Integer":
         other = typing.cast(Integer, concrete_to_abstract(other))
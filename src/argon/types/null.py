@@ -1,5 +1,4 @@
 from types import NoneType
-from typing import override
 from argon.ref import Ref
 from argon.virtualization.type_mapper import concrete_to_abstract, concrete_to_bound, concrete_to_abstract_type
 
@@ -9,9 +8,7 @@ class Null(Ref[NoneType, "Null"]):
     The Null class represents a value of None in the Argon language.
     """
 
-    @override
-    def fresh(self) -> "Null":
-        return Null()
+    __slots__ = ()
 
 
 concrete_to_abstract[NoneType] = lambda x: Null().const(x)
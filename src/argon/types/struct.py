@@ -16,6 +16,8 @@ class Struct[MEMBERS_TP](Ref[dict, "Struct[MEMBERS_TP]"]):
     mapping to the types of the values in the NamedTuple.
     """
 
+    __slots__ = ()
+
     @override
     def fresh(self) -> "Struct[MEMBERS_TP]":  # type: ignore -- Pyright falsely detects MEMBERS_TP as an abstractproperty instead of type variable
         return Struct[self.MEMBERS_TP]()
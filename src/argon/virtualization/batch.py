@@ -0,0 +1,65 @@
+import concurrent.futures
+import contextvars
+import multiprocessing.context
+import typing
+from dataclasses import dataclass
+
+from argon.state import State
+from argon.types.function import Function, function_C_to_A
+
+
+@dataclass(slots=True)
+class Trace:
+    """
+    The result of tracing an entry point into a State of its own.
+
+        func : Callable
+            The traced entry point.
+        state : State
+            The state the entry point was traced into.
+        function : Function
+            The traced function, which is specialized for its annotated parameter types.
+    """
+
+    func: typing.Callable
+    state: State
+    function: Function
+
+
+def trace(func: typing.Callable) -> Trace:
+    """Traces func, which may or may not be decorated with argon_function, into a new State."""
+    state = State()
+    with state:
+        function = function_C_to_A(func)  # type: ignore -- function_C_to_A accepts any virtualizable function
+    return Trace(func, state, function)
+
+
+def trace_concurrently(
+    funcs: typing.Iterable[typing.Callable], max_workers: typing.Optional[int] = None
+) -> typing.List[Trace]:
+    """
+    Traces each of funcs into a State of its own using a pool of threads, returning the traces in
+    the order of funcs. Every entry point runs in a copy of the caller's context, so settings such
+    as the SrcCtx capture mode carry over, while the state being traced into stays per thread.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, trace, func) for func in funcs
+        ]
+        return [future.result() for future in futures]
+
+
+def trace_in_processes(
+    funcs: typing.Iterable[typing.Callable],
+    max_workers: typing.Optional[int] = None,
+    mp_context: typing.Optional[multiprocessing.context.BaseContext] = None,
+) -> typing.List[Trace]:
+    """
+    Traces each of funcs into a State of its own using a pool of processes, returning the traces
+    in the order of funcs. The entry points are sent to the workers by reference, so they must be
+    importable from their module, and the traced graphs are pickled back to the caller. Functions
+    referenced by the graphs (see FunctionNew.virtualized) are imported again in the caller, or
+    are None if they cannot be imported, e.g. because they were defined in another function.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers, mp_context) as pool:
+        return list(pool.map(trace, funcs))
@@ -0,0 +1,114 @@
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import marshal
+import os
+import pathlib
+import sys
+import threading
+import types
+import typing
+
+
+# Written before the key at the start of every cache file
+_MAGIC = b"ARGN\x01"
+
+
+@functools.cache
+def transformer_version() -> str:
+    """
+    Identifies the transformation applied by argon_function, i.e. the argon version and the
+    source of the virtualizer, so that cached code is not reused after either changes.
+    """
+    try:
+        version = importlib.metadata.version("argon")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    digest = hashlib.sha256(version.encode())
+    virtualization_dir = pathlib.Path(__file__).parent
+    for path in sorted(virtualization_dir.glob("virtualizer/*.py")) + [
+        virtualization_dir / "wrapper.py"
+    ]:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# This class is used to persist the code objects compiled by argon_function, similarly to
+# __pycache__, so that other processes can skip the AST transformation and compilation. The
+# code of each function is stored next to the bytecode of its module, e.g. in
+# __pycache__/module.cpython-312.argon.MyClass.my_method.pyc, and is only reused when the
+# source file, the transformation flags, the argon version and the Python version all match.
+class _CodeCache:
+    def __init__(self):
+        self.enabled = not os.environ.get("ARGON_NO_CODE_CACHE")
+        # How many code objects were loaded from or had to be compiled instead of loaded from
+        # the cache, for debugging
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        source_digest: str, qualname: str, flags: typing.Tuple[bool, ...]
+    ) -> bytes:
+        return hashlib.sha256(
+            repr(
+                (
+                    transformer_version(),
+                    sys.implementation.cache_tag,
+                    source_digest,
+                    qualname,
+                    flags,
+                )
+            ).encode()
+        ).digest()
+
+    @staticmethod
+    def cache_path(src: str, qualname: str) -> typing.Optional[str]:
+        try:
+            # Honors sys.pycache_prefix, like the bytecode cache of the module itself
+            pyc = importlib.util.cache_from_source(src)
+        except (NotImplementedError, ValueError):
+            return None
+        return f"{pyc.removesuffix('.pyc')}.argon.{qualname}.pyc"
+
+    def load(self, src: str, qualname: str, key: bytes) -> typing.Optional[types.CodeType]:
+        """Returns the cached code of the function qualname in src, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self.cache_path(src, qualname)
+        code = None
+        if path is not None:
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+                header = _MAGIC + key
+                if data.startswith(header):
+                    code = marshal.loads(data[len(header) :])
+            except (OSError, EOFError, ValueError, TypeError):
+                code = None
+        if isinstance(code, types.CodeType):
+            self.hits += 1
+            return code
+        self.misses += 1
+        return None
+
+    def store(self, src: str, qualname: str, key: bytes, code: types.CodeType) -> None:
+        if not self.enabled or sys.dont_write_bytecode:
+            return
+        path = self.cache_path(src, qualname)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so that concurrent readers never see a partial file
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(_MAGIC + key + marshal.dumps(code))
+            os.replace(temp_path, path)
+        except (OSError, ValueError):
+            # Like the bytecode cache, failing to write the cache is not an error
+            pass
+
+
+code_cache = _CodeCache()
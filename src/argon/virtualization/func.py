@@ -1,44 +1,139 @@
+import dataclasses
+import inspect
+import threading
 import typing
-import pydantic
-from pydantic.dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import argon
+from argon.virtualization.trace_cache import TraceCache
 
+_virtualization_lock = threading.RLock()
 
-@dataclass(config=pydantic.ConfigDict(arbitrary_types_allowed=True))
+
+@dataclass
 class ArgonFunction:
     original_func: typing.Callable
-    transformed_func: typing.Callable
-    return_type: typing.Type | typing.Callable
-    param_types: typing.Dict[str, typing.Type | typing.Callable]
-    abstract_func: typing.Optional["Function"]
-    bound_instance: typing.Any = None  # If set, this is a bound method
+    # These are None until virtualizer has run for functions decorated with lazy=True
+    transformed_func: typing.Optional[typing.Callable]
+    return_type: typing.Optional[typing.Type | typing.Callable]
+    param_types: typing.Optional[typing.Dict[str, typing.Type | typing.Callable]]
+    # If set, this is a bound method, and this returns the instance it is bound to, see bind()
+    instance_ref: typing.Optional[typing.Callable[[], typing.Any]] = field(
+        default=None, repr=False
+    )
+    # The parameters whose constant arguments are part of the specialization key, so that the
+    # function is traced separately for each of their values
+    const_params: typing.Tuple[str, ...] = ()
+    # The traced Function of each specialization, see function_C_to_A
+    traces: TraceCache = field(default_factory=TraceCache, repr=False)
+    # If set, fills in the fields above the first time they are needed
+    virtualizer: typing.Optional[typing.Callable[["ArgonFunction"], None]] = None
+    # The abstract types of the parameters, computed on the first call
+    abstract_param_types: typing.Optional[typing.List[typing.Any]] = field(
+        default=None, repr=False
+    )
+    # The signature of the original function, computed on the first call, see get_signature()
+    signature: typing.Optional[inspect.Signature] = field(default=None, repr=False)
 
     @property
     def argon(self):
         return argon
 
+    @property
+    def bound_instance(self) -> typing.Any:
+        """The instance this function is bound to, or None if it is not a bound method."""
+        instance_ref = self.instance_ref
+        return None if instance_ref is None else instance_ref()
+
     def call_original(self, *args, **kwargs):
-        if self.bound_instance is not None:
-            return self.original_func(self.bound_instance, *args, **kwargs)
+        instance = self.bound_instance
+        if instance is not None:
+            return self.original_func(instance, *args, **kwargs)
         return self.original_func(*args, **kwargs)
 
+    def ensure_virtualized(self) -> None:
+        """Runs the deferred virtualization of a lazily decorated function, if it has not run yet."""
+        if self.virtualizer is None:
+            return
+        # Virtualizing executes the transformed code in the function's module, which must not
+        # interleave with another virtualization
+        with _virtualization_lock:
+            virtualizer = self.virtualizer
+            if virtualizer is not None:
+                virtualizer(self)
+                self.virtualizer = None
+
     def call_transformed(self, *args, **kwargs):
-        if self.bound_instance is not None:
-            return self.transformed_func(self.bound_instance, *args, **kwargs, __________argon=self)
-        return self.transformed_func(*args, **kwargs, __________argon=self)
+        self.ensure_virtualized()
+        instance = self.bound_instance
+        if instance is not None:
+            return self.transformed_func(instance, *args, **kwargs, __________argon=self)  # type: ignore -- set by ensure_virtualized()
+        return self.transformed_func(*args, **kwargs, __________argon=self)  # type: ignore -- set by ensure_virtualized()
 
     get_function_name = lambda self: self.original_func.__name__
 
     def get_param_names(self) -> list[str]:
-        return list(self.param_types.keys())
+        self.ensure_virtualized()
+        param_names = list(self.param_types.keys())  # type: ignore -- set by ensure_virtualized()
+        # The instance of a bound method is passed implicitly
+        return param_names[1:] if self.bound_instance is not None else param_names
 
     def get_param_type(self, param_name: str) -> typing.Type | typing.Callable:
-        return self.param_types[param_name]
+        self.ensure_virtualized()
+        return self.param_types[param_name]  # type: ignore -- set by ensure_virtualized()
+
+    def get_abstract_param_types(self) -> typing.List[typing.Any]:
+        """The abstract types of the parameters returned by get_param_names, in the same order."""
+        if self.abstract_param_types is None:
+            from argon.virtualization.type_mapper import concrete_to_abstract_type
+
+            self.abstract_param_types = [
+                concrete_to_abstract_type[self.get_param_type(param_name)]
+                for param_name in self.get_param_names()
+            ]
+        return self.abstract_param_types
+
+    def get_signature(self) -> inspect.Signature:
+        """The signature of the original function, without the instance of a bound method."""
+        if self.signature is None:
+            signature = inspect.signature(self.original_func)
+            if self.bound_instance is not None:
+                signature = signature.replace(
+                    parameters=list(signature.parameters.values())[1:]
+                )
+            self.signature = signature
+        return self.signature
 
     def get_return_type(self) -> typing.Type | typing.Callable:
-        return self.return_type
+        self.ensure_virtualized()
+        return self.return_type  # type: ignore -- set by ensure_virtualized()
+
+    def bind(
+        self,
+        instance,
+        traces: typing.Optional[TraceCache] = None,
+        instance_ref: typing.Optional[typing.Callable[[], typing.Any]] = None,
+    ) -> "ArgonFunction":
+        """
+        Returns a copy of this ArgonFunction bound to the given instance, which uses traces (or a
+        new trace cache) and shares the transformed function, which is virtualized at most once.
+        The copy references the instance strongly, unless a weak reference to it is given as
+        instance_ref, so that the copy can be cached for as long as the instance is alive.
+        """
+        bound = dataclasses.replace(
+            self,
+            instance_ref=instance_ref if instance_ref is not None else (lambda: instance),
+            traces=traces if traces is not None else TraceCache(),
+            virtualizer=None,
+            abstract_param_types=None,
+            signature=None,
+        )
+        if self.virtualizer is not None:
+            bound.virtualizer = self._virtualize_bound
+        return bound
 
-    def bind(self, instance) -> None:
-        """Bind this ArgonFunction to the given instance and return self."""
-        self.bound_instance = instance
+    def _virtualize_bound(self, bound: "ArgonFunction") -> None:
+        self.ensure_virtualized()
+        bound.transformed_func = self.transformed_func
+        bound.return_type = self.return_type
+        bound.param_types = self.param_types
@@ -0,0 +1,75 @@
+"""
+Pre-virtualizes every @argon_function in the given packages or modules by importing them and
+virtualizing the functions decorated with lazy=True, which fills the on-disk code cache so that
+later processes skip the AST transformation:
+
+    python -m argon.virtualization.precompile my_package [my_other_package.module ...]
+"""
+
+import importlib
+import pkgutil
+import sys
+import traceback
+import typing
+
+from argon.virtualization.code_cache import code_cache
+from argon.virtualization.func import ArgonFunction
+
+
+def iter_module_names(name: str) -> typing.Iterator[str]:
+    """Yields name and, if it is a package, the names of all of its submodules."""
+    module = importlib.import_module(name)
+    yield name
+    if hasattr(module, "__path__"):
+        for info in pkgutil.walk_packages(module.__path__, prefix=f"{name}."):
+            yield info.name
+
+
+def virtualize_module(module) -> None:
+    """Virtualizes the lazily decorated functions and methods defined in module."""
+    namespaces = [vars(module)]
+    namespaces += [
+        vars(value)
+        for value in vars(module).values()
+        if isinstance(value, type) and value.__module__ == module.__name__
+    ]
+    for namespace in namespaces:
+        for value in list(namespace.values()):
+            virtualized = getattr(value, "virtualized", None)
+            if isinstance(virtualized, ArgonFunction):
+                virtualized.ensure_virtualized()
+
+
+def precompile(names: typing.Iterable[str]) -> typing.List[str]:
+    """Imports the given packages and modules, returning the names of those that failed."""
+    failed = []
+    for name in names:
+        try:
+            for module_name in iter_module_names(name):
+                try:
+                    virtualize_module(importlib.import_module(module_name))
+                except Exception:
+                    traceback.print_exc()
+                    failed.append(module_name)
+        except Exception:
+            traceback.print_exc()
+            failed.append(name)
+    return failed
+
+
+def main(argv: typing.List[str]) -> int:
+    if len(argv) < 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    if sys.dont_write_bytecode:
+        print("warning: the code cache is not written while sys.dont_write_bytecode is set", file=sys.stderr)
+    failed = precompile(argv[1:])
+    print(
+        f"{code_cache.misses} functions virtualized, {code_cache.hits} already cached"
+        + (f", failed to import: {', '.join(failed)}" if failed else "")
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,114 @@
+import ast
+import hashlib
+import os
+import typing
+from dataclasses import dataclass, field
+
+
+def _index_functions(
+    nodes: typing.List[ast.stmt],
+    prefix: str,
+    functions: typing.Dict[str, ast.FunctionDef],
+) -> None:
+    for node in nodes:
+        if isinstance(node, ast.FunctionDef):
+            # Python binds a name to its last definition, but the first one is kept for
+            # compatibility with the old lookup, which walked the AST of the file
+            functions.setdefault(prefix + node.name, node)
+        elif isinstance(node, ast.ClassDef):
+            _index_functions(node.body, f"{prefix}{node.name}.", functions)
+
+
+@dataclass(slots=True)
+class ParsedFile:
+    """
+    The source of a file, which is parsed into an AST together with an index of the
+    functions it defines the first time either of them is accessed.
+
+        mtime_ns : int
+            The modification time of the file when it was read.
+        size : int
+            The size of the file when it was read.
+        source : str
+            The contents of the file.
+        digest : str
+            The SHA-256 digest of the contents of the file.
+        tree : ast.Module
+            The parsed module. It is shared by every lookup and must not be mutated.
+        functions : Dict[str, ast.FunctionDef]
+            Maps the qualified name of each top-level function or (nested) method to its node.
+    """
+
+    mtime_ns: int
+    size: int
+    source: str
+    digest: str
+    _tree: typing.Optional[ast.Module] = field(default=None, init=False)
+    _functions: typing.Dict[str, ast.FunctionDef] = field(
+        default_factory=dict, init=False
+    )
+
+    def parse(self) -> bool:
+        """Parses the source if it has not been parsed yet, returning whether it was parsed."""
+        if self._tree is not None:
+            return False
+        self._tree = ast.parse(self.source)
+        _index_functions(self._tree.body, "", self._functions)
+        return True
+
+    @property
+    def tree(self) -> ast.Module:
+        self.parse()
+        return self._tree  # type: ignore -- parse() has set _tree
+
+    @property
+    def functions(self) -> typing.Dict[str, ast.FunctionDef]:
+        self.parse()
+        return self._functions
+
+
+# This class is used to map a source file to its parsed AST, so that decorating many functions
+# in the same file only parses it once. Entries are invalidated when the file's modification
+# time or size changes.
+class _SourceCache:
+    def __init__(self):
+        self.files: typing.Dict[str, ParsedFile] = {}
+        # How many times a file had to be parsed, for debugging
+        self.parses = 0
+
+    def __getitem__(self, path: str) -> ParsedFile:
+        stat = os.stat(path)
+        parsed = self.files.get(path)
+        if (
+            parsed is not None
+            and parsed.mtime_ns == stat.st_mtime_ns
+            and parsed.size == stat.st_size
+        ):
+            return parsed
+
+        with open(path, "r") as file:
+            source = file.read()
+        parsed = self.files[path] = ParsedFile(
+            stat.st_mtime_ns,
+            stat.st_size,
+            source,
+            hashlib.sha256(source.encode()).hexdigest(),
+        )
+        return parsed
+
+    def find_function(self, path: str, qualname: str) -> typing.Optional[ast.FunctionDef]:
+        """
+        Returns the node of the function with the given qualified name (e.g. "MyClass.my_method"
+        or "my_function") in the file at path, or None if it is not defined there.
+        """
+        parsed = self[path]
+        if parsed.parse():
+            self.parses += 1
+        return parsed.functions.get(qualname)
+
+    def clear(self) -> None:
+        self.files.clear()
+        self.parses = 0
+
+
+source_cache = _SourceCache()
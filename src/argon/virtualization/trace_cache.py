@@ -0,0 +1,137 @@
+import inspect
+import typing
+import weakref
+
+from argon.base import _freeze_type_arg
+from argon.ref import Exp
+
+if typing.TYPE_CHECKING:
+    from argon.state import State
+    from argon.types.function import Function
+
+
+def _type_key(tp: typing.Any) -> typing.Hashable:
+    try:
+        hash(tp)
+        return tp
+    except TypeError:
+        # e.g. Struct[{"a": Integer}]
+        return _freeze_type_arg(tp)
+
+
+def bind_defaults(
+    function_name: str,
+    signature: inspect.Signature,
+    args: typing.Sequence[Exp[typing.Any, typing.Any]],
+) -> typing.List[typing.Any]:
+    """
+    Binds args to the parameters of signature and returns the (concrete) defaults of the
+    parameters left without an argument, raising a TypeError if args cannot be bound.
+    """
+    parameters = signature.parameters
+    if len(args) == len(parameters):
+        return []
+    try:
+        bound = signature.bind(*args)
+    except TypeError:
+        required = sum(p.default is inspect.Parameter.empty for p in parameters.values())
+        if required == len(parameters):
+            expected = f"{required} argument{'' if required == 1 else 's'}"
+        else:
+            expected = f"from {required} to {len(parameters)} arguments"
+        given = f"{len(args)} {'was' if len(args) == 1 else 'were'} given"
+        raise TypeError(f"{function_name}() takes {expected} but {given}") from None
+    bound.apply_defaults()
+    return list(bound.arguments.values())[len(args) :]
+
+
+def check_signature(
+    function_name: str,
+    param_names: typing.Sequence[str],
+    param_types: typing.Sequence[typing.Any],
+    args: typing.Sequence[Exp[typing.Any, typing.Any]],
+) -> None:
+    """
+    Raises a TypeError unless there is one argument per parameter, including the defaults filled in
+    by bind_defaults, and each argument has the abstract type of its parameter (see
+    ArgonFunction.get_abstract_param_types), so that a call which does not match the signature
+    fails where it is made rather than while tracing.
+    """
+    if len(args) != len(param_names):
+        expected = f"{len(param_names)} argument{'' if len(param_names) == 1 else 's'}"
+        given = f"{len(args)} {'was' if len(args) == 1 else 'were'} given"
+        raise TypeError(f"{function_name}() takes {expected} but {given}")
+    for name, param_type, arg in zip(param_names, param_types, args):
+        if arg.A is not param_type and _type_key(arg.A) != _type_key(param_type):
+            raise TypeError(
+                f"Argument {name} of {function_name}() must be {param_type().tp_name}, not {arg.tp_name}"
+            )
+
+
+def signature_key(
+    param_names: typing.Sequence[str],
+    param_types: typing.Sequence[typing.Any],
+    args: typing.Optional[typing.Sequence[Exp[typing.Any, typing.Any]]] = None,
+    const_params: typing.Collection[str] = (),
+) -> typing.Tuple[typing.Hashable, ...]:
+    """
+    Returns the key of the specialization of a function for args, which were checked against its
+    signature (see check_signature). It consists of the abstract type of every parameter and, for
+    the parameters in const_params receiving a constant, its value. If args is None, this is the
+    key of the specialization traced from the parameter annotations, which is also the one of any
+    args without such constants.
+    """
+    key = []
+    for i, (name, param_type) in enumerate(zip(param_names, param_types)):
+        arg = None if args is None else args[i]
+        if arg is not None and name in const_params and is_specializable_const(arg):
+            key.append((_type_key(param_type), arg.rhs.val.value))  # type: ignore -- is_specializable_const() checked that arg is a Const
+        else:
+            key.append(_type_key(param_type))
+    return tuple(key)
+
+
+def is_specializable_const(arg: Exp[typing.Any, typing.Any]) -> bool:
+    """Returns whether arg is a constant whose value can be part of a specialization key."""
+    if not arg.is_const():
+        return False
+    try:
+        hash(arg.rhs.val.value)  # type: ignore -- arg is a Const
+    except TypeError:
+        return False
+    return True
+
+
+# This class is used to map the signature a function was called with to the Function traced for
+# it, so that calls with a signature that has been traced reuse the trace and calls with a new
+# signature trace a new specialization. Traces are kept per State, since the symbols of one State
+# must never be reused in another, and are dropped together with their State.
+class TraceCache:
+    def __init__(self):
+        self.traces: weakref.WeakKeyDictionary[
+            "State", typing.Dict[typing.Hashable, "Function"]
+        ] = weakref.WeakKeyDictionary()
+        # How many lookups found or did not find a trace, for debugging
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, state: "State", key: typing.Hashable) -> typing.Optional["Function"]:
+        traces = self.traces.get(state)
+        trace = traces.get(key) if traces is not None else None
+        if trace is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return trace
+
+    def insert(self, state: "State", key: typing.Hashable, trace: "Function") -> None:
+        self.traces.setdefault(state, {})[key] = trace
+
+    def specializations(self, state: "State") -> typing.Dict[typing.Hashable, "Function"]:
+        """Returns the traces made in state, keyed by their signature."""
+        return dict(self.traces.get(state, {}))
+
+    def clear(self) -> None:
+        self.traces.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,9 +1,37 @@
 from collections.abc import Callable
+import importlib
 import types
 import typing
+from argon.profiler import profiled
 from argon.ref import Ref
 
 
+# Maps the top-level package of a concrete type to the module registering its abstract
+# types. The module is only imported the first time a type from that package is mapped,
+# so that optional integrations such as torch don't slow down importing argon.
+_lazy_type_modules: typing.Dict[str, str] = {}
+
+
+def register_lazy_types(package: str, module: str) -> None:
+    """Registers module to be imported on the first lookup of a type defined in package."""
+    _lazy_type_modules[package] = module
+
+
+def _load_lazy_types(tp) -> bool:
+    # Returns whether a module registering abstract types for tp was imported
+    if not _lazy_type_modules or not isinstance(tp, type):
+        return False
+    for base in tp.__mro__:
+        package = base.__module__.partition(".")[0]
+        module = _lazy_type_modules.get(package)
+        if module is not None:
+            importlib.import_module(module)
+            # Only unregistered once imported, so that a failed import is retried by the next lookup
+            del _lazy_type_modules[package]
+            return True
+    return False
+
+
 # This class is used to map an instance of a concrete type 
 # to an instance of its corresponding abstract type
 class _CToA:
@@ -13,11 +41,14 @@ class _CToA:
     def __setitem__(self, tp_c, tp_a_initializer: typing.Callable) -> None:
         self.C_to_A_map[tp_c] = tp_a_initializer
 
+    @profiled("concrete_to_abstract", lambda self, c: type(c).__name__)
     def __call__(self, c) -> Ref[typing.Any, typing.Any]:
         if type(c) in self.C_to_A_map:
             return self.C_to_A_map[type(c)](c)
         elif isinstance(c, Ref):
             return c
+        elif _load_lazy_types(type(c)):
+            return self(c)
         else:
             raise ValueError(f"Cannot convert {c} to abstract type")
 
@@ -41,6 +72,8 @@ class _CToB:
             raise ValueError(f"Cannot convert {tp_c} to bound variable, use typing.Callable and specify the parameter and return types")
         elif tp_c in self.C_to_B_map:
             return self.C_to_B_map[tp_c]
+        elif _load_lazy_types(tp_c):
+            return self[tp_c]
         else:
             raise ValueError(f"Cannot convert {tp_c} to bound variable")
 
@@ -62,6 +95,8 @@ class _CToAT:
             raise ValueError(f"Cannot convert {tp_c} to abstract type, use typing.Callable and specify the parameter and return types")
         elif tp_c in self.C_to_AT_map:
             return self.C_to_AT_map[tp_c]
+        elif _load_lazy_types(tp_c):
+            return self[tp_c]
         else:
             raise ValueError(f"Cannot convert {tp_c} to abstract type")
 
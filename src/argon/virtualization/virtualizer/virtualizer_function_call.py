@@ -4,12 +4,13 @@ import types
 import typing
 
 from argon.node.function_call import FunctionCall
+from argon.profiler import function_name, profiled
 from argon.ref import Ref
 from argon.srcctx import SrcCtx
 from argon.state import stage
 from argon.virtualization.virtualizer.virtualizer_base import TransformerBase
 from argon.virtualization.type_mapper import concrete_to_abstract
-from argon.types.function import Function
+from argon.types.function import Function, bind_args, function_C_to_A
 
 
 def white_list(func: typing.Any) -> bool:
@@ -20,18 +21,26 @@ def white_list(func: typing.Any) -> bool:
     return func in whitelisted_functions
 
 
+@profiled("stage_function_call", lambda func, args: function_name(func))
 def stage_function_call(
     func: typing.Any, args: typing.List[typing.Any]
 ) -> Ref[typing.Any, typing.Any]:
-    abstract_func = concrete_to_abstract(func)
     abstract_args = [concrete_to_abstract(arg) for arg in args]
+    if isinstance(func, types.FunctionType):
+        # Functions are traced specialized for the abstract types of their arguments, which
+        # include the defaults of the parameters without an argument
+        abstract_args = bind_args(func, abstract_args)
+        abstract_func = function_C_to_A(func, abstract_args)
+    else:
+        abstract_func = concrete_to_abstract(func)
 
     func_type_origin = typing.get_origin(abstract_func.A) or abstract_func.A
     if func_type_origin is Function:
         # TODO: check if arg types match the function signature
         return stage(
             FunctionCall[abstract_func.RETURN_TP](abstract_func, abstract_args),
-            ctx=SrcCtx.new(2),
+            # Depth 3 skips the frame of the profiled wrapper
+            ctx=SrcCtx.new(3),
         )
     else:
         if not hasattr(func, "__call__"):
@@ -52,6 +61,16 @@ class TransformerFunctionCall(TransformerBase):
         self.generic_visit(node)
         self.concrete_to_abstract_flag = prev_concrete_to_abstract_flag
 
+        # Keep a callee referenced by name concrete, so that stage_function_call can trace a
+        # function specialized for the abstract types of its arguments
+        if (
+            isinstance(original_node_func, ast.Name)
+            and isinstance(node.func, ast.Call)
+            and isinstance(node.func.func, ast.Attribute)
+            and node.func.func.attr == "concrete_to_abstract"
+        ):
+            node.func = node.func.args[0]
+
         # Do not stage the function call if the flag is set to False
         if not self.calls:
             if not self.concrete_to_abstract_flag:
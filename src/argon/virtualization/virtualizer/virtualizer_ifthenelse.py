@@ -3,9 +3,11 @@ import dis
 import typing
 
 from argon.block import Block
+from argon.hooks import hooks
 from argon.node.control import IfThenElse
 from argon.node.phi import Phi
 from argon.node.undefined import Undefined
+from argon.profiler import profiled
 from argon.ref import Exp, Ref
 from argon.srcctx import SrcCtx
 from argon.state import ScopeContext, State, stage
@@ -31,6 +33,7 @@ def stage_phi(
     return stage(Phi[a.tp.A](cond, a, b), ctx=SrcCtx.new(2))
 
 
+@profiled("stage_if_exp_with_scopes", "IfThenElse")
 def stage_if_exp_with_scopes(
     condLambda: typing.Callable[[], Exp[typing.Any, typing.Any]],
     thenBodyLambda: typing.Callable[[], Exp[typing.Any, typing.Any]],
@@ -61,12 +64,21 @@ def stage_if_exp_with_scopes(
     elseBlk = Block[thenBody.tp.A](
         else_scope_context.scope.inputs, else_scope_context.scope.symbols, elseBody
     )
+    hooks.blocks_created(condBlk, thenBlk, elseBlk)
 
+    # Depth 3 skips the frame of the profiled wrapper
     return stage(
-        IfThenElse[thenBody.tp.A](condBlk, thenBlk, elseBlk), ctx=SrcCtx.new(2)
+        IfThenElse[thenBody.tp.A](condBlk, thenBlk, elseBlk), ctx=SrcCtx.new(3)
     )
 
 
+@profiled(
+    "stage_if",
+    "IfThenElse",
+    lambda file_name, lineno, col_offset, *args: SrcCtx(
+        file_name, dis.Positions(lineno=lineno, col_offset=col_offset)
+    ),
+)
 def stage_if(
     file_name: str,
     lineno: int,
@@ -89,6 +101,7 @@ def stage_if(
         else_scope_context.scope.symbols,
         Null().const(None),
     )
+    hooks.blocks_created(condBlk, thenBlk, elseBlk)
     return stage(
         IfThenElse[Null](condBlk, thenBlk, elseBlk),
         ctx=SrcCtx(file_name, dis.Positions(lineno=lineno, col_offset=col_offset)),
@@ -4,7 +4,9 @@ import dis
 import typing
 
 from argon.block import Block
+from argon.hooks import hooks
 from argon.node.control import Loop
+from argon.profiler import profiled
 from argon.ref import Exp, Ref
 from argon.srcctx import SrcCtx
 from argon.state import ScopeContext, stage
@@ -14,6 +16,13 @@ from argon.types.struct import Struct
 from argon.virtualization.virtualizer.virtualizer_base import TransformerBase
 
 
+@profiled(
+    "stage_loop",
+    "Loop",
+    lambda file_name, lineno, col_offset, *args: SrcCtx(
+        file_name, dis.Positions(lineno=lineno, col_offset=col_offset)
+    ),
+)
 def stage_loop(
     file_name: str,
     lineno: int,
@@ -33,6 +42,7 @@ def stage_loop(
         loop_scope_context.scope.symbols,
         Null().const(None),
     )
+    hooks.blocks_created(condBlk, bodyBlk)
     output_types = {field: getattr(outputs, field).A for field in outputs._fields}
     return stage(
         Loop[Struct[output_types]](values, binds, condBlk, bodyBlk, outputs),
@@ -1,17 +1,157 @@
+import copy
 import functools
 import inspect
 import ast
+import types
 import typing
+import weakref
 
 from argon.types.function import FunctionWithVirt
+from argon.virtualization.code_cache import code_cache
 from argon.virtualization.func import ArgonFunction
+from argon.virtualization.source_cache import source_cache
 from argon.virtualization.virtualizer.virtualizer_top import (
     TransformerTop as Transformer,
 )
 
 
+def _transform_function(func, src, calls, ifs, if_exps, loops) -> types.CodeType:
+    """Applies the virtualizing AST transformation to func and compiles the result."""
+    # Use qualified name to find the function (handles class methods)
+    # e.g., "MyClass.my_method" or just "my_function"
+    # The parsed file is cached and shared with the other functions defined in it, so the
+    # function is copied before its decorators are removed and it is transformed.
+    func_src = source_cache.find_function(src, func.__qualname__)
+    if func_src is not None:
+        func_src = copy.deepcopy(func_src)
+
+    # Remove the decorators from the AST, because the modified function will
+    # be passed to them anyway and we don't want them to be called twice.
+    if func_src is not None:
+        # Remove argon_function decorators
+        func_src.decorator_list = [
+            dec
+            for dec in func_src.decorator_list
+            if not (
+                (
+                    isinstance(dec, ast.Call)
+                    and isinstance(dec.func, ast.Name)
+                    and dec.func.id == "argon_function"
+                )
+            )
+        ]
+        func_src.args.kw_defaults.append(ast.Constant(value=None))
+        func_src.args.kwonlyargs.append(
+            ast.arg(arg="__________argon", annotation=None)
+        )
+
+    if func_src is None:
+        raise ValueError(f"Unable to virtualize {func.__qualname__} in file {src}")
+
+    # Apply the AST transformation
+    # TODO: Add the transformation flags here too!
+    transformed = Transformer(src, calls, ifs, if_exps, loops).visit(func_src)
+    transformed = ast.fix_missing_locations(transformed)
+
+    # Create a new AST containing only the transformed function
+    transformed_module = ast.Module(body=[transformed], type_ignores=[])
+
+    # Compile the transformed AST
+    return compile(transformed_module, filename=func.__code__.co_filename, mode="exec")
+
+
+# This class is used to map each instance a virtualized method is bound to to the ArgonFunction
+# bound to that instance, which keeps its traces, for as long as the instance is alive
+class _BoundFunctions:
+    def __init__(self, unbound: ArgonFunction):
+        self.unbound = unbound
+        # Maps the id of each instance to a weak reference to it and its bound function, which
+        # references the instance through the same weak reference, so that the instance is not
+        # kept alive by its entry
+        self.functions: typing.Dict[int, typing.Tuple[weakref.ref, ArgonFunction]] = {}
+
+    def __getitem__(self, instance) -> ArgonFunction:
+        key = id(instance)
+        entry = self.functions.get(key)
+        if entry is not None and entry[0]() is instance:
+            return entry[1]
+        try:
+            # The entry is removed when the instance is collected, before its id can be reused
+            ref = weakref.ref(instance, lambda _: self.functions.pop(key, None))
+        except TypeError:
+            # The instance cannot be weakly referenced, so its bound function is not kept
+            return self.unbound.bind(instance)
+        bound = self.unbound.bind(instance, instance_ref=ref)
+        self.functions[key] = (ref, bound)
+        return bound
+
+
+# For methods, a minimal descriptor class
+# https://docs.python.org/3/reference/datamodel.html#implementing-descriptors
+class MethodDescriptor:
+    """
+    Binds a virtualized method to the instance it is accessed on. Like a Python method, every
+    access creates a lightweight BoundMethod, without mutating the shared ArgonFunction, while the
+    ArgonFunction bound to each instance, with the traces of that instance, is created once and
+    kept for as long as the instance is alive.
+    """
+
+    def __init__(self, wrapper, virtualized_func: ArgonFunction):
+        functools.update_wrapper(self, wrapper)
+        # Accessing the method on the class returns the unbound wrapper, which takes the
+        # instance as its first argument
+        self.wrapper = wrapper
+        self.virtualized = virtualized_func
+        self.original_func = virtualized_func.original_func
+        self.bound_functions = _BoundFunctions(virtualized_func)
+        # Binding happens on every access, so it must stay as cheap as creating a Python method:
+        # the bound methods of this descriptor are partials of a subclass that knows the method
+        self.bound_method_type = type(
+            "BoundMethod",
+            (BoundMethod,),
+            {
+                "__slots__": (),
+                "unbound": virtualized_func,
+                "bound_functions": self.bound_functions,
+            },
+        )
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.wrapper
+        return self.bound_method_type(self.original_func, instance)
+
+
+class BoundMethod(functools.partial):
+    """
+    A virtualized method bound to an instance, see MethodDescriptor. Calling it calls the original
+    method, while its bound ArgonFunction is only looked up when virtualized is accessed.
+    """
+
+    __slots__ = ()
+    unbound: ArgonFunction
+    bound_functions: _BoundFunctions
+
+    @property
+    def __self__(self):
+        return self.args[0]
+
+    @property
+    def virtualized(self) -> ArgonFunction:
+        return self.bound_functions[self.args[0]]
+
+    def __getattr__(self, name: str):
+        # e.g. __name__ and __qualname__, like a Python method
+        return getattr(self.unbound.original_func, name)
+
+    def __repr__(self) -> str:
+        return f"<bound virtualized method {self.unbound.original_func.__qualname__} of {self.args[0]!r}>"
+
+
 # TODO: After implementing more transformations, add relevant flags to the decorator to enable/disable them
-def argon_function(calls=True, ifs=True, if_exps=True, loops=True):
+def argon_function(
+    calls=True, ifs=True, if_exps=True, loops=True, lazy=False, const_params=()
+):
     """
     This decorator is used to virtualize a function. It takes three optional arguments that are by default all set to True:
 
@@ -23,119 +163,74 @@ def argon_function(calls=True, ifs=True, if_exps=True, loops=True):
             Determines whether if expressions will be virtualized.
         loops: bool
             Determines whether loops will be virtualized.
+        lazy: bool
+            Defers checking the annotations and transforming the function until it is first staged,
+            i.e. until call_transformed() or function_C_to_A needs it. This is False by default.
+        const_params: Iterable[str]
+            Names the parameters for which each constant argument value is traced as a separate
+            specialization, with the constant in place of the parameter. This is empty by default.
 
     Examples:
 
         Tagging a function with `@argon_function()` will virtualize it with all transformations enabled.
 
         Tagging a function with `@argon_function(calls=False)` will virtualize it with calls disabled and all other transformations enabled.
+
+        Tagging a function with `@argon_function(lazy=True)` will make importing it cheap when it is mostly called concretely.
     """
 
     def decorator(func) -> FunctionWithVirt:
         # TODO: fix ctx, when this decorator is used in test_scopes.py,
         # the ctx no longer points to the correct row number + col offset
 
-        # Get type hints of the function
-        type_hints = typing.get_type_hints(func)
-        if "return" not in type_hints:
-            raise TypeError(
-                f"Function {func.__name__} must have a return type annotation"
-            )
-        for param_name, param in inspect.signature(func).parameters.items():
-            if param.annotation == inspect.Parameter.empty:
+        def virtualize(virtualized_func: ArgonFunction) -> None:
+            # Get type hints of the function
+            type_hints = typing.get_type_hints(func)
+            if "return" not in type_hints:
                 raise TypeError(
-                    f"Parameter {param_name} of function {func.__name__} must have a type annotation"
+                    f"Function {func.__name__} must have a return type annotation"
                 )
-        return_type = type_hints.pop("return")
-        param_types = type_hints
-
-        # Get the source code of the file where the function is defined
-        src = inspect.getfile(func)
-        # Read the entire file's source
-        with open(src, "r") as file:
-            file_src = file.read()
-        # Parse it into an AST
-        parsed = ast.parse(file_src)
-
-        # Remove the decorators from the AST, because the modified function will
-        # be passed to them anyway and we don't want them to be called twice.
-
-        # Use qualified name to find the function (handles class methods)
-        # e.g., "MyClass.my_method" or just "my_function"
-        qualname_parts = func.__qualname__.split(".")
-
-        def find_function_in_ast(nodes, qualname_parts):
-            """Recursively search for a function in the AST using qualified name parts."""
-            if len(qualname_parts) == 0:
-                return None
-
-            if len(qualname_parts) == 1:
-                # Looking for a top-level function
-                for node in nodes:
-                    if (
-                        isinstance(node, ast.FunctionDef)
-                        and node.name == qualname_parts[0]
-                    ):
-                        return node
-            else:
-                # Looking for a method inside a class (or nested structure)
-                class_name = qualname_parts[0]
-                remaining_parts = qualname_parts[1:]
-
-                for node in nodes:
-                    if isinstance(node, ast.ClassDef) and node.name == class_name:
-                        # Recursively search within the class body
-                        return find_function_in_ast(node.body, remaining_parts)
-
-            return None
-
-        func_src = find_function_in_ast(parsed.body, qualname_parts)
-
-        if func_src is not None:
-            # Remove argon_function decorators
-            func_src.decorator_list = [
-                dec
-                for dec in func_src.decorator_list
-                if not (
-                    (
-                        isinstance(dec, ast.Call)
-                        and isinstance(dec.func, ast.Name)
-                        and dec.func.id == "argon_function"
+            for param_name, param in inspect.signature(func).parameters.items():
+                if param.annotation == inspect.Parameter.empty:
+                    raise TypeError(
+                        f"Parameter {param_name} of function {func.__name__} must have a type annotation"
                     )
-                )
-            ]
-            func_src.args.kw_defaults.append(ast.Constant(value=None))
-            func_src.args.kwonlyargs.append(
-                ast.arg(arg="__________argon", annotation=None)
-            )
-
-        if func_src is None:
-            raise ValueError(f"Unable to virtualize {func.__qualname__} in file {src}")
+            virtualized_func.return_type = type_hints.pop("return")
+            virtualized_func.param_types = type_hints
 
-        # Apply the AST transformation
-        # TODO: Add the transformation flags here too!
-        transformed = Transformer(src, calls, ifs, if_exps, loops).visit(func_src)
-        transformed = ast.fix_missing_locations(transformed)
+            # Get the file where the function is defined
+            src = inspect.getfile(func)
 
-        # Create a new AST containing only the transformed function
-        transformed_module = ast.Module(body=[transformed], type_ignores=[])
-
-        # Compile the transformed AST
-        compiled = compile(
-            transformed_module, filename=func.__code__.co_filename, mode="exec"
-        )
-        # Create a new function from the compiled code
-        func_globals = func.__globals__
-        exec(compiled, func_globals)
+            # Reuse the code transformed by a previous process if nothing it depends on has changed
+            cache_key = code_cache.key(
+                source_cache[src].digest, func.__qualname__, (calls, ifs, if_exps, loops)
+            )
+            compiled = code_cache.load(src, func.__qualname__, cache_key)
+            if compiled is None:
+                compiled = _transform_function(func, src, calls, ifs, if_exps, loops)
+                code_cache.store(src, func.__qualname__, cache_key, compiled)
+
+            # Create a new function from the compiled code. It is defined in a namespace of its own,
+            # so that the function's name in its module is never rebound, but runs in the module
+            namespace: typing.Dict[str, typing.Any] = {}
+            exec(compiled, func.__globals__, namespace)
+            transformed_func = namespace[func.__name__]
+
+            # Replace the original function with the transformed version
+            virtualized_func.transformed_func = functools.update_wrapper(
+                transformed_func, func
+            )
 
-        # Replace the original function with the transformed version
         virtualized_func = ArgonFunction(
             func,
-            functools.update_wrapper(func_globals[func.__name__], func),
-            return_type,
-            param_types,
-            abstract_func=None,
+            None,
+            None,
+            None,
+            const_params=tuple(const_params),
+            virtualizer=virtualize,
         )
+        if not lazy:
+            virtualized_func.ensure_virtualized()
 
         # Create a wrapper function that calls the transformed function
         # Pytest will not be able to collect the test functions if they are not
@@ -145,21 +240,10 @@ def argon_function(calls=True, ifs=True, if_exps=True, loops=True):
         wrapper.virtualized = virtualized_func  # type: ignore -- we need to add this flag to mark the function as virtualized
 
         # If this is a method, we need to create a descriptor that binds the instance to the virtualized function when accessed
+        functools.update_wrapper(wrapper, func)
         if "." in func.__qualname__:
-            # For methods, create a minimal descriptor class
-            # https://docs.python.org/3/reference/datamodel.html#implementing-descriptors
-            class MethodDescriptor:
-                def __get__(self, instance, owner=None):
-                    virtualized_func.bind(instance)
-                    return wrapper
-
-            descriptor = MethodDescriptor()
-            functools.update_wrapper(descriptor, func)
-            descriptor.virtualized = virtualized_func
-            return typing.cast(FunctionWithVirt, descriptor)
+            return typing.cast(FunctionWithVirt, MethodDescriptor(wrapper, virtualized_func))
         else:
-            return typing.cast(
-                FunctionWithVirt, functools.update_wrapper(wrapper, func)
-            )
+            return typing.cast(FunctionWithVirt, wrapper)
 
     return decorator
@@ -0,0 +1,40 @@
+"""
+Programs traced by several tests. They are defined in a module of their own, rather than in each
+test, so that they can also be imported again by the processes of test_processes.
+"""
+
+from collections import namedtuple  # needed by the virtualized while loops
+
+from argon.virtualization.wrapper import argon_function
+
+
+def helper(x: int) -> int:
+    return x + 1
+
+
+@argon_function()
+def branchy(x: int, y: int) -> int:
+    if x > y:
+        z = helper(x)
+    else:
+        z = helper(y) - 1
+    while z < x:
+        z = z + 2
+    return z
+
+
+@argon_function(lazy=True)
+def loopy(x: int) -> int:
+    i = 0
+    while i < x:
+        i = helper(i)
+    return i
+
+
+@argon_function()
+def recursive(x: int) -> int:
+    if x > 0:
+        y = recursive(x - 1)
+    else:
+        y = x
+    return y
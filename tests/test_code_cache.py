@@ -0,0 +1,69 @@
+import sys
+import textwrap
+
+from argon.state import State
+from argon.types.integer import Integer
+from argon.virtualization.code_cache import code_cache
+from argon.virtualization.precompile import precompile
+
+
+MODULE_SRC = textwrap.dedent(
+    """
+    from argon.virtualization.wrapper import argon_function
+
+
+    @argon_function()
+    def clamp(x: int) -> int:
+        if x > 10:
+            y = 10
+        else:
+            y = x
+        return y
+
+
+    @argon_function(ifs=False, lazy=True)
+    def add_one(x: int) -> int:
+        return x + 1
+    """
+)
+
+
+def test_code_cache(tmp_path, monkeypatch):
+    package = tmp_path / "argon_code_cache_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "funcs.py").write_text(MODULE_SRC)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "pycache_prefix", str(tmp_path / "cache"))
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    monkeypatch.setattr(code_cache, "enabled", True)
+    monkeypatch.setattr(code_cache, "hits", 0)
+    monkeypatch.setattr(code_cache, "misses", 0)
+
+    # Ahead of time: both functions, including the lazy one, are transformed and written to the cache
+    assert precompile(["argon_code_cache_pkg"]) == []
+    assert (code_cache.hits, code_cache.misses) == (0, 2)
+    assert len(list((tmp_path / "cache").rglob("*.argon.*.pyc"))) == 2
+
+    # A fresh import loads the transformed code instead of transforming it again
+    for name in ["argon_code_cache_pkg", "argon_code_cache_pkg.funcs"]:
+        monkeypatch.delitem(sys.modules, name)
+    from argon_code_cache_pkg import funcs  # type: ignore -- created by this test
+
+    # add_one is lazy, so it is only loaded when it is first staged
+    assert (code_cache.hits, code_cache.misses) == (1, 2)
+
+    state = State()
+    with state:
+        funcs.clamp.virtualized.call_transformed(Integer().bound("x"))
+        funcs.add_one.virtualized.call_transformed(3)
+    assert (code_cache.hits, code_cache.misses) == (2, 2)
+    print(state)
+
+    # Changing the source invalidates the cached code
+    (package / "funcs.py").write_text(MODULE_SRC + "\n# changed\n")
+    for name in ["argon_code_cache_pkg", "argon_code_cache_pkg.funcs"]:
+        monkeypatch.delitem(sys.modules, name)
+    from argon_code_cache_pkg import funcs  # type: ignore -- created by this test
+
+    assert (code_cache.hits, code_cache.misses) == (2, 3)
@@ -0,0 +1,119 @@
+import pickle
+
+from argon import serialization
+from argon.columnar import ColumnarSymbols
+from argon.node.phi import Phi
+from argon.state import State, stage
+from argon.types.boolean import Boolean
+from argon.types.function import function_C_to_A
+from argon.types.integer import Integer
+
+from tests.programs import branchy
+
+
+def stage_ops():
+    x = Integer().bound("x")
+    p = Boolean().bound("p")
+    y = x + 1
+    z = (y - x) + y
+    q = (z > 3) & p
+    return x, y, z, q
+
+
+def test_columnar():
+    state = State()
+    with state:
+        stage_ops()
+    columnar = State(columnar=True)
+    with columnar:
+        x, y, z, q = stage_ops()
+        assert isinstance(columnar.scope.symbols, ColumnarSymbols)
+        # CSE finds the stored symbols
+        assert (x + 1).rhs.val.id == y.rhs.val.id
+        assert ((y - x) + y).rhs.val.id == z.rhs.val.id
+        assert len(columnar.scope.symbols) == len(state.scope.symbols)
+
+    assert str(columnar) == str(state)
+    symbols = columnar.scope.symbols
+    # Every access creates a new view of the symbol
+    assert symbols[0] is not symbols[0]
+    assert symbols[0].rhs.val.id == y.rhs.val.id
+    assert symbols[-1].rhs.val.underlying.a.rhs.val.id == symbols[-2].rhs.val.id
+    assert [s.rhs.val.id for s in symbols[1:3]] == [s.rhs.val.id for s in list(symbols)[1:3]]
+    assert 0 < symbols.nbytes() < 50 * len(symbols)
+
+
+def stage_rewritten():
+    a = Integer().bound("a")
+    b = Integer().bound("b")
+    p = Boolean().bound("p")
+    # The second operand of each op is a CSE hit, which is a new view with columnar storage
+    zero = (a + b) - (a + b)
+    false = (a > b) ^ (a > b)
+    same = stage(Phi[Integer](p, a - b, a - b))
+    return zero, false, same
+
+
+def test_columnar_rewrites():
+    state = State()
+    with state:
+        zero, false, same = stage_rewritten()
+        assert zero.is_const() and false.is_const() and same.is_node()
+    columnar = State(columnar=True)
+    with columnar:
+        zero, false, same = stage_rewritten()
+        # The rewrites compare the operands by id, so they apply to views too
+        assert zero.is_const() and false.is_const()
+        assert not isinstance(same.rhs.val.underlying, Phi)
+    # Storing the symbols in columns does not change the graph
+    assert str(columnar) == str(state)
+
+
+def test_columnar_functions():
+    state = State()
+    with state:
+        function_C_to_A(branchy)
+    columnar = State(columnar=True)
+    with columnar:
+        function_C_to_A(branchy)
+    assert str(columnar) == str(state)
+
+    # The inputs of nested scopes are found through the views
+    body = columnar.scope.symbols[0].rhs.val.underlying.body
+    assert isinstance(body.stms, ColumnarSymbols)
+    assert body.inputs == []
+
+    copy = pickle.loads(pickle.dumps(columnar))
+    assert str(copy) == str(state)
+    copy = serialization.loads(serialization.dumps(columnar))
+    assert copy.columnar and isinstance(copy.scope.symbols, ColumnarSymbols)
+    assert str(copy) == str(state)
+    print(columnar)
+
+
+
+def stage_chain(length):
+    y = Integer().bound("x")
+    for i in range(length):
+        y = y + i
+    return y
+
+
+def test_columnar_deep_chain():
+    state = State()
+    with state:
+        stage_chain(5000)
+    columnar = State(columnar=True)
+    with columnar:
+        stage_chain(5000)
+    # The operands of the views are written as references to the symbols written before them, so
+    # copying the chain does not recurse into it
+    data = serialization.dumps(columnar)
+    assert len(data) < len(serialization.dumps(state)) * 2
+    for copy in (serialization.loads(data), pickle.loads(pickle.dumps(columnar))):
+        assert isinstance(copy.scope.symbols, ColumnarSymbols)
+        assert copy.dump() == state.dump()
+    # The loaded operands are the loaded symbols
+    copy = serialization.loads(data)
+    last, previous = copy.scope.symbols[-1], copy.scope.symbols[-2]
+    assert last.rhs.val.underlying.a.rhs.val.id == previous.rhs.val.id
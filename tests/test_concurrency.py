@@ -0,0 +1,82 @@
+import sys
+import threading
+
+from argon.state import State
+from argon.types.integer import Integer
+from argon.virtualization.batch import trace, trace_concurrently
+from argon.virtualization.wrapper import argon_function
+
+from tests import programs
+from tests.programs import branchy, helper, loopy
+
+
+@argon_function(lazy=True)
+def nested(x: int, flag: bool) -> int:
+    if flag:
+        y = branchy(x, 3)
+    else:
+        y = loopy(x)
+    return y
+
+
+def test_nested_states():
+    outer = State()
+    inner = State()
+    with outer:
+        with inner:
+            assert State.get_current_state() is inner
+            # Re-entering a state that is already entered is allowed
+            with outer:
+                assert State.get_current_state() is outer
+            assert State.get_current_state() is inner
+        assert State.get_current_state() is outer
+
+
+def test_states_per_thread():
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def worker():
+        try:
+            state = State()
+            with state:
+                barrier.wait()
+                for _ in range(100):
+                    x = Integer().bound("x")
+                    assert State.get_current_state() is state
+                    x + 1
+            assert len(state.scope.symbols) == 100
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_trace_concurrently():
+    entry_points = [branchy, loopy, nested, helper] * 16
+
+    switch_interval = sys.getswitchinterval()
+    # Switch threads as often as possible to provoke races
+    sys.setswitchinterval(1e-6)
+    try:
+        # The lazily decorated functions are first virtualized by several threads at once
+        runs = [trace_concurrently(entry_points, max_workers=8) for _ in range(4)]
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    # Virtualizing must not have rebound the decorated names in their modules
+    for func in [branchy, loopy]:
+        assert hasattr(vars(programs)[func.__name__], "virtualized")
+    assert hasattr(globals()["nested"], "virtualized")
+
+    expected = {func: str(trace(func).state) for func in set(entry_points)}
+    for traces in runs:
+        assert [t.func for t in traces] == entry_points
+        for t in traces:
+            assert str(t.state) == expected[t.func]
+    print(runs[0][0].state)
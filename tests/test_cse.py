@@ -0,0 +1,83 @@
+from argon.state import State
+from argon.types.boolean import Boolean
+from argon.types.integer import Integer
+from argon.virtualization.wrapper import argon_function
+
+
+def test_cse():
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        y = Integer().bound("y")
+        a = x + y
+        b = x + y
+        assert a is b
+
+        # Operand order and op kind are part of the key
+        c = y + x
+        d = x - y
+        assert c is not a
+        assert d is not a
+
+        # Constants are identified by their value
+        e = x + 1
+        f = x + 1
+        g = x + 2
+        assert e is f
+        assert e is not g
+
+        p = Boolean().bound("p")
+        assert (p & False) is (p & False)
+        assert (~p) is (~p)
+        assert len(state.scope.symbols) == 7
+    print(state)
+
+
+def test_cse_scopes():
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        a = x + 1
+
+        # Symbols of enclosing scopes are reused
+        inner = state.new_scope()
+        with inner:
+            b = x + 1
+            c = x + 2
+        assert b is a
+        assert inner.scope.symbols == [c]
+
+        # Symbols of sibling scopes are not visible
+        sibling = state.new_scope()
+        with sibling:
+            d = x + 2
+        assert d is not c
+        assert sibling.scope.symbols == [d]
+    print(state)
+
+
+def test_cse_disabled():
+    state = State(cse=False)
+    with state:
+        x = Integer().bound("x")
+        a = x + 1
+        b = x + 1
+        assert a is not b
+        assert len(state.scope.symbols) == 2
+    print(state)
+
+
+@argon_function()
+def repeated(x: int, y: int) -> int:
+    if x < y:
+        z = (x + y) + (x + y)
+    else:
+        z = x + y
+    return z
+
+
+def test_cse_control():
+    state = State()
+    with state:
+        repeated.virtualized.call_transformed(Integer().bound("x"), Integer().bound("y"))
+    print(state)
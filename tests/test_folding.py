@@ -0,0 +1,89 @@
+import typing
+from dataclasses import dataclass
+
+from argon.folding import constant_folder
+from argon.ref import Exp, Op, Sym
+from argon.state import State, stage
+from argon.types.boolean import Boolean
+from argon.types.integer import Integer
+
+
+def test_fold_integer():
+    state = State()
+    with state:
+        a = Integer().const(3)
+        b = a + 6
+        c = 10 - b
+        d = b > c
+        e = b < c
+        assert isinstance(b, Integer) and b.is_const() and b.rhs.val.value == 9
+        assert isinstance(c, Integer) and c.is_const() and c.rhs.val.value == 1
+        assert isinstance(d, Boolean) and d.is_const() and d.rhs.val.value is True
+        assert isinstance(e, Boolean) and e.is_const() and e.rhs.val.value is False
+        assert state.scope.symbols == []
+    print(state)
+
+
+def test_fold_boolean():
+    state = State()
+    with state:
+        a = Boolean().const(True)
+        b = Boolean().const(False)
+        assert (a & b).rhs.val.value is False
+        assert (a | b).rhs.val.value is True
+        assert (a ^ b).rhs.val.value is True
+        assert (~a).rhs.val.value is False
+        assert state.scope.symbols == []
+
+        # Non-constant operands are still staged
+        c = Boolean().bound("c")
+        d = c & b
+        assert d.is_node()
+        assert state.scope.symbols == [d]
+    print(state)
+
+
+def test_fold_chain():
+    state = State()
+    with state:
+        i = Integer().const(0)
+        for _ in range(10):
+            i = i + 1
+        assert i.is_const() and i.rhs.val.value == 10
+        assert state.scope.symbols == []
+    print(state)
+
+
+def test_fold_disabled():
+    state = State(fold=False)
+    with state:
+        a = Integer().const(3) + 6
+        assert a.is_node()
+        assert state.scope.symbols == [a]
+    print(state)
+
+
+@dataclass(slots=True)
+class Mul[T](Op[T]):
+    a: T
+    b: T
+
+    @property
+    @typing.override
+    def operands(self) -> typing.List[Sym[typing.Any]]:
+        return [self.a, self.b]  # type: ignore
+
+
+constant_folder[Mul] = lambda a, b: a * b if a < 100 else NotImplemented
+
+
+def test_fold_custom_op():
+    state = State()
+    with state:
+        a = stage(Mul[Integer](Integer().const(6), Integer().const(7)))
+        assert a.is_const() and a.rhs.val.value == 42
+
+        # A folder may decline to fold
+        b = stage(Mul[Integer](Integer().const(600), Integer().const(7)))
+        assert b.is_node()
+    print(state)
@@ -1,5 +1,9 @@
 import typing
+
+import pytest
+
 from argon.state import State
+from argon.types.function import as_virtualized, function_C_to_A
 from argon.virtualization.wrapper import argon_function
 
 
@@ -47,3 +51,153 @@ def test_recursion():
     with state:
         recursion.virtualized.call_transformed()
     print(state)
+
+
+def add_two(x: int) -> int:
+    return x + 2
+
+
+def one(x: int) -> int:
+    return 1
+
+
+@argon_function(const_params=("n",))
+def add_n(x: int, n: int) -> int:
+    return x + n
+
+
+@argon_function()
+def specialized_calls(x: int) -> int:
+    y = add_two(x) + add_two(x + 1) + one(x) + one(x + 1)
+    return add_n(y, 1) + add_n(y + 1, 1) + add_n(y, 2) + add_n(y, x)
+
+
+def add_default(x: int, y: int = 1) -> int:
+    return x + y
+
+
+@argon_function()
+def default_calls(x: int) -> int:
+    return add_default(x) + add_default(x, 1) + add_default(x, x)
+
+
+@argon_function()
+def wrong_type(b: bool) -> int:
+    return one(b)
+
+
+@argon_function()
+def wrong_arity(x: int) -> int:
+    return add_two(x, x)
+
+
+def test_trace_cache():
+    from argon.node.function_new import FunctionNew
+    from argon.types.integer import Integer
+
+    state = State()
+    with state:
+        specialized_calls.virtualized.call_transformed(Integer().bound("x"))
+        function_news = [
+            sym for sym in state.scope.symbols if isinstance(sym.rhs.val.underlying, FunctionNew)  # type: ignore -- only nodes are staged in the scope
+        ]
+        add_two_traces = as_virtualized(add_two).virtualized.traces.specializations(state)  # type: ignore -- add_two is a plain function
+        one_traces = as_virtualized(one).virtualized.traces.specializations(state)  # type: ignore -- one is a plain function
+        add_n_traces = add_n.virtualized.traces.specializations(state)
+    # Calls with the same signature reuse the trace
+    assert set(add_two_traces) == {(Integer,)}
+    assert set(one_traces) == {(Integer,)}
+    # add_n is traced once per constant n, and once for a non-constant n
+    assert set(add_n_traces) == {
+        (Integer, (Integer, 1)),
+        (Integer, (Integer, 2)),
+        (Integer, Integer),
+    }
+    assert len(function_news) == 5
+    print(state)
+
+    # Traces are not shared between states
+    state = State()
+    with state:
+        assert add_n.virtualized.traces.specializations(state) == {}
+        function_C_to_A(add_n)
+        # Tracing from the annotations makes the specialization of non-constant arguments
+        assert set(add_n.virtualized.traces.specializations(state)) == {(Integer, Integer)}
+        add_n.virtualized.call_transformed(Integer().bound("x"), Integer().bound("n"))
+        assert add_n.virtualized.traces.hits == 1
+    print(state)
+
+
+def test_default_params():
+    from argon.node.function_call import FunctionCall
+    from argon.types.integer import Integer
+
+    state = State()
+    with state:
+        default_calls.virtualized.call_transformed(Integer().bound("x"))
+        traces = as_virtualized(add_default).virtualized.traces.specializations(state)  # type: ignore -- add_default is a plain function
+    # The default is passed like any other argument, so all calls share one trace
+    assert set(traces) == {(Integer, Integer)}
+    calls = [
+        sym.rhs.val.underlying
+        for sym in state.scope.symbols
+        if isinstance(sym.rhs.val.underlying, FunctionCall)  # type: ignore -- only nodes are staged in the scope
+    ]
+    assert [len(call.args) for call in calls] == [2, 2, 2]
+    assert calls[0].args[1].is_const() and calls[0].args[1].rhs.val.value == 1  # type: ignore -- checked to be a Const
+    print(state)
+
+
+def test_call_guards():
+    from argon.types.boolean import Boolean
+    from argon.types.integer import Integer
+
+    # Calls which do not match the signature fail at the call rather than while tracing
+    with State():
+        with pytest.raises(TypeError, match="Argument x of one\\(\\) must be Integer, not Boolean"):
+            wrong_type.virtualized.call_transformed(Boolean().bound("b"))
+        with pytest.raises(TypeError, match="add_two\\(\\) takes 1 argument but 2 were given"):
+            wrong_arity.virtualized.call_transformed(Integer().bound("x"))
+        with pytest.raises(TypeError, match="add_default\\(\\) takes from 1 to 2 arguments but 0 were given"):
+            function_C_to_A(add_default, [])  # type: ignore -- add_default is virtualized on its first call
+
+    print(f"\ntest_call_guards")
+
+
+class Shifter:
+    @argon_function()
+    def shift(self: object, x: int) -> int:
+        return x + 1
+
+
+def test_bound_methods():
+    from argon.types.integer import Integer
+
+    a = Shifter()
+    b = Shifter()
+    assert a.shift(2) == 3
+    assert Shifter.shift(b, 2) == 3
+    # Binding does not mutate the ArgonFunction shared by all instances
+    assert a.shift.virtualized.bound_instance is a
+    assert b.shift.virtualized.bound_instance is b
+    assert Shifter.__dict__["shift"].virtualized.bound_instance is None
+    # The function bound to an instance is created once, and does not keep the instance alive
+    assert a.shift.virtualized is a.shift.virtualized
+    bound_functions = Shifter.__dict__["shift"].bound_functions
+    c = Shifter()
+    c.shift.virtualized
+    assert id(c) in bound_functions.functions
+    c_id = id(c)
+    del c
+    assert c_id not in bound_functions.functions
+
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        trace_a = function_C_to_A(a.shift, [x])  # type: ignore -- bound methods are virtualized
+        # Each instance keeps its own traces across accesses
+        assert function_C_to_A(a.shift, [x]) is trace_a  # type: ignore -- bound methods are virtualized
+        assert function_C_to_A(b.shift, [x]) is not trace_a  # type: ignore -- bound methods are virtualized
+        assert len(a.shift.virtualized.traces.specializations(state)) == 1
+        assert a.shift.virtualized.traces.hits == 1
+    print(state)
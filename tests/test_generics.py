@@ -203,3 +203,48 @@ class ChildStream[TP](GStream[List[TP]]):
 
 def test_parent_child_t_param():
     assert ChildStream[int]().TP is int  # type: ignore -- PyRight falsely reports that it cannot access the type parameter
+
+
+def test_memoized_tparams():
+    from argon.types.boolean import Boolean
+    from argon.types.function import Function
+    from argon.types.integer import Integer
+    from argon.types.struct import Struct
+
+    # Resolved type parameters are cached per specialization, so different
+    # specializations of the same class must not share results
+    for _ in range(2):
+        assert Function[Integer]().A == Function[Integer]
+        assert Function[Boolean]().A == Function[Boolean]
+        assert Function[Function[Integer]]().A == Function[Function[Integer]]
+        assert Struct[{"a": Integer}]().A == Struct[{"a": Integer}]
+        assert Struct[{"a": Boolean}]().A == Struct[{"a": Boolean}]
+        assert GStream[int]().A is GStream[int]
+        assert GStream[float]().A is GStream[float]
+        assert TPStream[int]().A == GStream[List[int]]
+        assert TPStream[str]().A == GStream[List[str]]
+
+
+def test_specialization_cache():
+    from argon.base import specialization_cache
+    from argon.node.arith import Add
+    from argon.types.integer import Integer
+    from argon.types.struct import Struct
+
+    specialization_cache.clear()
+    assert Add[Integer] is Add[Integer]
+    assert Add[Integer] is not Add[int]
+
+    members = {"a": Integer}
+    struct_tp = Struct[members]
+    assert Struct[{"a": Integer}] is struct_tp
+    # The cached alias must not observe later changes to the caller's dict
+    members["b"] = Integer
+    assert struct_tp.__args__[0] == {"a": Integer}
+    assert Struct[members] is not struct_tp
+
+    info = specialization_cache.info()
+    assert info.misses == 4
+    assert info.hits == 3
+    assert info.size == 4
+    assert info.hit_rate == 3 / 7
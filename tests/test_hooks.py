@@ -0,0 +1,98 @@
+import collections
+
+from argon.block import Block
+from argon.hooks import Listener, hooks
+from argon.state import State
+from argon.types.function import function_C_to_A
+from argon.types.integer import Integer
+
+from tests.programs import branchy
+
+
+class Counter(Listener):
+    def __init__(self):
+        self.events = collections.Counter()
+        self.scopes = []
+        self.open_scopes = []
+        self.blocks = []
+
+    def on_symbol(self, state, symbol):
+        assert symbol in state.scope.symbols
+        self.events["symbol"] += 1
+
+    def on_scope_open(self, state, scope):
+        assert state.scope is scope
+        if not any(opened is scope for opened in self.scopes):
+            self.scopes.append(scope)
+        self.open_scopes.append(scope)
+
+    def on_scope_close(self, state, scope):
+        assert self.open_scopes.pop() is scope
+        assert state.scope is scope.parent
+        self.events["scope"] += 1
+
+    def on_block(self, state, block):
+        self.blocks.append(block)
+
+
+class SymbolCounter(Listener):
+    def __init__(self):
+        self.count = 0
+
+    def on_symbol(self, state, symbol):
+        self.count += 1
+
+
+def all_symbols(symbols):
+    for symbol in symbols:
+        yield symbol
+        op = symbol.rhs.val.underlying
+        for name in ("body", "condBlk", "thenBlk", "elseBlk", "cond"):
+            block = getattr(op, name, None)
+            if isinstance(block, Block):
+                yield from all_symbols(block.stms)
+
+
+def test_listeners():
+    counter = Counter()
+    state = State()
+    with hooks.registered(counter), state:
+        function_C_to_A(branchy)
+        x = Integer().bound("x")
+        x + 1
+        # Deduplicated and folded ops are not new symbols
+        x + 1
+        Integer().const(1) + 2
+
+    assert counter.events["symbol"] == len(list(all_symbols(state.scope.symbols)))
+    # Function bodies, the branches and the condition of the if, and the condition and body of the loop
+    assert len(counter.scopes) == 7
+    assert counter.events["scope"] >= 7
+    assert not counter.open_scopes
+    assert len(counter.blocks) == 7
+    block_ids = {id(block) for block in counter.blocks}
+    branchy_op = state.scope.symbols[0].rhs.val.underlying
+    assert id(branchy_op.body) in block_ids
+    assert all(block.result is not None for block in counter.blocks)
+
+    # Unregistered listeners are no longer notified
+    assert hooks.listeners == []
+    with state:
+        x + 2
+    assert counter.events["symbol"] == len(list(all_symbols(state.scope.symbols))) - 1
+    print(counter.events)
+
+
+def test_overridden_events():
+    counter = hooks.register(SymbolCounter())
+    try:
+        # Only the events the listener overrides are reported to it
+        assert hooks.on_symbol == (counter.on_symbol,)
+        assert hooks.on_scope_open == () and hooks.on_block == ()
+        with State():
+            function_C_to_A(branchy)
+    finally:
+        hooks.unregister(counter)
+    assert counter.count > 0
+    assert hooks.on_symbol == ()
+    print(counter.count)
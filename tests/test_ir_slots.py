@@ -0,0 +1,22 @@
+from argon.block import Block
+from argon.state import State
+from argon.types.boolean import Boolean
+from argon.types.integer import Integer
+
+
+def test_ir_slots():
+    state = State()
+    with state:
+        a = Integer().bound("a")
+        b = a + 3
+        c = b > a
+        blk = Block[Boolean]([a], [b, c], c)
+
+        for obj in [a, b, c, b.rhs, b.rhs.val, b.rhs.val.underlying, blk, state.scope]:
+            assert not hasattr(obj, "__dict__"), f"{type(obj)} has a __dict__"
+
+        # Generic parameters are still recorded on slotted instances
+        assert b.rhs.val.underlying.R is Integer  # type: ignore
+        assert c.rhs.val.underlying.R is Boolean  # type: ignore
+        assert blk.B is Boolean  # type: ignore
+    print(state)
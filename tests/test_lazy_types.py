@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+
+def run_isolated(code: str) -> str:
+    # Whether torch has been imported is process-wide, so check it in a fresh interpreter
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_import_does_not_load_torch():
+    out = run_isolated(
+        "import sys, argon.types, argon.node\n"
+        "print('torch' in sys.modules)\n"
+    )
+    assert out.split() == ["False"]
+
+
+def test_torch_types_load_on_first_use():
+    out = run_isolated(
+        "import argon.types\n"
+        "import torch\n"
+        "from argon.state import State\n"
+        "from argon.virtualization.type_mapper import concrete_to_abstract\n"
+        "with State() as state:\n"
+        "    print(type(concrete_to_abstract(torch.zeros(2))).__name__)\n"
+        "    print(type(concrete_to_abstract(torch.nn.ModuleList())).__name__)\n"
+    )
+    assert out.split() == ["TorchTensor", "NNModuleList"]
+
+
+def test_failed_import_is_retried():
+    out = run_isolated(
+        "import fractions\n"
+        "from argon.state import State\n"
+        "from argon.virtualization.type_mapper import concrete_to_abstract, register_lazy_types\n"
+        "register_lazy_types('fractions', 'argon_lazy_types_missing')\n"
+        "with State():\n"
+        "    for _ in range(2):\n"
+        "        try:\n"
+        "            concrete_to_abstract(fractions.Fraction(1, 2))\n"
+        "        except ImportError as e:\n"
+        "            print(type(e).__name__)\n"
+    )
+    assert out.split() == ["ModuleNotFoundError", "ModuleNotFoundError"]
@@ -0,0 +1,42 @@
+from argon.state import State
+from argon.types.integer import Integer
+from argon.virtualization.wrapper import argon_function
+
+
+@argon_function(lazy=True)
+def lazy_clamp(x: int) -> int:
+    if x > 10:
+        y = 10
+    else:
+        y = x
+    return y
+
+
+@argon_function(lazy=True)
+def lazy_forward_ref(x: "LaterDefined") -> int:
+    return 1
+
+
+class LaterDefined:
+    pass
+
+
+def test_lazy_virtualization():
+    assert lazy_clamp.virtualized.transformed_func is None
+    # Calling the function concretely does not virtualize it
+    assert lazy_clamp(12) == 10
+    assert lazy_clamp.virtualized.transformed_func is None
+
+    state = State()
+    with state:
+        lazy_clamp.virtualized.call_transformed(Integer().bound("x"))
+    assert lazy_clamp.virtualized.transformed_func is not None
+    # Executing the transformed code must not rebind the decorated name in this module
+    assert lazy_clamp is globals()["lazy_clamp"]
+    assert hasattr(lazy_clamp, "virtualized")
+    print(state)
+
+
+def test_lazy_annotations():
+    # Annotations are resolved on first use, so they may refer to names defined later
+    assert lazy_forward_ref.virtualized.get_param_type("x") is LaterDefined
@@ -0,0 +1,80 @@
+import io
+
+from argon import printer
+from argon.node.control import IfThenElse
+from argon.printer import Printer
+from argon.state import State
+from argon.types.function import function_C_to_A
+from argon.virtualization.wrapper import argon_function
+
+from tests.programs import branchy
+
+
+def test_write_to_sink():
+    state = State()
+    with state:
+        function_C_to_A(branchy)
+    sink = io.StringIO()
+    printer.write(state, sink)
+    assert sink.getvalue() == str(state) == state.dump()
+
+    function = state.scope.symbols[0]
+    sink = io.StringIO()
+    printer.write(function, sink)
+    assert sink.getvalue() == function.dump()
+    print(sink.getvalue())
+
+
+def test_max_depth():
+    state = State()
+    with state:
+        function_C_to_A(branchy)
+    full = state.dump()
+    assert "elided" not in full
+
+    # The function body is written, but not the blocks of the ops in it
+    shallow = Printer.dumps(state, max_depth=1)
+    assert "statements elided>)" in shallow
+    assert "IfThenElse(" in shallow and "Loop(" in shallow
+    assert "condBlk = Block( \n" not in shallow
+    assert len(shallow) < len(full)
+
+    nothing = Printer.dumps(state, max_depth=0)
+    assert "Body = Block(<" in nothing and "IfThenElse(" not in nothing
+    # Deeper limits than the graph write it in full
+    assert Printer.dumps(state, max_depth=10) == full
+    print(shallow)
+
+
+@argon_function()
+def same_branches(x: int, y: int) -> int:
+    if x > y:
+        z = x - y + 1
+    else:
+        z = x - y + 1
+    return z
+
+
+def test_elide_repeated_blocks():
+    state = State()
+    with state:
+        function_C_to_A(same_branches)
+    full = state.dump()
+    assert "repeated" not in full
+
+    # The branches only differ in the ids of their symbols and their source contexts
+    elided = Printer.dumps(state, elide_repeated_blocks=True)
+    [if_id] = [
+        symbol.rhs.val.id
+        for symbol in state.scope.symbols[0].rhs.val.underlying.body.stms  # type: ignore -- same_branches was traced into a FunctionNew
+        if isinstance(symbol.rhs.val.underlying, IfThenElse)  # type: ignore -- only nodes are staged in the scope
+    ]
+    assert f"elseBlk = Block(<repeated, first written as x{if_id}.thenBlk>)" in elided
+    assert elided.count("repeated") == 1 and len(elided) < len(full)
+
+    # Blocks are only elided when asked to, and if they have the same structure
+    assert "repeated" not in Printer.dumps(state, elide_repeated_blocks=False)
+    with State() as other:
+        function_C_to_A(branchy)
+    assert "repeated" not in Printer.dumps(other, elide_repeated_blocks=True)
+    print(elided)
@@ -0,0 +1,47 @@
+import multiprocessing
+import pickle
+
+from argon.node.function_new import FunctionNew
+from argon.state import State
+from argon.types.integer import Integer
+from argon.virtualization.batch import trace, trace_in_processes
+
+from tests import programs
+from tests.programs import branchy, helper, loopy
+
+
+def test_pickle_state():
+    state = State()
+    with state:
+        trace_ = trace(branchy)
+    copy = pickle.loads(pickle.dumps(trace_))
+    assert str(copy.state) == str(trace_.state)
+    func_new = copy.function.rhs.val.underlying
+    assert isinstance(func_new, FunctionNew)
+    # The virtualized function is imported again instead of being pickled
+    assert func_new.virtualized is branchy
+
+    # The CSE cache of the copy keys the copied symbols
+    with copy.state:
+        x = Integer().bound("x")
+        assert (x + 1) is (x + 1)
+    assert len(copy.state.scope.cache) == len(trace_.state.scope.cache) + 1
+
+
+def test_pickle_missing_function(monkeypatch):
+    trace_ = trace(helper)
+    monkeypatch.delattr(programs, "helper")
+    copy = pickle.loads(pickle.dumps(trace_.state))
+    # Functions which cannot be imported again are not carried over
+    assert copy.scope.symbols[0].rhs.val.underlying.virtualized is None
+
+
+def test_trace_in_processes():
+    entry_points = [branchy, loopy, helper] * 4
+    traces = trace_in_processes(
+        entry_points, max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    )
+    assert [t.func for t in traces] == entry_points
+    for t in traces:
+        assert str(t.state) == str(trace(t.func).state)
+    print(traces[0].state)
@@ -0,0 +1,120 @@
+import csv
+import io
+import sys
+
+import pytest
+
+from argon.block import Block
+from argon.node.arith import Add
+from argon.node.function_call import FunctionCall
+from argon.profiler import Profiler
+from argon.state import State
+from argon.types.function import function_C_to_A
+from argon.types.integer import Integer
+
+from tests import programs
+from tests.programs import branchy, helper
+
+
+def test_report():
+    profiler = Profiler()
+    state = State()
+    with state, profiler:
+        function_C_to_A(branchy)
+    with state:
+        # Not recorded once the profiler was exited
+        Integer().bound("a") + 1
+
+    rows = profiler.report(group_by=("entry", "op"))
+    counts = {(row.entry, row.op): row.count for row in rows}
+    assert counts[("function_C_to_A", "branchy")] == 1
+    # The second call reuses the trace of the first
+    assert counts[("function_C_to_A", "helper")] == 2
+    assert counts[("stage_function_call", "helper")] == 2
+    assert counts[("stage_if", "IfThenElse")] == 1
+    assert counts[("stage_loop", "Loop")] == 1
+    assert counts[("State.stage", "FunctionNew")] == 2
+    assert counts[("State.stage", "FunctionCall")] == 2
+    assert counts[("State.stage", "Add")] == 2
+    assert ("State.stage", "IfThenElse") in counts and ("State.stage", "Loop") in counts
+    assert ("concrete_to_abstract", "int") in counts
+
+    # Tracing branchy includes everything else
+    assert rows[0].entry == "function_C_to_A" and rows[0].op == "branchy"
+    for row in rows:
+        assert row.location is None
+        assert 0 <= row.self_time <= row.total_time
+    total = sum(row.self_time for row in rows)
+    assert rows[0].total_time == pytest.approx(total)
+
+    # The if statement and the function are located at their source
+    by_location = profiler.report(group_by=("entry", "location"))
+    (if_row,) = [row for row in by_location if row.entry == "stage_if"]
+    with open(programs.__file__) as file:
+        if_line = file.read().splitlines().index("    if x > y:") + 1
+    assert if_row.location == f"{programs.__file__}:{if_line}:4"
+    function_rows = [row for row in by_location if row.entry == "function_C_to_A"]
+    assert {row.location for row in function_rows} == {
+        f"{programs.__file__}:{helper.__code__.co_firstlineno}:0",
+        str(state.scope.symbols[0].ctx),
+    }
+    # Every op staged by branchy itself is located in it
+    stage_rows = [
+        row
+        for row in profiler.report()
+        if row.entry == "State.stage" and row.op not in ("FunctionNew", "Add")
+    ]
+    assert all(row.location.startswith(f"{programs.__file__}:") for row in stage_rows)
+
+    with pytest.raises(ValueError):
+        profiler.report(group_by=("file",))
+    print(profiler.format())
+
+
+def test_locations_without_profiler():
+    # The profiled wrappers do not change the source contexts of the staged ops
+    state = State()
+    with state:
+        function_C_to_A(branchy)
+        x = Integer().bound("x")
+        y = state.stage(Add[Integer](x, x))
+    assert y.ctx.file == __file__
+    assert y.ctx.positions.lineno == sys._getframe().f_lineno - 2
+
+    def calls(symbols):
+        for symbol in symbols:
+            op = symbol.rhs.val.underlying
+            if isinstance(op, FunctionCall):
+                yield symbol
+            for name in ("body", "condBlk", "thenBlk", "elseBlk", "cond"):
+                block = getattr(op, name, None)
+                if isinstance(block, Block):
+                    yield from calls(block.stms)
+
+    function_calls = list(calls(state.scope.symbols))
+    assert len(function_calls) == 2
+    assert all(call.ctx.file == programs.__file__ for call in function_calls)
+
+
+def test_export():
+    profiler = Profiler()
+    with State(), profiler:
+        function_C_to_A(branchy)
+
+    file = io.StringIO()
+    profiler.write_csv(file, group_by=("op",))
+    table = list(csv.DictReader(io.StringIO(file.getvalue())))
+    assert list(table[0]) == ["entry", "op", "location", "count", "total_time", "self_time"]
+    assert {row["op"] for row in table} >= {"branchy", "helper", "IfThenElse", "Loop"}
+    assert all(row["entry"] == "" and row["location"] == "" for row in table)
+    assert sum(int(row["count"]) for row in table) == sum(
+        row.count for row in profiler.report()
+    )
+
+    lines = profiler.format(group_by=("entry",), limit=3).splitlines()
+    assert lines[0].split() == ["entry", "count", "total", "ms", "self", "ms"]
+    assert len(lines) == 4 and lines[1].startswith("function_C_to_A")
+
+    profiler.reset()
+    assert profiler.report() == []
+    print(file.getvalue())
@@ -0,0 +1,84 @@
+import typing
+
+from argon.node.arith import Add
+from argon.node.phi import Phi
+from argon.rewrites import rewrite_rules
+from argon.srcctx import SrcCtx
+from argon.state import State, stage
+from argon.types.boolean import Boolean
+from argon.types.integer import Integer
+
+
+def test_integer_rewrites():
+    rewrite_rules.reset_counters()
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        assert (x + 0) is x
+        assert (0 + x) is x
+        assert (x - 0) is x
+        zero = x - x
+        assert zero.is_const() and zero.rhs.val.value == 0
+        assert state.scope.symbols == []
+    assert rewrite_rules.counters["Add.add_zero"] == 2
+    assert rewrite_rules.counters["Sub.sub_zero"] == 1
+    assert rewrite_rules.counters["Sub.sub_self"] == 1
+    print(state)
+
+
+def test_boolean_rewrites():
+    rewrite_rules.reset_counters()
+    state = State()
+    with state:
+        p = Boolean().bound("p")
+        assert (p & True) is p
+        assert (p | False) is p
+        false = p ^ p
+        assert false.is_const() and false.rhs.val.value is False
+
+        not_p = ~p
+        assert ~not_p is p
+        assert state.scope.symbols == [not_p]
+    assert rewrite_rules.counters["And.and_true"] == 1
+    assert rewrite_rules.counters["Or.or_false"] == 1
+    assert rewrite_rules.counters["Xor.xor_self"] == 1
+    assert rewrite_rules.counters["Not.not_not"] == 1
+    print(state)
+
+
+def test_phi_rewrite():
+    state = State()
+    with state:
+        c = Boolean().bound("c")
+        a = Integer().bound("a")
+        b = Integer().bound("b")
+        assert stage(Phi[Integer](c, a, a)) is a
+        assert stage(Phi[Integer](c, a, b)).is_node()
+    print(state)
+
+
+def test_rewrites_disabled():
+    state = State(rewrite=False)
+    with state:
+        x = Integer().bound("x")
+        y = x + 0
+        assert y.is_node()
+    print(state)
+
+
+def test_custom_rule():
+    # Not a valid simplification, it is only registered for the duration of this test
+    def add_self(op: Add, ctx: SrcCtx | None) -> typing.Optional[Integer]:
+        if op.a is op.b:
+            return op.a  # type: ignore
+        return None
+
+    rewrite_rules.register(Add)(add_self)
+    try:
+        state = State()
+        with state:
+            x = Integer().bound("x")
+            assert (x + x) is x
+        assert rewrite_rules.counters["Add.add_self"] == 1
+    finally:
+        rewrite_rules.rules[Add].remove(add_self)
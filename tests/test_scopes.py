@@ -12,3 +12,56 @@ def test_scope():
 
     print(f"\ntest_scope")
     print(state)
+
+
+def test_scope_inputs():
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        a = x + 1
+        b = x + 2
+        c = x + 3
+
+        inner = state.new_scope()
+        with inner:
+            d = c + a
+            assert inner.scope.inputs == [c, a]
+            # Inputs are updated as symbols are appended
+            e = d + b
+            f = e + a
+            assert inner.scope.inputs == [c, a, b]
+            assert inner.scope.inputs == [c, a, b]
+
+        # Symbols defined in the scope itself are never inputs
+        assert state.scope.inputs == []
+
+    print(f"\ntest_scope_inputs")
+    print(state)
+
+
+def test_scope_inputs_replaced_symbols():
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        y = Integer().bound("y")
+        a = x + 1
+        b = y + 1
+
+        first = state.new_scope()
+        with first:
+            c = a + 2
+            d = c + 3
+        second = state.new_scope()
+        with second:
+            e = b + 2
+            f = e + 3
+            g = f + 4
+
+        assert first.scope.inputs == [a]
+        # A replacement list of the same or greater length is indexed from the start again
+        first.scope.symbols = list(second.scope.symbols)
+        assert first.scope.inputs == [b]
+        first.scope.store_in_columns()
+        assert first.scope.inputs == [b]
+
+    print(f"\ntest_scope_inputs_replaced_symbols")
@@ -0,0 +1,275 @@
+import dataclasses
+import fractions
+import io
+
+import pytest
+
+from argon import serialization
+from argon.node.function_new import FunctionNew
+from argon.ref import Const, Def, Exp
+from argon.serialization import (
+    FORMAT_VERSION,
+    LazyGraph,
+    SerializationError,
+    Streamed,
+    SymbolSink,
+    dump,
+    dumps,
+    load,
+    loads,
+)
+from argon.srcctx import SrcCtx
+from argon.state import State
+from argon.types.boolean import Boolean
+from argon.types.function import as_virtualized, function_C_to_A
+from argon.types.integer import Integer
+from argon.types.struct import Struct
+from argon.virtualization.batch import trace
+
+from tests.programs import branchy, helper, recursive
+
+
+def test_round_trip():
+    for func in [branchy, recursive, helper]:
+        state = trace(func).state
+        copy = loads(dumps(state))
+        assert str(copy) == str(state)
+        assert copy._id == state._id
+        # The virtualized functions are imported again
+        func_new = copy.scope.symbols[0].rhs.val.underlying
+        assert func_new.virtualized is as_virtualized(func)
+    print(copy)
+
+
+def test_round_trip_values():
+    state = State(cse=False)
+    with state:
+        x = Integer().bound("x")
+        b = Boolean().bound("b")
+        s = Struct[{"a": Integer, "b": Boolean}]().bound("s")
+        y = x + 1
+        z = x + -(2**70)
+        s["a"] + y
+        b & Boolean().const(True)
+        ctx = SrcCtx("file.py", None)
+        x.__class__()._new(y.rhs, ctx)
+
+    data = dumps(state)
+    copy = loads(data)
+    assert str(copy) == str(state)
+    assert not copy.cse and copy.fold and copy.rewrite
+    assert copy.scope.symbols[1].rhs.val.underlying.b.rhs.val.value == -(2**70)
+    # Types and source contexts are interned
+    assert data.count(b"argon.types.integer") == 1
+    assert data.count(b"test_serialization.py") == 1
+
+    file = io.BytesIO()
+    dump(state, file)
+    file.seek(0)
+    assert str(load(file)) == str(state)
+
+
+def test_cse_after_loading():
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        x + 1
+    copy = loads(dumps(state))
+    x, y = copy.scope.symbols[0].rhs.val.underlying.a, copy.scope.symbols[0]
+    with copy:
+        assert (x + 1) is y
+
+
+def test_errors():
+    data = dumps(trace(helper).state)
+    with pytest.raises(SerializationError):
+        loads(b"not a graph")
+    with pytest.raises(SerializationError):
+        loads(data.replace(bytes([FORMAT_VERSION]), bytes([FORMAT_VERSION + 1]), 1))
+    with pytest.raises(SerializationError):
+        loads(data[:-10])
+    with pytest.raises(SerializationError):
+        loads(data + b"\0")
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+def test_untrusted_data(monkeypatch):
+    monkeypatch.setattr(serialization, "_allowed_modules", set())
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        x + Integer()._new(Def(Const(fractions.Fraction(1, 2))), None)
+    # Values of other types are pickled, and only unpickled if that is allowed
+    data = dumps(state)
+    with pytest.raises(SerializationError, match="allow_pickle=True"):
+        loads(data)
+    assert str(loads(data, allow_pickle=True)) == str(state)
+
+    # Types are only imported from argon and the modules allowed explicitly
+    state = State()
+    with state:
+        x = Integer().bound("x")
+        x + Integer()._new(Def(Const(Point(1, 2))), None)
+    data = dumps(state)
+    with pytest.raises(SerializationError, match=f"{__name__}.Point"):
+        loads(data)
+    serialization.allow_module(__name__)
+    assert str(loads(data)) == str(state)
+
+
+def test_lazy_graph(tmp_path):
+    state = State()
+    with state:
+        for func in [branchy, recursive, helper]:
+            function_C_to_A(func)
+    path = tmp_path / "graph.argon"
+    with open(path, "wb") as file:
+        dump(state, file, index=True)
+    # The index is not needed to load the whole graph
+    assert str(loads(path.read_bytes())) == str(state)
+
+    with LazyGraph(path) as graph:
+        assert set(graph.function_names()) == {"branchy", "recursive", "helper"}
+        assert graph.num_materialized == 0
+        # The recursive call reuses the specialization traced from the annotations
+        [annotated] = graph.functions("recursive")
+        assert annotated.rhs.val.dump() == state.scope.symbols[1].rhs.val.dump()
+        # Only the symbols used by the function are materialized
+        assert 0 < graph.num_materialized < len(graph._reader.memo)
+        assert graph.functions("recursive")[0] is annotated
+        [branchy_func] = graph.functions("branchy")
+        assert isinstance(branchy_func.rhs.val.underlying, FunctionNew)
+
+        assert graph.symbol(annotated.rhs.val.id) is annotated
+        with pytest.raises(KeyError):
+            graph.symbol(state._id + 1)
+
+        copy = graph.load()
+        assert str(copy) == str(state)
+        assert copy.scope.symbols[1] is annotated
+        ids = set(graph.symbol_ids())
+        assert {symbol.rhs.val.id for symbol in copy.scope.symbols} <= ids
+    print(annotated.rhs.val.dump())
+
+    data = dumps(state, index=True)
+    with open(path, "wb") as file:
+        dump(state, file)
+    with pytest.raises(SerializationError):
+        LazyGraph(path)
+    # Empty and truncated files
+    for truncated in [b"", data[:3], data[:-4]]:
+        path.write_bytes(truncated)
+        with pytest.raises(SerializationError):
+            LazyGraph(path)
+
+
+def test_lazy_deep_chain(tmp_path):
+    state = State()
+    with state:
+        y = Integer().bound("x")
+        for i in range(10000):
+            y = y + i
+    path = tmp_path / "graph.argon"
+    with open(path, "wb") as file:
+        dump(state, file, index=True)
+
+    # Looking up the last symbol materializes the whole chain, deeper than the recursion limit
+    with LazyGraph(path) as graph:
+        last = graph.symbol(y.rhs.val.id)
+        assert last.rhs.val.dump() == y.rhs.val.dump()
+        first = last
+        while first.rhs.val.underlying.a.is_node():
+            first = first.rhs.val.underlying.a
+        assert first.rhs.val.id == state.scope.symbols[0].rhs.val.id
+        copy = graph.load()
+        assert copy.scope.symbols[-1] is last
+        assert copy.dump() == state.dump()
+
+
+def stage_chain(length):
+    x = Integer().bound("x")
+    b = Boolean().bound("b")
+    y = x
+    for i in range(length):
+        y = y + i
+        b = b & (y > x)
+    return x, y, b
+
+
+def test_stream():
+    state = State()
+    with state:
+        function_C_to_A(branchy)
+        stage_chain(50)
+        function_C_to_A(recursive)
+
+    file = io.BytesIO()
+    with SymbolSink(file, frontier=1) as sink:
+        streamed = State(sink=sink)
+        with streamed:
+            function_C_to_A(branchy)
+            x, y, b = stage_chain(50)
+            assert streamed.scope.symbols is sink
+            # Only the last symbol is kept, the others are streamed with their blocks
+            assert sink.num_streamed == len(sink) - 1
+            assert isinstance(y.rhs.val.underlying, Streamed)
+            assert not isinstance(b.rhs.val.underlying, Streamed)
+            assert sink[-1] is b
+            with pytest.raises(SerializationError):
+                sink[0]
+            # Streamed symbols are still found by CSE, which only keeps their id and type
+            num_symbols = len(sink)
+            found = y > x
+            assert isinstance(found, Boolean) and isinstance(found.rhs.val.underlying, Streamed)
+            assert found.rhs.val.id == b.rhs.val.id - 1
+            assert len(sink) == num_symbols
+            assert (y > x) is not found
+            assert not any(isinstance(value, Exp) for value in vars(streamed.scope.cache).values())
+            function_C_to_A(recursive)
+        assert len(sink) == len(state.scope.symbols)
+        # The streamed symbols are dumped as a placeholder
+        assert list(sink) == [sink[-1]]
+        dump = str(streamed)
+        assert f"<{sink.num_streamed} symbols streamed>" in dump
+        assert sink[-1].dump(3) in dump
+        assert streamed.scope.inputs == []
+        with pytest.raises(SerializationError):
+            dumps(streamed)
+
+    with pytest.raises(SerializationError):
+        with streamed:
+            Integer().bound("x") + 1
+    # Columns cannot be streamed
+    with pytest.raises(SerializationError):
+        State(sink=SymbolSink(io.BytesIO()), columnar=True)
+
+    copy = loads(file.getvalue())
+    assert str(copy) == str(state)
+    assert copy._id == state._id
+    assert copy.sink is None
+    # The cache of the root scope was streamed too
+    assert len(copy.scope.cache) == len(state.scope.cache)
+    print(copy)
+
+
+def test_stream_indexed(tmp_path):
+    path = tmp_path / "graph.argon"
+    with open(path, "wb") as file, SymbolSink(file, index=True, frontier=4, buffer_size=64) as sink:
+        with State(cse=False, sink=sink):
+            function_C_to_A(recursive)
+            stage_chain(100)
+            function_C_to_A(branchy)
+
+    with open(path, "rb") as file:
+        state = load(file)
+    with LazyGraph(path) as graph:
+        assert sorted(graph.function_names()) == ["branchy", "helper", "recursive"]
+        (func,) = graph.functions("branchy")
+        assert isinstance(func.rhs.val.underlying, FunctionNew)
+        assert graph.load().dump() == state.dump()
+    print(state)
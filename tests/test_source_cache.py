@@ -0,0 +1,66 @@
+import importlib.util
+import os
+import textwrap
+
+from argon.state import State
+from argon.virtualization.source_cache import source_cache
+
+
+MODULE_SRC = textwrap.dedent(
+    """
+    from argon.virtualization.wrapper import argon_function
+
+
+    @argon_function()
+    def first(x: int) -> int:
+        return x + 1
+
+
+    @argon_function()
+    def second(x: int) -> int:
+        return x - 1
+
+
+    class Holder:
+        @argon_function()
+        def method(self: object, x: int) -> int:
+            return x + 2
+    """
+)
+
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location("argon_source_cache_module", path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore -- the spec is created from a file path
+    spec.loader.exec_module(module)  # type: ignore -- the spec is created from a file path
+    return module
+
+
+def test_source_cache(tmp_path):
+    path = tmp_path / "decorated.py"
+    path.write_text(MODULE_SRC)
+
+    source_cache.clear()
+    module = load_module(path)
+    # Three decorated functions, but the file is only parsed once
+    assert source_cache.parses == 1
+    assert set(source_cache[str(path)].functions) == {"first", "second", "Holder.method"}
+
+    # Virtualizing must not have modified the shared AST
+    cached = source_cache.find_function(str(path), "first")
+    assert cached is not None
+    assert len(cached.decorator_list) == 1
+    assert len(cached.args.kwonlyargs) == 0
+
+    state = State()
+    with state:
+        module.first.virtualized.call_transformed(1)
+        module.second.virtualized.call_transformed(1)
+    print(state)
+
+    # Changing the file invalidates the cached AST
+    path.write_text(MODULE_SRC + "\n\ndef third(x: int) -> int:\n    return x\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert source_cache.find_function(str(path), "third") is not None
+    assert source_cache.parses == 2
@@ -0,0 +1,40 @@
+import inspect
+from argon.srcctx import CaptureMode, SrcCtx, capture_mode
+from argon.state import State
+from argon.types.integer import Integer
+
+
+def test_lazy_srcctx():
+    state = State()
+    with state:
+        a = Integer().const(3)
+        b = a + 4
+        lineno = inspect.currentframe().f_lineno - 1  # type: ignore
+        assert b.ctx is not None
+        assert b.ctx.file == __file__
+        assert b.ctx.positions is not None
+        assert b.ctx.positions.lineno == lineno
+        assert b.ctx == SrcCtx(__file__, b.ctx.positions)
+    print(state)
+
+
+def test_eager_srcctx():
+    state = State()
+    with state, capture_mode(CaptureMode.EAGER):
+        a = Integer().const(3)
+        b = a + 4
+        lineno = inspect.currentframe().f_lineno - 1  # type: ignore
+        assert b.ctx is not None
+        assert b.ctx.positions is not None
+        assert b.ctx.positions.lineno == lineno
+    print(state)
+
+
+def test_no_srcctx():
+    state = State()
+    with state, capture_mode(CaptureMode.NONE):
+        a = Integer().const(3)
+        b = a + 4
+        assert a.ctx is None
+        assert b.ctx is None
+    print(state)
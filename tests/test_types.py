@@ -55,3 +55,16 @@ def test_recursive():
 
 def test_recursive_generic():
     assert TestRecursive2[int]().F is int  # type: ignore
+
+
+def test_fresh():
+    from argon.state import State
+    from argon.types.function import Function
+
+    with State():
+        # Integer does not override fresh(), so its values are created directly
+        x = Integer().bound("x")
+        assert type(x) is Integer and x.rhs.val.name == "x"  # type: ignore -- x is bound
+        # Function does, to parameterize its values by the return type
+        f = Function[Integer]().bound("f")
+        assert f.A == Function[Integer] and f.RETURN_TP is Integer  # type: ignore -- RETURN_TP is provided by ArgonMeta